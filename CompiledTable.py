@@ -0,0 +1,255 @@
+from array import array
+from bisect import bisect_left, insort
+
+
+class CompiledTable(object):
+    """
+    DIR-24-8 forwarding table compiled from a PrefixTrie. The first 24 bits of an address index a
+    2^24 entry table directly; entries of /24 slots covered by longer prefixes point to a 256 entry
+    overflow block indexed by the last octet. An entry is 0 when no route matches, the route id
+    otherwise, or _overflow | block number, so a lookup takes one or two array reads.
+
+    Every prefix with routes owns one route id for as long as it exists, so a change of the best
+    route of an existing prefix only rewrites that id. Adding or emptying a prefix repaints the
+    address range of that prefix only.
+
+    The 2^24 entry table is split in pages of 2^16 entries, one per first octet, and every overflow
+    block is an array of its own. The route id table, the map of prefixes to route ids and the other
+    bookkeeping are split in chunks as well. copy() shares all of them with the copy and either table
+    copies a page, block or chunk before its first change, so a copy patched with update() while
+    readers keep using the original costs the parts the update touches rather than the whole table.
+    """
+    _overflow = 0x80000000
+    _page_bits = 16
+    # route ids per chunk of the route id table
+    _chunk_bits = 10
+    # overflow blocks per chunk of the block table
+    _block_chunk_bits = 8
+    # buckets of the prefix to route id map, chosen by the hash of the prefix
+    _buckets = 1024
+
+    # void
+    def __init__(self, trie):
+        pages = 1 << (24 - self._page_bits)
+        self._pages = [array('I', bytes(4 << self._page_bits)) for _ in range(pages)]
+        self._blocks = []
+        self._next_block = 0
+        # sorted /24 slots pointing to an overflow block, one list per page
+        self._block_slots = [[] for _ in range(pages)]
+        # route id 0 is no route
+        self._routes = [[None] * (1 << self._chunk_bits)]
+        self._next_id = 1
+        self._prefix_ids = [{} for _ in range(self._buckets)]
+        self._free_ids = []
+        self._free_blocks = []
+        self._own_all()
+        for address, mask_length, route in trie.prefixes():
+            # prefixes come in preorder, so every prefix is painted before the more specific ones inside it
+            self._paint(address, mask_length, self._allocate_id(address, mask_length, route))
+
+    def _own_all(self):
+        self._owned_pages = set(range(len(self._pages)))
+        self._owned_blocks = set(range(len(self._blocks) << self._block_chunk_bits))
+        self._owned_block_chunks = set(range(len(self._blocks)))
+        self._owned_block_slots = set(range(len(self._block_slots)))
+        self._owned_routes = set(range(len(self._routes)))
+        self._owned_buckets = set(range(self._buckets))
+
+    def _own_nothing(self):
+        self._owned_pages = set()
+        self._owned_blocks = set()
+        self._owned_block_chunks = set()
+        self._owned_block_slots = set()
+        self._owned_routes = set()
+        self._owned_buckets = set()
+
+    # void
+    def update(self, trie, address, mask_length):
+        # brings the table in line with the trie after the best route of address/mask_length changed
+        self.update_prefixes(trie, [(address, mask_length)])
+
+    # void
+    def update_prefixes(self, trie, prefixes):
+        # brings the table in line with the trie after the best routes of several (address, mask_length)
+        # prefixes changed at once; every prefix id is settled before any range is repainted, since the
+        # repaint of a prefix reads the ids of the prefixes covering it and of those inside it
+        repaint = []
+        for address, mask_length in set(prefixes):
+            route = trie.best(address, mask_length)
+            route_id = self._prefix_id(address, mask_length)
+            if route is not None and route_id is not None:
+                self._set_route(route_id, route)
+            elif route_id is not None:
+                del self._writable_bucket(address, mask_length)[(address, mask_length)]
+                self._set_route(route_id, None)
+                self._free_ids.append(route_id)
+                repaint.append((mask_length, address))
+            elif route is not None:
+                self._allocate_id(address, mask_length, route)
+                repaint.append((mask_length, address))
+        # shortest first, so a repaint inside a range already repainted paints the same entries again
+        for mask_length, address in sorted(repaint):
+            covering = trie.longest_match(address, mask_length)
+            if covering is None:
+                self._paint(address, mask_length, 0)
+            else:
+                covering_network = covering.network
+                self._paint(address, mask_length,
+                            self._prefix_id(int(covering_network.address), covering_network.mask_length))
+            for prefix_address, prefix_length, _ in trie.prefixes(address, mask_length):
+                if prefix_length > mask_length:
+                    self._paint(prefix_address, prefix_length, self._prefix_id(prefix_address, prefix_length))
+
+    # CompiledTable
+    def copy(self):
+        # copies the lists of pages, blocks and chunks only, a few hundred references for a full table
+        table = CompiledTable.__new__(type(self))
+        table._pages = list(self._pages)
+        table._blocks = list(self._blocks)
+        table._next_block = self._next_block
+        table._block_slots = list(self._block_slots)
+        table._routes = list(self._routes)
+        table._next_id = self._next_id
+        table._prefix_ids = list(self._prefix_ids)
+        table._free_ids = list(self._free_ids)
+        table._free_blocks = list(self._free_blocks)
+        table._own_nothing()
+        # everything is shared now, this table copies the parts it changes as well
+        self._own_nothing()
+        return table
+
+    # int or None
+    def _prefix_id(self, address, mask_length):
+        key = (address, mask_length)
+        return self._prefix_ids[hash(key) % self._buckets].get(key)
+
+    # dict, the bucket of the prefix, owned by this table
+    def _writable_bucket(self, address, mask_length):
+        number = hash((address, mask_length)) % self._buckets
+        if number not in self._owned_buckets:
+            self._prefix_ids[number] = dict(self._prefix_ids[number])
+            self._owned_buckets.add(number)
+        return self._prefix_ids[number]
+
+    def _set_route(self, route_id, route):
+        number = route_id >> self._chunk_bits
+        if number == len(self._routes):
+            self._routes.append([None] * (1 << self._chunk_bits))
+            self._owned_routes.add(number)
+        elif number not in self._owned_routes:
+            self._routes[number] = list(self._routes[number])
+            self._owned_routes.add(number)
+        self._routes[number][route_id & ((1 << self._chunk_bits) - 1)] = route
+
+    # int
+    def _allocate_id(self, address, mask_length, route):
+        if self._free_ids:
+            route_id = self._free_ids.pop()
+        else:
+            route_id = self._next_id
+            self._next_id += 1
+        self._set_route(route_id, route)
+        self._writable_bucket(address, mask_length)[(address, mask_length)] = route_id
+        return route_id
+
+    def _paint(self, address, mask_length, entry):
+        if mask_length <= 24:
+            start = address >> 8
+            stop = start + (1 << (24 - mask_length))
+            self._release_blocks(start, stop)
+            self._fill_slots(start, stop, entry)
+            return
+        slot = self._slot(address >> 8)
+        if slot & self._overflow:
+            block = self._writable_block(slot ^ self._overflow)
+        else:
+            block = array('I', [slot]) * 256
+            if self._free_blocks:
+                number = self._free_blocks.pop()
+            else:
+                number = self._next_block
+                self._next_block += 1
+                if not number & ((1 << self._block_chunk_bits) - 1):
+                    self._blocks.append([None] * (1 << self._block_chunk_bits))
+                    self._owned_block_chunks.add(len(self._blocks) - 1)
+            self._writable_block_chunk(number)[number & ((1 << self._block_chunk_bits) - 1)] = block
+            self._owned_blocks.add(number)
+            self._fill_slots(address >> 8, (address >> 8) + 1, self._overflow | number)
+            insort(self._writable_block_slots((address >> 8) >> self._page_bits), address >> 8)
+        start = address & 0xFF
+        count = 1 << (32 - mask_length)
+        block[start:start + count] = array('I', [entry]) * count
+
+    # int, the tbl24 entry of a /24 slot
+    def _slot(self, slot):
+        return self._pages[slot >> self._page_bits][slot & ((1 << self._page_bits) - 1)]
+
+    def _fill_slots(self, start, stop, entry):
+        page_size = 1 << self._page_bits
+        while start < stop:
+            number = start >> self._page_bits
+            offset = start & (page_size - 1)
+            count = min(stop - start, page_size - offset)
+            if number not in self._owned_pages:
+                self._pages[number] = self._pages[number][:]
+                self._owned_pages.add(number)
+            self._pages[number][offset:offset + count] = array('I', [entry]) * count
+            start += count
+
+    # list, the chunk of the block table holding block number, owned by this table
+    def _writable_block_chunk(self, number):
+        chunk = number >> self._block_chunk_bits
+        if chunk not in self._owned_block_chunks:
+            self._blocks[chunk] = list(self._blocks[chunk])
+            self._owned_block_chunks.add(chunk)
+        return self._blocks[chunk]
+
+    # array
+    def _writable_block(self, number):
+        if number not in self._owned_blocks:
+            blocks = self._writable_block_chunk(number)
+            index = number & ((1 << self._block_chunk_bits) - 1)
+            blocks[index] = blocks[index][:]
+            self._owned_blocks.add(number)
+        return self._blocks[number >> self._block_chunk_bits][number & ((1 << self._block_chunk_bits) - 1)]
+
+    # list, the sorted overflow slots of page number, owned by this table
+    def _writable_block_slots(self, number):
+        if number not in self._owned_block_slots:
+            self._block_slots[number] = list(self._block_slots[number])
+            self._owned_block_slots.add(number)
+        return self._block_slots[number]
+
+    def _release_blocks(self, start, stop):
+        for number in range(start >> self._page_bits, ((stop - 1) >> self._page_bits) + 1):
+            slots = self._block_slots[number]
+            first = bisect_left(slots, start)
+            last = bisect_left(slots, stop, first)
+            if first == last:
+                continue
+            slots = self._writable_block_slots(number)
+            for slot in slots[first:last]:
+                self._free_blocks.append(self._slot(slot) ^ self._overflow)
+            del slots[first:last]
+
+    # Route or None
+    def lookup(self, address):
+        # the shifts and masks are those of _page_bits, _block_chunk_bits and _chunk_bits
+        entry = self._pages[address >> 24][address >> 8 & 0xFFFF]
+        if entry & self._overflow:
+            entry ^= self._overflow
+            entry = self._blocks[entry >> 8][entry & 0xFF][address & 0xFF]
+        return self._routes[entry >> 10][entry & 0x3FF]
+
+    # int
+    @property
+    def overflow_blocks(self):
+        return sum(len(slots) for slots in self._block_slots)
+
+    # int, bytes used by the lookup arrays and the route id table, including the ones shared with copies
+    @property
+    def memory_footprint(self):
+        blocks = [block for chunk in self._blocks for block in chunk if block is not None]
+        return (sum(page.itemsize * len(page) for page in self._pages) +
+                sum(block.itemsize * len(block) for block in blocks) +
+                sum(chunk.__sizeof__() for chunk in self._routes))
@@ -1,72 +1,97 @@
+import struct
+
+
 class IllegalArgumentException(Exception):
     pass
 
 
 class IPv4Address(object):
+    __slots__ = ('_int_ip', '_string_ip')
+    _interned = {}
+    _intern_limit = 1 << 16
+    _packed = struct.Struct('!I')
+
     def __init__(self, ip_address):
         (self._int_ip, self._string_ip) = self._validate_ip(ip_address)
 
     @classmethod
-    def _validate_ip(cls, ip_address):
+    def interned(cls, ip_address):
         """
-        Verifies correctness of ip_address according to IPv4 address format
+        Returns a shared IPv4Address for frequently used addresses. The first _intern_limit distinct
+        addresses are kept, later ones are created as usual.
 
         Args:
             ip_address: string or integer
         Returns:
-            value1: representation of ip address in int format
-            value2: representation of ip address in string format
+            IPv4Address
         """
-        if isinstance(ip_address, str):
-            octets = ip_address.split('.')
-            binary_octets = ['{0:08b}'.format(int(octet)) for octet in octets if cls._is_octet(octet)]
-            return int(''.join(binary_octets), 2), ip_address
-        if isinstance(ip_address, int):
-            if ip_address < 0 or ip_address > 4294967295:
-                raise IllegalArgumentException
-            binary_str = '{0:032b}'.format(ip_address)
-            octets = []
-            binary_octets = []
-            for i in range(0, 32, 8):
-                octet = binary_str[i:i+8]
-                octets.append(str(int(octet, 2)))
-                binary_octets.append(octet)
-            if all(octet for octet in octets if cls._is_octet(octet)):
-                return ip_address, '.'.join(octets)
-        raise IllegalArgumentException
+        address = cls._interned.get(ip_address)
+        if address is None:
+            address = cls(ip_address)
+            if len(cls._interned) < cls._intern_limit:
+                cls._interned[ip_address] = address
+        return address
 
     @classmethod
-    def _is_octet(cls, octet):
+    def from_bytes(cls, buffer, offset=0):
         """
-        Verifies if particular octet is in IPv4 address format
+        Reads an address stored in network byte order, e.g. from a packet, without decoding it to a string
 
         Args:
-            octet: integer or string
+            buffer: bytes, bytearray, memoryview or another bytes-like object
+            offset: position of the first address byte
         Returns:
-            True or raises IllegalArgumentException
+            IPv4Address
         """
-        if isinstance(octet, int):
-            octet = str(octet)
-        if octet.isdigit():
-            int_octet = int(octet)
-            if 0 <= int_octet <= 255:
-                return True
+        try:
+            return cls(cls._packed.unpack_from(buffer, offset)[0])
+        except struct.error:
+            raise IllegalArgumentException
+
+    @classmethod
+    def _validate_ip(cls, ip_address):
+        """
+        Verifies correctness of ip_address according to IPv4 address format
+
+        Args:
+            ip_address: string or integer
+        Returns:
+            value1: representation of ip address in int format
+            value2: representation of ip address in string format, None for integers until first str()
+        """
+        if isinstance(ip_address, str):
+            octets = ip_address.split('.')
+            if len(octets) == 4:
+                first, second, third, fourth = octets
+                if first.isdecimal() and second.isdecimal() and third.isdecimal() and fourth.isdecimal():
+                    first, second, third, fourth = int(first), int(second), int(third), int(fourth)
+                    if first <= 255 and second <= 255 and third <= 255 and fourth <= 255:
+                        return first << 24 | second << 16 | third << 8 | fourth, ip_address
+        elif isinstance(ip_address, int):
+            if 0 <= ip_address <= 4294967295:
+                return ip_address, None
         raise IllegalArgumentException
 
     def __str__(self):
+        if self._string_ip is None:
+            address = self._int_ip
+            self._string_ip = '%d.%d.%d.%d' % (address >> 24, address >> 16 & 0xFF, address >> 8 & 0xFF, address & 0xFF)
         return self._string_ip
 
     def __int__(self):
         return self._int_ip
 
+    def __hash__(self):
+        return hash(self._int_ip)
+
     def __eq__(self, other):
-        return int(self) == int(other)
+        return self._int_ip == int(other)
 
     def __gt__(self, other):
-        return int(self) > int(other)
+        return self._int_ip > int(other)
 
     def __lt__(self, other):
-        return int(self) < int(other)
+        return self._int_ip < int(other)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,114 @@
+import json
+
+
+class LookupStats(object):
+    """
+    Lookup counters of a Router: lookups, misses (no route matches), candidates examined (prefixes with
+    routes on the path to the matching one), hits per route and a latency histogram with log2 buckets in
+    nanoseconds. Batch lookups are counted, but their latency is not recorded.
+
+    Counters are updated without locking, so they are approximate while several threads look up at once.
+    """
+    _buckets = 40
+
+    # void
+    def __init__(self):
+        self.reset()
+
+    # void
+    def reset(self):
+        self.lookups = 0
+        self.misses = 0
+        self.candidates = 0
+        self.max_candidates = 0
+        self.route_hits = {}
+        self.latency_histogram = [0] * self._buckets
+        # nanoseconds, of the lookups in latency_histogram
+        self.latency_total = 0
+
+    # void
+    def record(self, route, candidates, latency):
+        # latency in nanoseconds
+        self.lookups += 1
+        self.candidates += candidates
+        if candidates > self.max_candidates:
+            self.max_candidates = candidates
+        if route is None:
+            self.misses += 1
+        else:
+            self.route_hits[route] = self.route_hits.get(route, 0) + 1
+        self.latency_histogram[min(latency.bit_length(), self._buckets - 1)] += 1
+        self.latency_total += latency
+
+    # void
+    def record_batch(self, routes, indices):
+        # indices into routes as returned by Router.route_for_addresses
+        counts = {}
+        for index in indices:
+            counts[index] = counts.get(index, 0) + 1
+        self.lookups += len(indices)
+        self.misses += counts.pop(-1, 0)
+        for index, count in counts.items():
+            route = routes[int(index)]
+            self.route_hits[route] = self.route_hits.get(route, 0) + count
+
+    # int, upper bound in nanoseconds of the bucket holding the given percentile
+    def latency_percentile(self, percentile):
+        return histogram_percentile(self.latency_histogram, percentile)
+
+    # list of (Route, int hits), most hit first
+    def top_routes(self, count=10):
+        return sorted(self.route_hits.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    # dict
+    def snapshot(self, top=10):
+        timed = sum(self.latency_histogram)
+        return {'lookups': self.lookups, 'misses': self.misses,
+                'mean_candidates': self.candidates / timed if timed else 0.0,
+                'max_candidates': self.max_candidates,
+                'latency_p50_ns': self.latency_percentile(50), 'latency_p99_ns': self.latency_percentile(99),
+                'latency_histogram_ns': {1 << bucket: count for bucket, count in enumerate(self.latency_histogram)
+                                         if count},
+                'top_routes': [(repr(route), hits) for route, hits in self.top_routes(top)]}
+
+    # str
+    def to_json(self, top=10):
+        return json.dumps(self.snapshot(top), sort_keys=True)
+
+    # str, Prometheus text exposition format
+    def to_text(self, top=10):
+        lines = ['# TYPE router_lookups_total counter', 'router_lookups_total {}'.format(self.lookups),
+                 '# TYPE router_lookup_misses_total counter', 'router_lookup_misses_total {}'.format(self.misses),
+                 '# TYPE router_lookup_candidates_total counter',
+                 'router_lookup_candidates_total {}'.format(self.candidates),
+                 '# TYPE router_lookup_latency_ns histogram']
+        seen = 0
+        for bucket, count in enumerate(self.latency_histogram):
+            seen += count
+            if count:
+                lines.append('router_lookup_latency_ns_bucket{{le="{}"}} {}'.format(1 << bucket, seen))
+        lines.append('router_lookup_latency_ns_bucket{{le="+Inf"}} {}'.format(seen))
+        lines.append('router_lookup_latency_ns_sum {}'.format(self.latency_total))
+        lines.append('router_lookup_latency_ns_count {}'.format(seen))
+        lines.append('# TYPE router_route_hits_total counter')
+        for route, hits in self.top_routes(top):
+            network = route.network
+            lines.append('router_route_hits_total{{network="{}/{}",interface="{}",metric="{}"}} {}'.format(
+                network.address, network.mask_length, _label_value(route.interface_name), route.metric, hits))
+        return '\n'.join(lines) + '\n'
+
+
+# int, upper bound of the log2 bucket of histogram holding the given percentile, 0 when it is empty
+def histogram_percentile(histogram, percentile):
+    target = sum(histogram) * percentile / 100.0
+    seen = 0
+    for bucket, count in enumerate(histogram):
+        seen += count
+        if count and seen >= target:
+            return 1 << bucket
+    return 0
+
+
+# str, escaped for a label value of the Prometheus text format
+def _label_value(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -1,11 +1,26 @@
 from IPv4Address import IPv4Address, IllegalArgumentException
+from SpecialPurpose import is_public
 
 
 class Network(object):
+    """
+    IPv4 network, a value which never changes once created: equal networks hash alike and networks
+    order by address and mask length. The derived addresses are built on first use and kept; the int_
+    properties return integers and build no address at all.
+    """
+    __slots__ = ('_address', '_int_address', '_mask', '_mask_length', '_mask_address', '_str_mask',
+                 '_broadcast_address', '_first_usable_address', '_last_usable_address')
+
     def __init__(self, ip_address, mask_length):
         self._mask = self._validate(mask_length)
         self._mask_length = mask_length
-        self._address = IPv4Address(int(ip_address) & self._mask)
+        self._int_address = int(ip_address) & self._mask
+        self._address = IPv4Address(self._int_address)
+        self._mask_address = None
+        self._str_mask = None
+        self._broadcast_address = None
+        self._first_usable_address = None
+        self._last_usable_address = None
 
     @classmethod
     def _validate(cls, mask_length):
@@ -16,37 +31,59 @@ class Network(object):
         raise IllegalArgumentException
 
     def contains(self, address):
-        return int(address) & self._mask == self._address
+        return int(address) & self._mask == self._int_address
 
     @property
     def address(self):
         return self._address
 
+    @property
+    def int_address(self):
+        return self._int_address
+
     @property
     def broadcast_address(self):
-        return IPv4Address((int(self._address) | self._mask ^ 0xFFFFFFFF))
+        if self._broadcast_address is None:
+            self._broadcast_address = IPv4Address(self.int_broadcast_address)
+        return self._broadcast_address
+
+    @property
+    def int_broadcast_address(self):
+        return self._int_address | self._mask ^ 0xFFFFFFFF
 
     @property
     def first_usable_address(self):
-        return IPv4Address(int(self._address)+1)
+        if self._first_usable_address is None:
+            self._first_usable_address = IPv4Address(self._int_address + 1)
+        return self._first_usable_address
 
     @property
     def last_usable_address(self):
-        return IPv4Address((int(self._address) | self._mask ^ 0xFFFFFFFF) - 1)
+        if self._last_usable_address is None:
+            self._last_usable_address = IPv4Address(self.int_broadcast_address - 1)
+        return self._last_usable_address
 
     # IPv4Address
     @property
     def mask(self):
-        return IPv4Address(self._mask)
+        if self._mask_address is None:
+            self._mask_address = IPv4Address(self._mask)
+        return self._mask_address
 
     @property
     def int_mask(self):
         return self._mask
 
+    @property
+    def int_wildcard(self):
+        return self._mask ^ 0xFFFFFFFF
+
     @property
     def str_mask(self):
-        str_mask = '{0:032b}'.format(self._mask)
-        return '.'.join(str(int(str_mask[i:i+8], 2)) for i in range(0, 32, 8))
+        if self._str_mask is None:
+            str_mask = '{0:032b}'.format(self._mask)
+            self._str_mask = '.'.join(str(int(str_mask[i:i+8], 2)) for i in range(0, 32, 8))
+        return self._str_mask
 
     @property
     def mask_length(self):
@@ -56,9 +93,9 @@ class Network(object):
     def subnets(self):
         if self._mask_length < 32:
             new_mask_length = self._mask_length + 1
-            subnets_list = [Network(int(self._address), new_mask_length)]
+            subnets_list = [Network(self._int_address, new_mask_length)]
             bit_setter = 1 << (32-new_mask_length)
-            subnets_list.append(Network(int(self._address) | bit_setter, new_mask_length))
+            subnets_list.append(Network(self._int_address | bit_setter, new_mask_length))
             return subnets_list
 
     @property
@@ -66,21 +103,46 @@ class Network(object):
         return 2 ** (32-self._mask_length) - 2
 
     def is_public(self):
-        if (IPv4Address('9.255.255.255') < self._address < IPv4Address('11.0.0.0')) or \
-                (IPv4Address('126.255.255.255') < self._address < IPv4Address('128.0.0.0')):
-            return False
-        if (IPv4Address('172.15.255.255') < self._address < IPv4Address('172.32.0.0')) or \
-                (IPv4Address('192.167.255.255') < self._address < IPv4Address('192.169.0.0')):
-            return False
-        if self._address > IPv4Address('223.255.255.255'):
-            return False
-        return True
+        return is_public(self._int_address)
 
     def __str__(self):
         return '{}/{}'.format(str(self._address), self._mask_length)
 
+    def _key(self):
+        return self._int_address, self._mask_length
+
     def __eq__(self, other):
-        return self._address == other.address and self._mask_length == other.mask_length
+        if not isinstance(other, Network):
+            return NotImplemented
+        return self._int_address == other._int_address and self._mask_length == other._mask_length
+
+    def __ne__(self, other):
+        if not isinstance(other, Network):
+            return NotImplemented
+        return not self == other
+
+    def __lt__(self, other):
+        if not isinstance(other, Network):
+            return NotImplemented
+        return self._key() < other._key()
+
+    def __gt__(self, other):
+        if not isinstance(other, Network):
+            return NotImplemented
+        return self._key() > other._key()
+
+    def __le__(self, other):
+        if not isinstance(other, Network):
+            return NotImplemented
+        return self._key() <= other._key()
+
+    def __ge__(self, other):
+        if not isinstance(other, Network):
+            return NotImplemented
+        return self._key() >= other._key()
+
+    def __hash__(self):
+        return hash(self._key())
 
 if __name__ == '__main__':
     ip_address = IPv4Address('172.16.128.128')
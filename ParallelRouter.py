@@ -0,0 +1,84 @@
+import multiprocessing
+from array import array
+
+from RouteTable import RouteTable
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# RouteTable of the worker process
+_table = None
+
+
+def _init_worker(table):
+    global _table
+    _table = table
+
+
+def _lookup_chunk(addresses):
+    return _table.lookup_many(addresses)
+
+
+class ParallelRouter(object):
+    """
+    Process pool for bulk lookups. The best route of every prefix of a Router is copied once into a
+    compact RouteTable that every worker receives when it starts (shared copy-on-write pages with the
+    fork start method); address batches are then split into chunks which are looked up in parallel and
+    returned in input order.
+
+    Results are indices into routes, which is Router.indexed_routes at the time the pool was created,
+    so they are identical to Router.route_for_addresses on the same table.
+    """
+
+    # void
+    def __init__(self, router, processes=None, chunk_size=1 << 16):
+        self._routes = router.indexed_routes
+        self._table = RouteTable.from_routes(self._routes)
+        # build the lookup index before the workers start, so they inherit it
+        self._table.lookup(0)
+        self._chunk_size = chunk_size
+        self._pool = multiprocessing.Pool(processes, initializer=_init_worker, initargs=(self._table,))
+
+    # tuple of Route
+    @property
+    def routes(self):
+        return self._routes
+
+    # numpy.ndarray of int64 (array('l') without NumPy) of indices into routes, -1 where no route matches
+    def route_for_addresses(self, addresses):
+        # addresses as VectorTable.address_array takes them
+        results = self._pool.map(_lookup_chunk, self._chunks(addresses))
+        if numpy is not None:
+            return numpy.concatenate(results) if results else numpy.empty(0, dtype=numpy.int64)
+        merged = array('l')
+        for result in results:
+            merged.extend(result)
+        return merged
+
+    # generator of route index arrays, one per input batch, in input order
+    def imap(self, batches):
+        # batches are looked up while later ones are still being read, for streams too large for memory
+        return self._pool.imap(_lookup_chunk, batches)
+
+    # list
+    def _chunks(self, addresses):
+        if isinstance(addresses, (bytes, bytearray, memoryview)):
+            addresses = memoryview(addresses).cast('B').cast('I')
+        if isinstance(addresses, memoryview):
+            addresses = array('I', addresses)
+        elif not isinstance(addresses, array) and (numpy is None or not isinstance(addresses, numpy.ndarray)):
+            addresses = array('I', addresses)
+        return [addresses[start:start + self._chunk_size] for start in range(0, len(addresses), self._chunk_size)]
+
+    # void
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
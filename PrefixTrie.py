@@ -0,0 +1,275 @@
+class _Node(object):
+    __slots__ = ('zero', 'one', 'routes', 'best', 'group', 'owner')
+
+    # void
+    def __init__(self, owner):
+        self.zero = None
+        self.one = None
+        self.routes = None
+        self.best = None
+        self.group = None
+        self.owner = owner
+
+    # _Node
+    def copy(self, owner):
+        node = _Node(owner)
+        node.zero = self.zero
+        node.one = self.one
+        node.routes = list(self.routes) if self.routes is not None else None
+        node.best = self.best
+        node.group = self.group
+        return node
+
+
+class PrefixTrie(object):
+    """
+    Binary trie keyed on the integer network address, 32 bits wide unless given another width. Every
+    node on depth N corresponds to a prefix of length N and keeps the routes for that prefix together
+    with the best one (lowest metric, the first inserted wins on equal metrics), so a lookup walks at
+    most width nodes regardless of table size, and stops where the path to the address ends.
+    Every node also keeps the equal-cost group of its prefix, all routes with the best metric ordered by
+    gateway and interface name, for multipath lookups.
+
+    copy() is O(1): both tries share all nodes and each one copies the nodes on the path to a change
+    before applying it (path copying), so neither sees the changes of the other.
+    """
+
+    # void
+    def __init__(self, routes=(), width=32):
+        # width is the address width in bits, 128 for IPv6
+        self._width = width
+        # nodes belonging to another owner are shared with a copy and must not be changed in place
+        self._owner = object()
+        self._root = _Node(self._owner)
+        self._size = 0
+        for route in routes:
+            self.insert(route)
+
+    # bool, True when the best route of the route's prefix changed
+    def insert(self, route):
+        network = route.network
+        address = int(network.address)
+        owner = self._owner
+        node = self._writable_root()
+        for shift in range(self._width - 1, self._width - 1 - network.mask_length, -1):
+            if address >> shift & 1:
+                child = node.one
+                if child is None:
+                    child = node.one = _Node(owner)
+                elif child.owner is not owner:
+                    child = node.one = child.copy(owner)
+            else:
+                child = node.zero
+                if child is None:
+                    child = node.zero = _Node(owner)
+                elif child.owner is not owner:
+                    child = node.zero = child.copy(owner)
+            node = child
+        self._size += 1
+        if node.routes is None:
+            node.routes = [route]
+            node.best = route
+            node.group = (route,)
+            return True
+        node.routes.append(route)
+        if route.metric < node.best.metric:
+            node.best = route
+            node.group = (route,)
+            return True
+        if route.metric == node.best.metric:
+            node.group = self._group(node.group + (route,))
+        return False
+
+    # bool, True when the best route of the route's prefix changed
+    def remove(self, route):
+        # raises ValueError
+        network = route.network
+        address = int(network.address)
+        path = [self._root]
+        for shift in range(self._width - 1, self._width - 1 - network.mask_length, -1):
+            node = path[-1].one if address >> shift & 1 else path[-1].zero
+            if node is None:
+                raise ValueError
+            path.append(node)
+        if path[-1].routes is None:
+            raise ValueError
+        index = path[-1].routes.index(route)
+        path[0] = self._writable_root()
+        for depth in range(1, len(path)):
+            if path[depth].owner is not self._owner:
+                path[depth] = path[depth].copy(self._owner)
+                if address >> (self._width - depth) & 1:
+                    path[depth - 1].one = path[depth]
+                else:
+                    path[depth - 1].zero = path[depth]
+        node = path[-1]
+        removed = node.routes.pop(index)
+        self._size -= 1
+        if node.routes:
+            if removed is not node.best:
+                if removed.metric == node.best.metric:
+                    node.group = tuple(route for route in node.group if route is not removed)
+                return False
+            node.best = min(node.routes, key=lambda x: x.metric)
+            node.group = self._group([route for route in node.routes if route.metric == node.best.metric])
+            return True
+        node.routes = None
+        node.best = None
+        node.group = None
+        # drop the nodes which no longer lead to any route
+        while len(path) > 1 and node.routes is None and node.zero is None and node.one is None:
+            path.pop()
+            if path[-1].one is node:
+                path[-1].one = None
+            else:
+                path[-1].zero = None
+            node = path[-1]
+        return True
+
+    # tuple of Route in a stable order, independent of the insertion order
+    @classmethod
+    def _group(cls, routes):
+        # the gateway of a Router.Route may be None
+        return tuple(sorted(routes, key=lambda route: (int(route.gateway) if route.gateway is not None else 0,
+                                                       route.interface_name)))
+
+    # PrefixTrie
+    def copy(self):
+        trie = PrefixTrie.__new__(type(self))
+        trie._width = self._width
+        trie._owner = object()
+        trie._root = self._root
+        trie._size = self._size
+        # the nodes are shared now, so this trie copies them on its next changes as well
+        self._owner = object()
+        return trie
+
+    # _Node
+    def _writable_root(self):
+        if self._root.owner is not self._owner:
+            self._root = self._root.copy(self._owner)
+        return self._root
+
+    # Route or None
+    def best(self, address, mask_length):
+        node = self._node(address, mask_length)
+        return node.best if node is not None else None
+
+    # Route or None, the best route of the longest prefix covering address/mask_length
+    def longest_match(self, address, mask_length):
+        node = self._root
+        best = node.best
+        for shift in range(self._width - 1, self._width - 1 - mask_length, -1):
+            node = node.one if address >> shift & 1 else node.zero
+            if node is None:
+                break
+            if node.best is not None:
+                best = node.best
+        return best
+
+    # Route or None
+    def lookup(self, address):
+        node = self._root
+        best = node.best
+        shift = self._width - 1
+        while shift >= 0:
+            node = node.one if address >> shift & 1 else node.zero
+            if node is None:
+                break
+            if node.best is not None:
+                best = node.best
+            shift -= 1
+        return best
+
+    # int, the number of prefixes with routes which match address
+    def count_matches(self, address):
+        node = self._root
+        count = node.best is not None
+        shift = self._width - 1
+        while shift >= 0:
+            node = node.one if address >> shift & 1 else node.zero
+            if node is None:
+                break
+            count += node.best is not None
+            shift -= 1
+        return count
+
+    # tuple of Route or None, the equal-cost group of the longest prefix matching address
+    def lookup_group(self, address):
+        node = self._root
+        group = node.group
+        shift = self._width - 1
+        while shift >= 0:
+            node = node.one if address >> shift & 1 else node.zero
+            if node is None:
+                break
+            if node.group is not None:
+                group = node.group
+            shift -= 1
+        return group
+
+    # generator of (int address, int mask_length, best Route) in address order
+    def prefixes(self, address=0, mask_length=0):
+        # only the prefixes inside address/mask_length, which itself is included
+        node = self._node(address, mask_length)
+        if node is None:
+            return
+        stack = [(node, address & ~((1 << self._width - mask_length) - 1), mask_length)]
+        while stack:
+            node, address, depth = stack.pop()
+            if node.best is not None:
+                yield address, depth, node.best
+            if node.one is not None:
+                stack.append((node.one, address | 1 << (self._width - 1 - depth), depth + 1))
+            if node.zero is not None:
+                stack.append((node.zero, address, depth + 1))
+
+    # generator of Route, the routes of the prefixes shorter than address/mask_length which cover it,
+    # shortest first
+    def covering(self, address, mask_length):
+        node = self._root
+        for shift in range(self._width - 1, self._width - 1 - mask_length, -1):
+            if node.routes is not None:
+                for route in node.routes:
+                    yield route
+            node = node.one if address >> shift & 1 else node.zero
+            if node is None:
+                return
+
+    # generator of Route, the routes of address/mask_length itself
+    def exact(self, address, mask_length):
+        node = self._node(address, mask_length)
+        if node is not None and node.routes is not None:
+            for route in node.routes:
+                yield route
+
+    # generator of Route, the routes of the prefixes longer than address/mask_length inside it, in the
+    # address order of their prefixes
+    def more_specifics(self, address, mask_length):
+        # walks the subtree of the prefix, whose nodes all lead to a route
+        node = self._node(address, mask_length)
+        if node is None:
+            return
+        stack = [node.one, node.zero]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if node.routes is not None:
+                for route in node.routes:
+                    yield route
+            stack.append(node.one)
+            stack.append(node.zero)
+
+    # _Node or None
+    def _node(self, address, mask_length):
+        node = self._root
+        for shift in range(self._width - 1, self._width - 1 - mask_length, -1):
+            node = node.one if address >> shift & 1 else node.zero
+            if node is None:
+                break
+        return node
+
+    # int
+    def __len__(self):
+        return self._size
@@ -0,0 +1,116 @@
+import time
+
+
+class RouteAnalysis(object):
+    """
+    Routes of a table which forwarding never needs, in three kinds:
+
+    duplicates: a route of the same prefix has a lower metric, so the route is never selected.
+    unreachable: the more specific prefixes together cover the whole prefix, so no address ever
+    matches it.
+    redundant: every route of the prefix with the best metric has the same next hops, gateway and
+    interface, as the nearest covering prefix which is kept, so the covering prefix forwards the
+    addresses of the prefix the same way.
+
+    The routes of a prefix with the best metric besides the one route_for_address returns are kept,
+    Router.next_hops and Router.route_for_flow choose among them. Removing all of these routes leaves
+    every address with the same next hops, although route_for_address may return the covering route
+    instead of a redundant one.
+    """
+
+    # void
+    def __init__(self):
+        self.routes = 0
+        self.duplicates = []
+        self.unreachable = []
+        self.redundant = []
+        self.seconds = 0.0
+
+    # list of Route
+    @property
+    def removable(self):
+        return self.duplicates + self.unreachable + self.redundant
+
+    # str
+    def __repr__(self):
+        return 'routes: {}, duplicates: {}, unreachable: {}, redundant: {}'.format(
+            self.routes, len(self.duplicates), len(self.unreachable), len(self.redundant))
+
+
+# RouteAnalysis
+def analyze_routes(routes):
+    # routes of both families; the prefixes are sorted once and walked twice, O(n log n) in all
+    analysis = RouteAnalysis()
+    start = time.perf_counter()
+    prefixes = {}
+    for route in routes:
+        network = route.network
+        prefixes.setdefault((network.version, network.int_address, network.mask_length), []).append(route)
+        analysis.routes += 1
+    # sorted by family and address, a prefix comes right before the prefixes inside it
+    keys = sorted(prefixes)
+    covered = _covered_sizes(keys)
+    # the next hops of the covering prefixes which are kept, nearest last
+    kept = []
+    for key in keys:
+        version, address, mask_length = key
+        while kept and not _contains(kept[-1][0], key):
+            kept.pop()
+        prefix_routes = prefixes[key]
+        best = min(route.metric for route in prefix_routes)
+        analysis.duplicates.extend(route for route in prefix_routes if route.metric != best)
+        best_routes = [route for route in prefix_routes if route.metric == best]
+        if covered.get(key, 0) == 1 << (_width(version) - mask_length):
+            analysis.unreachable.extend(best_routes)
+            continue
+        next_hops = sorted((int(route.gateway), route.interface_name) for route in best_routes)
+        if kept and kept[-1][1] == next_hops:
+            analysis.redundant.extend(best_routes)
+            continue
+        kept.append((key, next_hops))
+    analysis.seconds = time.perf_counter() - start
+    return analysis
+
+
+# RouteAnalysis
+def prune_routes(router):
+    # removes the routes analyze_routes finds from router in one update, analyzed under its write lock,
+    # so no other update comes in between
+    analyses = []
+
+    def changes(routes):
+        analyses.append(analyze_routes(routes))
+        return (), analyses[-1].removable
+
+    router.update_with(changes)
+    return analyses[-1]
+
+
+# dict of (version, address, mask_length) to the number of its addresses the prefixes inside it cover
+def _covered_sizes(keys):
+    # keys sorted; the prefixes form a forest in which the children of a prefix are disjoint, so the
+    # children cover a prefix completely when their sizes add up to its size
+    covered = {}
+    parents = []
+    for key in keys:
+        while parents and not _contains(parents[-1], key):
+            parents.pop()
+        if parents:
+            parent = parents[-1]
+            covered[parent] = covered.get(parent, 0) + (1 << (_width(key[0]) - key[2]))
+        parents.append(key)
+    return covered
+
+
+# bool, whether the prefix outer contains the longer prefix inner
+def _contains(outer, inner):
+    version, address, mask_length = outer
+    if version != inner[0] or mask_length >= inner[2]:
+        return False
+    shift = _width(version) - mask_length
+    return address >> shift == inner[1] >> shift
+
+
+# int
+def _width(version):
+    return 32 if version == 4 else 128
@@ -0,0 +1,107 @@
+from collections import OrderedDict, deque
+
+
+class RouteCache(object):
+    """
+    Bounded LRU cache of lookup results keyed by the integer address. Negative results (None) are
+    cached as well.
+
+    Entries are stamped with the generation they were filled in. Every table change that alters a
+    lookup result bumps the generation and is recorded with its prefix in a short change log; an
+    entry from an older generation stays valid unless one of the later changes covers its address,
+    so hot addresses survive unrelated updates. Entries older than the change log are dropped.
+
+    Lookups may run in several threads at once while one writer calls invalidate(); the hit and miss
+    counters are approximate then.
+    """
+
+    # void
+    def __init__(self, capacity=4096, history=64):
+        if not isinstance(capacity, int) or capacity <= 0:
+            raise ValueError
+        self._capacity = capacity
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._changes = deque(maxlen=history)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    # Route or None
+    def lookup(self, address, resolve):
+        # resolve(address) computes the result on a miss. Entries are stamped with the generation seen
+        # before resolving, so a result computed while the table changed is checked again on its next hit
+        generation = self._generation
+        entry = self._entries.get(address)
+        if entry is not None and (entry[1] == generation or self._still_valid(address, entry, generation)):
+            self._touch(address)
+            self._hits += 1
+            return entry[0]
+        self._misses += 1
+        route = resolve(address)
+        self._entries[address] = (route, generation)
+        self._touch(address)
+        if len(self._entries) > self._capacity:
+            try:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+            except KeyError:
+                pass
+        return route
+
+    def _touch(self, address):
+        try:
+            self._entries.move_to_end(address)
+        except KeyError:
+            # evicted by a concurrent lookup
+            pass
+
+    def _still_valid(self, address, entry, generation):
+        route, filled = entry
+        # copied first, the change log may grow while it is scanned
+        changes = tuple(self._changes)
+        if generation - filled > len(changes):
+            return False
+        for change_generation, network, mask in reversed(changes):
+            if change_generation <= filled:
+                break
+            if address & mask == network:
+                return False
+        self._entries[address] = (route, generation)
+        return True
+
+    # void
+    def invalidate(self, network, mask_length):
+        # the lookup result may have changed for the addresses inside network/mask_length
+        self._generation += 1
+        self._changes.append((self._generation, network, (0xFFFFFFFF << (32 - mask_length)) & 0xFFFFFFFF))
+
+    # void
+    def clear(self):
+        self._entries.clear()
+        self._changes.clear()
+        self._generation += 1
+
+    # int
+    @property
+    def generation(self):
+        return self._generation
+
+    # int
+    @property
+    def hits(self):
+        return self._hits
+
+    # int
+    @property
+    def misses(self):
+        return self._misses
+
+    # int
+    @property
+    def evictions(self):
+        return self._evictions
+
+    # int
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,132 @@
+import time
+
+from main import IPv4Address, IPv6Address, Network, Route
+from RouteAnalysis import prune_routes
+
+
+class LoadReport(object):
+    # void
+    def __init__(self):
+        self.lines = 0
+        self.loaded = 0
+        # list of (line number, line, message)
+        self.errors = []
+        self.seconds = 0.0
+        # RouteAnalysis of the routes pruned after loading, None when not pruned
+        self.analysis = None
+
+    # float
+    @property
+    def lines_per_second(self):
+        if self.seconds:
+            return self.lines / self.seconds
+        return 0.0
+
+    # str
+    def __repr__(self):
+        return 'lines: {}, loaded: {}, errors: {}, {:.0f} lines/s'.format(self.lines, self.loaded, len(self.errors),
+                                                                           self.lines_per_second)
+
+
+# Network
+def parse_network(cidr):
+    # raises InvalidIpError, InvalidMaskError, ValueError
+    # IPv4 or IPv6, a plain address is a host route
+    address, separator, mask_length = cidr.partition('/')
+    address = IPv6Address(address) if ':' in address else IPv4Address(address)
+    if not separator:
+        return Network(address, address._width)
+    if not mask_length.isdecimal():
+        raise ValueError('invalid mask length')
+    return Network(address, int(mask_length))
+
+
+# Route
+def parse_csv_line(line):
+    # network,gateway,interface,metric; an empty gateway means a directly connected network
+    fields = line.split(',')
+    if len(fields) != 4:
+        raise ValueError('expected 4 fields, got {}'.format(len(fields)))
+    cidr, gateway, interface_name, metric = (field.strip() for field in fields)
+    if not interface_name:
+        raise ValueError('missing interface')
+    if not metric.isdecimal():
+        raise ValueError('invalid metric')
+    return Route(parse_network(cidr), gateway or None, interface_name, int(metric))
+
+
+# Route
+def parse_ip_route_line(line):
+    # ip route show format: <network|default> [via <gateway>] dev <interface> [... metric <metric>] [...]
+    fields = line.split()
+    options = _ip_route_options(fields[1:])
+    if fields[0] == 'default':
+        # ip -6 route shows the IPv6 default route as default too
+        network = Network(IPv6Address(0) if ':' in options.get('via', '') else IPv4Address(0), 0)
+    else:
+        network = parse_network(fields[0])
+    if 'dev' not in options:
+        raise ValueError('missing dev')
+    metric = options.get('metric', '0')
+    if not metric.isdecimal():
+        raise ValueError('invalid metric')
+    return Route(network, options.get('via'), options['dev'], int(metric))
+
+
+# dict
+def _ip_route_options(fields):
+    # keyword/value pairs, flag keywords without a value (onlink, linkdown, ...) are skipped
+    options = {}
+    index = 0
+    while index < len(fields):
+        if fields[index] in ('via', 'dev', 'metric', 'proto', 'scope', 'src', 'table', 'mtu', 'type'):
+            if index + 1 >= len(fields):
+                raise ValueError('missing value for {}'.format(fields[index]))
+            options[fields[index]] = fields[index + 1]
+            index += 2
+        else:
+            index += 1
+    return options
+
+
+_parsers = {'csv': parse_csv_line, 'ip': parse_ip_route_line}
+_headers = ('network', 'cidr', 'prefix', 'destination')
+
+
+# generator of Route
+def iter_routes(lines, line_format='csv', report=None):
+    # blank lines, '#' comments and a csv header are skipped, malformed lines are recorded in report.errors
+    parse = _parsers[line_format]
+    if report is None:
+        report = LoadReport()
+    for number, line in enumerate(lines, 1):
+        report.lines = number
+        line = line.strip()
+        if not line or line[0] == '#':
+            continue
+        if number == 1 and line_format == 'csv' and line.split(',')[0].strip().lower() in _headers:
+            continue
+        try:
+            route = parse(line)
+        except ValueError as error:
+            report.errors.append((number, line, str(error) or type(error).__name__))
+            continue
+        report.loaded += 1
+        yield route
+
+
+# LoadReport
+def load_routes(router, source, line_format='csv', prune=False):
+    # source is a file path or an iterable of lines
+    # with prune, the routes forwarding never needs are removed from router afterwards, see RouteAnalysis
+    report = LoadReport()
+    start = time.perf_counter()
+    if isinstance(source, str):
+        with open(source) as lines:
+            router.add_routes(iter_routes(lines, line_format, report))
+    else:
+        router.add_routes(iter_routes(source, line_format, report))
+    if prune:
+        report.analysis = prune_routes(router)
+    report.seconds = time.perf_counter() - start
+    return report
@@ -0,0 +1,288 @@
+import asyncio
+import struct
+import time
+
+from LookupStats import histogram_percentile
+from main import IPv4Address
+
+# request: request id, address
+REQUEST = struct.Struct('!II')
+# response: request id, status, network, mask length, gateway, metric, interface name length + name
+RESPONSE = struct.Struct('!IBIBIIB')
+FOUND = 0
+NOT_FOUND = 1
+# the lookup failed or its route does not fit the frame
+ERROR = 2
+
+
+class LookupResult(object):
+    # void
+    def __init__(self, network, mask_length, gateway, metric, interface_name):
+        self.network = network
+        self.mask_length = mask_length
+        self.gateway = gateway
+        self.metric = metric
+        self.interface_name = interface_name
+
+    # str
+    def __repr__(self):
+        if self.gateway:
+            return 'net: {}/{}, gateway: {}, interface: {}, metric: {}'.format(
+                IPv4Address.int_to_str(self.network), self.mask_length, IPv4Address.int_to_str(self.gateway),
+                self.interface_name, self.metric)
+        return 'net: {}/{}, interface: {}, metric: {}'.format(IPv4Address.int_to_str(self.network), self.mask_length,
+                                                              self.interface_name, self.metric)
+
+
+class ServerStats(object):
+    # log2 buckets of the time from receiving a request to writing its response, in microseconds
+    _buckets = 24
+
+    # void
+    def __init__(self):
+        self.requests = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.max_queue_depth = 0
+        self.latency_histogram = [0] * self._buckets
+
+    # void
+    def record_batch(self, size, latencies):
+        self.requests += size
+        self.batches += 1
+        self.max_batch = max(self.max_batch, size)
+        histogram = self.latency_histogram
+        last = self._buckets - 1
+        for latency in latencies:
+            histogram[min(int(latency * 1e6).bit_length(), last)] += 1
+
+    # int, upper bound in microseconds of the bucket holding the given percentile
+    def latency_percentile(self, percentile):
+        return histogram_percentile(self.latency_histogram, percentile)
+
+    # dict
+    def snapshot(self, queue_depth=0):
+        return {'requests': self.requests, 'batches': self.batches,
+                'mean_batch': self.requests / self.batches if self.batches else 0.0, 'max_batch': self.max_batch,
+                'queue_depth': queue_depth, 'max_queue_depth': self.max_queue_depth,
+                'latency_p50_us': self.latency_percentile(50), 'latency_p99_us': self.latency_percentile(99),
+                'latency_histogram_us': {1 << bucket: count for bucket, count in enumerate(self.latency_histogram)
+                                         if count}}
+
+
+class RouteServer(object):
+    """
+    asyncio lookup service around a Router. Clients send fixed size REQUEST frames and may pipeline as
+    many as they like; every frame is answered by one RESPONSE frame carrying the same request id, not
+    necessarily in request order. Requests from all connections go through one queue and are looked up
+    in micro-batches with Router.route_for_addresses.
+    """
+
+    # void
+    def __init__(self, router, max_batch=4096):
+        self._router = router
+        self._max_batch = max_batch
+        self._queue = None
+        self._server = None
+        self._batcher = None
+        self._stats = ServerStats()
+        self._encoded_routes = None
+        self._encoded = {}
+
+    # void
+    async def start(self, host='127.0.0.1', port=0):
+        self._start_batcher()
+        self._server = await asyncio.start_server(self._handle, host, port)
+
+    # void
+    async def start_unix(self, path):
+        self._start_batcher()
+        self._server = await asyncio.start_unix_server(self._handle, path)
+
+    # list of socket addresses the server listens on
+    @property
+    def sockets(self):
+        return [sock.getsockname() for sock in self._server.sockets]
+
+    # void
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+
+    # dict
+    def stats(self):
+        return self._stats.snapshot(self._queue.qsize() if self._queue is not None else 0)
+
+    def _start_batcher(self):
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.ensure_future(self._run_batches())
+
+    async def _handle(self, reader, writer):
+        pending = b''
+        queue = self._queue
+        stats = self._stats
+        try:
+            while True:
+                data = await reader.read(1 << 16)
+                if not data:
+                    break
+                pending += data
+                usable = len(pending) - len(pending) % REQUEST.size
+                now = time.perf_counter()
+                for request_id, address in REQUEST.iter_unpack(pending[:usable]):
+                    queue.put_nowait((writer, request_id, address, now))
+                pending = pending[usable:]
+                if queue.qsize() > stats.max_queue_depth:
+                    stats.max_queue_depth = queue.qsize()
+                # stop reading from clients which do not read their responses
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _run_batches(self):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self._max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                self._answer(batch)
+            except Exception:
+                # the batcher serves all connections, so a failing batch must not stop it
+                self._answer_error(batch)
+
+    def _answer(self, batch):
+        # indices and routes from one version, the router may be updated from other threads
+        version = self._router.version
+        indices = version.route_for_addresses([address for _, _, address, _ in batch])
+        routes = version.indexed_routes
+        if routes is not self._encoded_routes:
+            self._encoded_routes = routes
+            self._encoded = {}
+        responses = {}
+        now = time.perf_counter()
+        for (writer, request_id, _, _), index in zip(batch, indices):
+            responses.setdefault(writer, []).append(struct.pack('!I', request_id) + self._encode(routes, int(index)))
+        for writer, frames in responses.items():
+            if not writer.is_closing():
+                writer.write(b''.join(frames))
+        self._stats.record_batch(len(batch), [now - received for _, _, _, received in batch])
+
+    def _answer_error(self, batch):
+        frames = {}
+        error = RESPONSE.pack(0, ERROR, 0, 0, 0, 0, 0)[4:]
+        for writer, request_id, _, _ in batch:
+            frames.setdefault(writer, []).append(struct.pack('!I', request_id) + error)
+        for writer, writer_frames in frames.items():
+            if not writer.is_closing():
+                writer.write(b''.join(writer_frames))
+        now = time.perf_counter()
+        self._stats.record_batch(len(batch), [now - received for _, _, _, received in batch])
+
+    # bytes, the response frame without the request id
+    def _encode(self, routes, index):
+        encoded = self._encoded.get(index)
+        if encoded is None:
+            if index < 0:
+                encoded = RESPONSE.pack(0, NOT_FOUND, 0, 0, 0, 0, 0)[4:]
+            elif routes[index].metric > 0xFFFFFFFF or routes[index].network.version != 4:
+                encoded = RESPONSE.pack(0, ERROR, 0, 0, 0, 0, 0)[4:]
+            else:
+                route = routes[index]
+                name = route.interface_name.encode('utf-8')[:255]
+                encoded = RESPONSE.pack(0, FOUND, int(route.network.address), route.network.mask_length,
+                                        int(route.gateway), route.metric, len(name))[4:] + name
+            self._encoded[index] = encoded
+        return encoded
+
+
+class RouteClient(object):
+    """Pipelining client for RouteServer."""
+
+    # void
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._waiting = {}
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    # RouteClient
+    @classmethod
+    async def connect(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    # RouteClient
+    @classmethod
+    async def connect_unix(cls, path):
+        reader, writer = await asyncio.open_unix_connection(path)
+        return cls(reader, writer)
+
+    # LookupResult or None
+    async def lookup(self, address):
+        return (await self.lookup_many([address]))[0]
+
+    # list of LookupResult or None
+    async def lookup_many(self, addresses):
+        # all requests are written at once and answered as the server batches them
+        # raises ConnectionError once the connection is closed, LookupError for requests the server fails
+        if self._receiver.done():
+            raise ConnectionError('connection closed')
+        futures = []
+        frames = []
+        loop = asyncio.get_running_loop()
+        for address in addresses:
+            request_id = self._next_id
+            self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+            future = loop.create_future()
+            self._waiting[request_id] = future
+            futures.append(future)
+            frames.append(REQUEST.pack(request_id, int(address)))
+        self._writer.write(b''.join(frames))
+        await self._writer.drain()
+        return await asyncio.gather(*futures)
+
+    async def _receive(self):
+        reader = self._reader
+        try:
+            while True:
+                header = await reader.readexactly(RESPONSE.size)
+                request_id, status, network, mask_length, gateway, metric, name_length = RESPONSE.unpack(header)
+                name = await reader.readexactly(name_length) if name_length else b''
+                future = self._waiting.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if status == FOUND:
+                    future.set_result(LookupResult(network, mask_length, gateway, metric, name.decode('utf-8')))
+                elif status == NOT_FOUND:
+                    future.set_result(None)
+                else:
+                    future.set_exception(LookupError('lookup of request {} failed'.format(request_id)))
+        except (asyncio.IncompleteReadError, ConnectionError) as error:
+            self._fail_waiting(str(error))
+        finally:
+            # also after cancelling or an unexpected frame, nothing answers the requests any more
+            self._fail_waiting('connection closed')
+
+    def _fail_waiting(self, reason):
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(ConnectionError(reason))
+        self._waiting.clear()
+
+    # void
+    async def close(self):
+        self._writer.close()
+        self._receiver.cancel()
+        try:
+            await self._receiver
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,372 @@
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+
+from main import IPv4Address, IPv6Address, Network, Route, Router
+from VectorTable import address_array, search_levels
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class RouteTable(object):
+    """
+    Compact, append-only storage of IPv4 routes. Routes are kept as parallel columns (network, mask length,
+    gateway, interface id, metric) of machine integers, about 15 bytes per route, with interface names
+    interned. Route objects are only created by route() and route_for_address().
+
+    Lookups use a per-mask-length index of the best row of every network (lowest metric, lowest row on
+    equal metrics) kept sorted by network, searched longest mask first.
+
+    save() writes columns and index to a snapshot file; open() maps such a file read-only and serves
+    lookups straight from the mapped pages, so nothing is parsed or copied at startup and processes
+    opening the same snapshot share its memory.
+
+    SnapshotRouter serves Router lookups from a table, mapped or not. router() builds an updatable Router
+    from the routes of the table instead, which then no longer shares or depends on the mapping.
+    """
+    # snapshot header: magic, version, byte order, route count, level count, interface names length, crc32
+    _header = struct.Struct('=4sBBxxIIII')
+    _level_header = struct.Struct('=II')
+    _magic = b'NRTB'
+    _version = 1
+
+    # void
+    def __init__(self):
+        self._networks = array('I')
+        self._mask_lengths = array('B')
+        self._gateways = array('I')
+        self._interfaces = array('H')
+        self._metrics = array('I')
+        self._interface_names = []
+        self._interface_ids = {}
+        self._levels = None
+        self._mmap = None
+
+    # RouteTable
+    @classmethod
+    def from_routes(cls, routes):
+        table = cls()
+        for route in routes:
+            table.add_route(route)
+        return table
+
+    # int, row of the new route
+    def append(self, network, mask_length, gateway, interface_name, metric):
+        # network and gateway are int, gateway 0 means no gateway
+        # raises ValueError
+        if self._mmap is not None:
+            raise ValueError('snapshot tables are read-only')
+        if not 0 <= mask_length <= 32 or not 0 <= metric <= 0xFFFFFFFF:
+            raise ValueError
+        if not 0 <= network <= 0xFFFFFFFF or not 0 <= gateway <= 0xFFFFFFFF:
+            raise ValueError
+        interface_id = self._interface_ids.get(interface_name)
+        if interface_id is None:
+            # snapshots store the names separated by newlines
+            if '\n' in interface_name:
+                raise ValueError('interface names must not contain newlines')
+            if len(self._interface_names) > 0xFFFF:
+                raise ValueError
+            interface_id = len(self._interface_names)
+            self._interface_ids[interface_name] = interface_id
+            self._interface_names.append(interface_name)
+        self._networks.append(network & (0xFFFFFFFF << (32 - mask_length)) & 0xFFFFFFFF)
+        self._mask_lengths.append(mask_length)
+        self._gateways.append(gateway)
+        self._interfaces.append(interface_id)
+        self._metrics.append(metric)
+        self._levels = None
+        return len(self._networks) - 1
+
+    # int, row of the new route
+    def add_route(self, route):
+        # raises ValueError
+        network = route.network
+        if network.version != 4:
+            raise ValueError('only IPv4 routes can be stored')
+        return self.append(int(network.address), network.mask_length, int(route.gateway), route.interface_name,
+                           route.metric)
+
+    # Route
+    def route(self, row):
+        gateway = self._gateways[row]
+        return Route(Network(IPv4Address(self._networks[row]), self._mask_lengths[row]),
+                     IPv4Address.int_to_str(gateway) if gateway else None,
+                     self._interface_names[self._interfaces[row]], self._metrics[row])
+
+    # generator of Route
+    def routes(self):
+        for row in range(len(self._networks)):
+            yield self.route(row)
+
+    # Router
+    def router(self):
+        # a Router of all routes of the table, for updates and the lookups RouteTable lacks
+        return Router(set(self.routes()))
+
+    # int, row of the best route for address or -1
+    def lookup(self, address):
+        if self._levels is None:
+            self._levels = self._build_levels()
+        for mask, keys, rows in self._levels:
+            masked = address & mask
+            index = bisect_left(keys, masked)
+            if index < len(keys) and keys[index] == masked:
+                return rows[index]
+        return -1
+
+    # numpy.ndarray of int64 (array('l') without NumPy) of rows, -1 where no route matches
+    def lookup_many(self, addresses):
+        # addresses as address_array takes them
+        if self._levels is None:
+            self._levels = self._build_levels()
+        addresses = address_array(addresses)
+        if numpy is None:
+            return array('l', [self.lookup(address) for address in addresses])
+        levels = ((numpy.uint32(mask), numpy.frombuffer(keys, dtype=numpy.uint32),
+                   numpy.frombuffer(rows, dtype=numpy.uint32)) for mask, keys, rows in self._levels)
+        return search_levels(addresses, levels, numpy.full(len(addresses), -1, dtype=numpy.int64))
+
+    # Route or None
+    def route_for_address(self, ipv4address):
+        row = self.lookup(int(ipv4address))
+        if row < 0:
+            return None
+        return self.route(row)
+
+    # list of (int mask, array keys, array rows), longest mask first
+    def _build_levels(self):
+        networks, mask_lengths, metrics = self._networks, self._mask_lengths, self._metrics
+        # stable sort, so equal metrics keep the lower row first
+        order = sorted(range(len(networks)),
+                       key=lambda row: (32 - mask_lengths[row]) << 64 | networks[row] << 32 | metrics[row])
+        levels = []
+        previous_length = previous_network = None
+        for row in order:
+            mask_length, network = mask_lengths[row], networks[row]
+            if mask_length != previous_length:
+                keys, rows = array('I'), array('I')
+                levels.append(((0xFFFFFFFF << (32 - mask_length)) & 0xFFFFFFFF, keys, rows))
+            elif network == previous_network:
+                continue
+            keys.append(network)
+            rows.append(row)
+            previous_length, previous_network = mask_length, network
+        return levels
+
+    # void
+    def save(self, path):
+        if self._levels is None:
+            self._levels = self._build_levels()
+        names = '\n'.join(self._interface_names).encode('utf-8')
+        sections = [self._networks, self._mask_lengths, self._gateways, self._interfaces, self._metrics]
+        sections.append(b''.join(self._level_header.pack(32 - (~mask & 0xFFFFFFFF).bit_length(), len(keys))
+                                 for mask, keys, _ in self._levels))
+        for _, keys, rows in self._levels:
+            sections.extend((keys, rows))
+        sections.append(names)
+        payload = bytearray()
+        for section in sections:
+            payload += memoryview(section).cast('B')
+            payload += bytes(-len(payload) % 8)
+        header = self._header.pack(self._magic, self._version, sys.byteorder == 'big', len(self), len(self._levels),
+                                   len(names), zlib.crc32(payload))
+        with open(path, 'wb') as snapshot:
+            snapshot.write(header)
+            snapshot.write(bytes(-len(header) % 8))
+            snapshot.write(payload)
+
+    # RouteTable
+    @classmethod
+    def open(cls, path, verify=True):
+        # raises ValueError on a file which is not a valid snapshot for this machine
+        with open(path, 'rb') as snapshot:
+            mapped = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls._from_buffer(mapped, verify)
+        except (ValueError, TypeError, struct.error):
+            raise ValueError('invalid snapshot {}'.format(path))
+
+    @classmethod
+    def _from_buffer(cls, mapped, verify):
+        view = memoryview(mapped)
+        magic, version, big_endian, count, level_count, names_length, checksum = cls._header.unpack_from(view)
+        if magic != cls._magic or version != cls._version or big_endian != (sys.byteorder == 'big'):
+            raise ValueError
+        offset = cls._header.size + -cls._header.size % 8
+        if verify and zlib.crc32(view[offset:]) != checksum:
+            raise ValueError
+
+        def section(length, item_format):
+            nonlocal offset
+            size = length * struct.calcsize(item_format)
+            if offset + size > len(view):
+                raise ValueError
+            data = view[offset:offset + size].cast(item_format)
+            offset += size + -size % 8
+            return data
+
+        table = cls()
+        table._networks = section(count, 'I')
+        table._mask_lengths = section(count, 'B')
+        table._gateways = section(count, 'I')
+        table._interfaces = section(count, 'H')
+        table._metrics = section(count, 'I')
+        directory = section(level_count * cls._level_header.size, 'B')
+        table._levels = []
+        for mask_length, length in cls._level_header.iter_unpack(directory):
+            mask = (0xFFFFFFFF << (32 - mask_length)) & 0xFFFFFFFF
+            table._levels.append((mask, section(length, 'I'), section(length, 'I')))
+        names = bytes(section(names_length, 'B')).decode('utf-8')
+        table._interface_names = names.split('\n') if count else []
+        table._interface_ids = {name: interface_id for interface_id, name in enumerate(table._interface_names)}
+        table._mmap = mapped
+        return table
+
+    # void
+    def close(self):
+        # releases the mapping of a table opened from a snapshot
+        if self._mmap is not None:
+            mapped, self._mmap = self._mmap, None
+            self._networks = self._mask_lengths = self._gateways = self._interfaces = self._metrics = array('I')
+            self._levels = []
+            mapped.close()
+
+    # str
+    def interface_name(self, interface_id):
+        return self._interface_names[interface_id]
+
+    # int
+    @property
+    def nbytes(self):
+        columns = (self._networks, self._mask_lengths, self._gateways, self._interfaces, self._metrics)
+        size = sum(column.itemsize * len(column) for column in columns)
+        for _, keys, rows in self._levels or ():
+            size += keys.itemsize * len(keys) + rows.itemsize * len(rows)
+        return size
+
+    # int
+    def __len__(self):
+        return len(self._networks)
+
+
+class _TableRoutes(Sequence):
+    """The routes of a RouteTable by row, each made when it is read."""
+    __slots__ = ('_table',)
+
+    # void
+    def __init__(self, table):
+        self._table = table
+
+    # Route, or list of Route for a slice
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self._table.route(index) for index in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return self._table.route(row)
+
+    # int
+    def __len__(self):
+        return len(self._table)
+
+
+class SnapshotVersion(object):
+    """
+    Read-only counterpart of a TableVersion serving lookups straight from a RouteTable, typically one
+    mapped with RouteTable.open, so no trie or compiled table is built. Indices returned by
+    route_for_addresses are rows of the table, and Route objects are only made for the rows read.
+    """
+
+    # void
+    def __init__(self, table, generation=0):
+        self.table = table
+        self.generation = generation
+        self.compiled = False
+        self._indexed_routes = _TableRoutes(table)
+
+    # Route or None
+    def lookup(self, address):
+        # address is the int of an IPv4 address
+        row = self.table.lookup(address)
+        return self.table.route(row) if row >= 0 else None
+
+    # Route or None
+    def route_for_address(self, ipv4address):
+        # raises ValueError
+        if isinstance(ipv4address, IPv4Address):
+            return self.lookup(int(ipv4address))
+        if isinstance(ipv4address, IPv6Address):
+            # a RouteTable only holds IPv4 routes
+            return None
+        raise ValueError
+
+    # numpy.ndarray (array without NumPy) of indices into indexed_routes, -1 where no route matches
+    def route_for_addresses(self, addresses):
+        return self.table.lookup_many(addresses)
+
+    # Sequence of Route
+    @property
+    def indexed_routes(self):
+        return self._indexed_routes
+
+    # generator of Route
+    def routes(self):
+        return self.table.routes()
+
+    # int
+    def __len__(self):
+        return len(self.table)
+
+
+class SnapshotRouter(object):
+    """
+    Read-only Router serving the lookups route_for_address, route_for_addresses and version from a
+    RouteTable snapshot, e.g. for RouteServer. Processes opening the same snapshot share its pages.
+    """
+
+    # void
+    def __init__(self, table):
+        self._version = SnapshotVersion(table)
+
+    # SnapshotRouter
+    @classmethod
+    def open(cls, path, verify=True):
+        # raises ValueError, see RouteTable.open
+        return cls(RouteTable.open(path, verify))
+
+    # Route or None
+    def route_for_address(self, ipv4address):
+        # raises ValueError
+        return self._version.route_for_address(ipv4address)
+
+    # numpy.ndarray (array without NumPy) of indices into indexed_routes, -1 where no route matches
+    def route_for_addresses(self, addresses):
+        return self._version.route_for_addresses(addresses)
+
+    # Sequence of Route
+    @property
+    def indexed_routes(self):
+        return self._version.indexed_routes
+
+    # SnapshotVersion
+    @property
+    def version(self):
+        return self._version
+
+    # Router, an updatable copy of the routes
+    def router(self):
+        return self._version.table.router()
+
+    # void
+    def close(self):
+        self._version.table.close()
@@ -1,5 +1,8 @@
+from collections.abc import MutableSequence
+
 from IPv4Address import IPv4Address, IllegalArgumentException
 from Network import Network
+from PrefixTrie import PrefixTrie
 
 class RouteNotFoundException(Exception):
     pass
@@ -61,48 +64,120 @@ class Route(object):
         return False
 
 
+class _TrackedRouteList(MutableSequence):
+    """
+    The routes list of a Router as Router.routes returns it. Every change made through it is counted,
+    so the router rebuilds its trie even after changes which keep the number of routes.
+    """
+    __slots__ = ('_router',)
+
+    def __init__(self, router):
+        self._router = router
+
+    def __getitem__(self, index):
+        return self._router._routes[index]
+
+    def __setitem__(self, index, route):
+        self._router._routes[index] = route
+        self._router._edits += 1
+
+    def __delitem__(self, index):
+        del self._router._routes[index]
+        self._router._edits += 1
+
+    def __len__(self):
+        return len(self._router._routes)
+
+    def insert(self, index, route):
+        self._router._routes.insert(index, route)
+        self._router._edits += 1
+
+    def clear(self):
+        self._router._routes.clear()
+        self._router._edits += 1
+
+    def sort(self, key=None, reverse=False):
+        self._router._routes.sort(key=key, reverse=reverse)
+        self._router._edits += 1
+
+    def copy(self):
+        return list(self._router._routes)
+
+    def __add__(self, routes):
+        return self._router._routes + list(routes)
+
+    def __radd__(self, routes):
+        return list(routes) + self._router._routes
+
+    def __mul__(self, count):
+        return self._router._routes * count
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        if isinstance(other, _TrackedRouteList):
+            other = other._router._routes
+        return self._router._routes == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self._router._routes)
+
+
 class Router(object):
+    """
+    The routes list may be changed in place, through routes, whose changes are tracked, or through
+    the list given to the constructor, whose changes are only noticed when they change its length.
+    """
     def __init__(self, routes):
         self._routes = routes
+        self._trie = None
+        # changes made through routes, and how many of them the trie includes
+        self._edits = 0
+        self._trie_edits = 0
 
     def add_route(self, route):
+        in_sync = self._in_sync()
         self._routes.append(route)
+        if in_sync:
+            self._trie.insert(route)
+        else:
+            self._trie = None
 
     @property
     def routes(self):
-        return self._routes
+        return _TrackedRouteList(self)
 
     def remove_route(self, route):
+        in_sync = self._in_sync()
         self._routes.remove(route)
+        if in_sync:
+            self._trie.remove(route)
+        else:
+            self._trie = None
+
+    def _in_sync(self):
+        return self._trie is not None and len(self._trie) == len(self._routes) and self._edits == self._trie_edits
 
     def route_for_address(self, address):
         """
-        1. Filter routes, which match address. Find longest subnet mask for matched routes. If one route finded
-        return the route.
-        2. Filter routes with mask_length equal longest subnet mask. If one route finded, return the route
-        3. Find first route with minimal metric and return the route
+        Looks up the route with the longest matching subnet mask. If several routes share that mask,
+        the first one with minimal metric is returned.
+
+        Args:
+            address: IPv4Address or integer
+        Returns:
+            Route or raises RouteNotFoundException
         """
-        route_candidate_lst = []
-        longest_mask = -1
-        for route in self._routes:
-            if route.network.address == int(address) & route.network.int_mask:
-                route_candidate_lst.append(route)
-                if route.network.mask_length > longest_mask:
-                    longest_mask = route.network.mask_length
-
-        if len(route_candidate_lst) == 0:
+        if not self._in_sync():
+            # routes list may also be changed in place, see Router
+            self._trie_edits = self._edits
+            self._trie = PrefixTrie(self._routes)
+        route = self._trie.lookup(int(address))
+        if route is None:
             raise RouteNotFoundException
-        if len(route_candidate_lst) == 1:
-            return route_candidate_lst[0]
-
-        route_candidate_lst = [route for route in route_candidate_lst if route.network.mask_length == longest_mask]
-        min_metric = route_candidate_lst[0].metric
-        min_route_index = 0
-        for index, route in enumerate(route_candidate_lst):
-            if min_metric > route.metric:
-                min_metric = route.metric
-                min_route_index = index
-        return route_candidate_lst[min_route_index]
+        return route
 
 if __name__ == '__main__':
     routes = [Route(Network(IPv4Address('0.0.0.0'), 0), '192.168.0.1', 'en0', 10)]
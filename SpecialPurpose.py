@@ -0,0 +1,120 @@
+from array import array
+from bisect import bisect_right
+
+from VectorTable import address_array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PUBLIC = 0
+PRIVATE = 1
+RESERVED = 2
+CATEGORY_NAMES = ('public', 'private', 'reserved')
+
+# IANA IPv4 special-purpose address registry (RFC 6890 and updates) as (network, mask length, category).
+# More specific entries override the ones they are nested in; blocks marked globally reachable in the
+# registry (AS112, AMT, ...) are public and not listed unless they are nested in a listed block.
+REGISTRY = (
+    ('0.0.0.0', 8, RESERVED),          # "this network"
+    ('10.0.0.0', 8, PRIVATE),          # private-use
+    ('100.64.0.0', 10, PRIVATE),       # shared address space
+    ('127.0.0.0', 8, RESERVED),        # loopback
+    ('169.254.0.0', 16, RESERVED),     # link local
+    ('172.16.0.0', 12, PRIVATE),       # private-use
+    ('192.0.0.0', 24, RESERVED),       # IETF protocol assignments
+    ('192.0.0.9', 32, PUBLIC),         # port control protocol anycast
+    ('192.0.0.10', 32, PUBLIC),        # traversal using relays around NAT anycast
+    ('192.0.2.0', 24, RESERVED),       # documentation (TEST-NET-1)
+    ('192.88.99.0', 24, RESERVED),     # deprecated 6to4 relay anycast
+    ('192.168.0.0', 16, PRIVATE),      # private-use
+    ('198.18.0.0', 15, RESERVED),      # benchmarking
+    ('198.51.100.0', 24, RESERVED),    # documentation (TEST-NET-2)
+    ('203.0.113.0', 24, RESERVED),     # documentation (TEST-NET-3)
+    ('224.0.0.0', 4, RESERVED),        # multicast
+    ('240.0.0.0', 4, RESERVED),        # reserved, including limited broadcast 255.255.255.255/32
+)
+
+# IANA IPv6 special-purpose address registry (RFC 6890 and updates) as (network, mask length, category), with
+# the networks as int; multicast is listed as reserved, as for IPv4
+REGISTRY6 = (
+    (0, 128, RESERVED),                            # ::/128 unspecified
+    (1, 128, RESERVED),                            # ::1/128 loopback
+    (0xFFFF << 32, 96, RESERVED),                  # ::ffff:0:0/96 IPv4-mapped
+    (0x0064FF9B0001 << 80, 48, PRIVATE),           # 64:ff9b:1::/48 local-use IPv4/IPv6 translation
+    (0x0100 << 112, 64, RESERVED),                 # 100::/64 discard-only
+    (0x2001 << 112, 23, RESERVED),                 # 2001::/23 IETF protocol assignments
+    (0x20010001 << 96 | 1, 128, PUBLIC),           # 2001:1::1/128 port control protocol anycast
+    (0x20010001 << 96 | 2, 128, PUBLIC),           # 2001:1::2/128 traversal using relays around NAT anycast
+    (0x20010001 << 96 | 3, 128, PUBLIC),           # 2001:1::3/128 DNS-SD service registration protocol anycast
+    (0x20010003 << 96, 32, PUBLIC),                # 2001:3::/32 AMT
+    (0x200100040112 << 80, 48, PUBLIC),            # 2001:4:112::/48 AS112-v6
+    (0x20010020 << 96, 28, PUBLIC),                # 2001:20::/28 ORCHIDv2
+    (0x20010DB8 << 96, 32, RESERVED),              # 2001:db8::/32 documentation
+    (0x3FFF << 112, 20, RESERVED),                 # 3fff::/20 documentation
+    (0x5F00 << 112, 16, RESERVED),                 # 5f00::/16 segment routing SIDs
+    (0xFC00 << 112, 7, PRIVATE),                   # fc00::/7 unique-local
+    (0xFE80 << 112, 10, RESERVED),                 # fe80::/10 link-local unicast
+    (0xFF00 << 112, 8, RESERVED),                  # ff00::/8 multicast
+)
+
+
+def _flatten(registry, width=32):
+    # sorted, gap-free (start, category) boundaries over the whole address space
+    ranges = []
+    for network, mask_length, category in registry:
+        if isinstance(network, str):
+            first, second, third, fourth = (int(octet) for octet in network.split('.'))
+            start = first << 24 | second << 16 | third << 8 | fourth
+        else:
+            start = network
+        ranges.append((start, start + (1 << (width - mask_length)), mask_length, category))
+    points = sorted(set([0] + [start for start, _, _, _ in ranges] + [stop for _, stop, _, _ in ranges
+                                                                        if stop < 1 << width]))
+    # 128 bit starts do not fit an array
+    starts, categories = (array('I') if width == 32 else []), array('B')
+    for point in points:
+        covering = [(mask_length, category) for start, stop, mask_length, category in ranges if start <= point < stop]
+        category = max(covering)[1] if covering else PUBLIC
+        if not categories or categories[-1] != category:
+            starts.append(point)
+            categories.append(category)
+    return starts, categories
+
+
+_starts, _categories = _flatten(REGISTRY)
+_starts6, _categories6 = _flatten(REGISTRY6, 128)
+if numpy is not None:
+    _numpy_starts = numpy.frombuffer(_starts, dtype=numpy.uint32)
+    _numpy_categories = numpy.frombuffer(_categories, dtype=numpy.uint8)
+
+
+# int, one of PUBLIC, PRIVATE, RESERVED
+def classify(address):
+    return _categories[bisect_right(_starts, int(address)) - 1]
+
+
+# bool
+def is_public(address):
+    return _categories[bisect_right(_starts, int(address)) - 1] == PUBLIC
+
+
+# int, one of PUBLIC, PRIVATE, RESERVED
+def classify6(address):
+    return _categories6[bisect_right(_starts6, int(address)) - 1]
+
+
+# bool
+def is_public6(address):
+    return _categories6[bisect_right(_starts6, int(address)) - 1] == PUBLIC
+
+
+# numpy.ndarray of uint8 (array('B') without NumPy) of categories
+def classify_many(addresses):
+    # addresses as address_array takes them
+    addresses = address_array(addresses)
+    if numpy is not None:
+        return _numpy_categories[numpy.searchsorted(_numpy_starts, addresses, side='right') - 1]
+    starts, categories = _starts, _categories
+    return array('B', [categories[bisect_right(starts, address) - 1] for address in addresses])
@@ -0,0 +1,100 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# numpy.ndarray of uint32, without NumPy a sequence of int
+def address_array(addresses):
+    # addresses of a batch lookup: a numpy array, an array of any typecode or an iterable of int, taken by
+    # value, or bytes of packed native-order uint32
+    # raises ValueError when a value does not fit in 32 bits
+    packed = isinstance(addresses, (bytes, bytearray)) or isinstance(addresses, memoryview) and addresses.itemsize == 1
+    if numpy is None:
+        return memoryview(addresses).cast('B').cast('I') if packed else addresses
+    if packed:
+        return numpy.frombuffer(addresses, dtype=numpy.uint32)
+    if isinstance(addresses, (numpy.ndarray, array, memoryview)):
+        addresses = numpy.asarray(addresses)
+    else:
+        addresses = numpy.fromiter(addresses, dtype=numpy.int64)
+    if addresses.dtype != numpy.uint32:
+        if len(addresses) and (addresses.min() < 0 or addresses.max() > 0xFFFFFFFF):
+            raise ValueError('addresses must fit in 32 bits')
+        addresses = addresses.astype(numpy.uint32)
+    return addresses
+
+
+# numpy.ndarray result, with the value of the longest matching level of every address
+def search_levels(addresses, levels, result):
+    # addresses from address_array; levels of (numpy.uint32 mask, sorted numpy.uint32 keys, values), longest
+    # mask first. Entries of result with no matching level are left as they are
+    pending = numpy.arange(len(addresses))
+    for mask, keys, values in levels:
+        if not len(pending):
+            break
+        if not len(keys):
+            continue
+        masked = addresses[pending] & mask
+        positions = numpy.searchsorted(keys, masked)
+        numpy.minimum(positions, len(keys) - 1, out=positions)
+        hits = keys[positions] == masked
+        result[pending[hits]] = values[positions[hits]]
+        pending = pending[~hits]
+    return result
+
+
+class VectorTable(object):
+    """
+    Flat per-mask-length view of a PrefixTrie used for batch lookups. For every mask length present in
+    the trie it keeps the sorted network addresses and the index of the best route of each network, so a
+    whole batch of addresses is resolved with one masking and one sorted search per mask length, longest
+    first. With NumPy installed all of this is vectorized, otherwise it falls back to dict probing.
+    """
+
+    # void
+    def __init__(self, trie):
+        routes = []
+        by_length = {}
+        for address, mask_length, route in trie.prefixes():
+            by_length.setdefault(mask_length, []).append((address, len(routes)))
+            routes.append(route)
+        self._routes = tuple(routes)
+        self._levels = []
+        for mask_length in sorted(by_length, reverse=True):
+            mask = (0xFFFFFFFF << (32 - mask_length)) & 0xFFFFFFFF
+            entries = by_length[mask_length]
+            if numpy is not None:
+                keys = numpy.fromiter((address for address, _ in entries), dtype=numpy.uint32, count=len(entries))
+                values = numpy.fromiter((index for _, index in entries), dtype=numpy.int32, count=len(entries))
+                self._levels.append((numpy.uint32(mask), keys, values))
+            else:
+                self._levels.append((mask, dict(entries)))
+
+    # tuple of Route, indexed by the values returned from lookup_many
+    @property
+    def routes(self):
+        return self._routes
+
+    # numpy.ndarray of int32, or array('l') without NumPy; -1 where no route matches
+    def lookup_many(self, addresses):
+        # addresses as address_array takes them
+        addresses = address_array(addresses)
+        if numpy is not None:
+            return search_levels(addresses, self._levels, numpy.full(len(addresses), -1, dtype=numpy.int32))
+        levels = self._levels
+        result = array('l')
+        for address in addresses:
+            index = -1
+            for mask, networks in levels:
+                index = networks.get(address & mask, -1)
+                if index >= 0:
+                    break
+            result.append(index)
+        return result
+
+    # int
+    def __len__(self):
+        return len(self._routes)
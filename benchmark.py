@@ -0,0 +1,233 @@
+import argparse
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import time
+import timeit
+import tracemalloc
+
+from main import IPv4Address, Network, Route, Router
+
+
+# (mask length, share of routes), roughly the shape of a full internet table: mostly /24, then /22-/23,
+# /16-/21, a few short prefixes and some more specifics
+PREFIX_LENGTHS = ((8, 0.001), (12, 0.002), (14, 0.004), (16, 0.02), (17, 0.01), (18, 0.02), (19, 0.04),
+                  (20, 0.05), (21, 0.05), (22, 0.1), (23, 0.1), (24, 0.57), (25, 0.005), (26, 0.005),
+                  (27, 0.005), (28, 0.004), (29, 0.004), (30, 0.004), (32, 0.006))
+ENGINES = ('trie', 'compiled', 'cached', 'batch')
+# uniform: addresses drawn independently; zipf: a pool of hosts drawn with Zipf weights, as real traffic
+# where a few destinations take most lookups
+DISTRIBUTIONS = ('uniform', 'zipf')
+
+
+# float, best seconds per call
+def _best(stmt, number, repeat=5):
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+
+
+# dict of benchmark name to nanoseconds per operation
+def bench_ipv4address(count=100000, seed=1):
+    rnd = random.Random(seed)
+    ints = [rnd.randrange(1 << 32) for _ in range(count)]
+    strings = [IPv4Address.int_to_str(integer) for integer in ints]
+    addresses = [IPv4Address(integer) for integer in ints]
+    pairs = list(zip(addresses, reversed(addresses)))
+    return {
+        'IPv4Address(str)': _best(lambda: [IPv4Address(string) for string in strings], 1) / count * 1e9,
+        'IPv4Address(int)': _best(lambda: [IPv4Address(integer) for integer in ints], 1) / count * 1e9,
+        'str(IPv4Address(int))': _best(lambda: [str(IPv4Address(integer)) for integer in ints], 1) / count * 1e9,
+        'IPv4Address < IPv4Address': _best(lambda: [left < right for left, right in pairs], 1) / count * 1e9,
+        'IPv4Address == IPv4Address': _best(lambda: [left == right for left, right in pairs], 1) / count * 1e9,
+    }
+
+
+# dict of benchmark name to nanoseconds per operation
+def bench_network(count=100000, seed=1):
+    rnd = random.Random(seed)
+    networks = [Network(IPv4Address(rnd.randrange(1 << 32)), rnd.randrange(8, 30)) for _ in range(count)]
+    addresses = [IPv4Address(rnd.randrange(1 << 32)) for _ in range(count)]
+    pairs = list(zip(networks, addresses))
+    return {
+        'Network.__contains__': _best(lambda: [address in network for network, address in pairs], 1) / count * 1e9,
+    }
+
+
+# list of Route, unique networks with a realistic mask length distribution
+def generate_routes(count, seed=1):
+    rnd = random.Random(seed)
+    lengths = [length for length, _ in PREFIX_LENGTHS]
+    weights = [share for _, share in PREFIX_LENGTHS]
+    interfaces = ['en{}'.format(index) for index in range(8)]
+    gateways = ['10.0.{}.1'.format(index) for index in range(8)]
+    seen = set()
+    routes = []
+    while len(routes) < count:
+        mask_length = rnd.choices(lengths, weights)[0]
+        # keep clear of 0/8 and the multicast space, like a real table
+        address = rnd.randrange(1 << 24, 224 << 24) & (0xFFFFFFFF << (32 - mask_length)) & 0xFFFFFFFF
+        if (address, mask_length) in seen:
+            continue
+        seen.add((address, mask_length))
+        hop = rnd.randrange(len(interfaces))
+        routes.append(Route(Network(IPv4Address(address), mask_length), gateways[hop], interfaces[hop],
+                            rnd.randrange(1, 20)))
+    return routes
+
+
+# list of int, mostly inside the table with some random (possibly unrouted) addresses
+def generate_addresses(routes, count, seed=1, routed_share=0.8, distribution='uniform', hosts=10000,
+                       exponent=1.1):
+    # with the zipf distribution the addresses are drawn from hosts distinct addresses, the host of
+    # rank k with weight 1 / k ** exponent
+    rnd = random.Random(seed)
+    if distribution == 'zipf':
+        pool = generate_addresses(routes, hosts, seed, routed_share)
+        weights = [1 / rank ** exponent for rank in range(1, len(pool) + 1)]
+        return rnd.choices(pool, weights, k=count)
+    addresses = []
+    for _ in range(count):
+        if rnd.random() < routed_share:
+            network = rnd.choice(routes).network
+            addresses.append(int(network.address) | rnd.randrange(1 << (32 - network.mask_length)))
+        else:
+            addresses.append(rnd.randrange(1 << 32))
+    return addresses
+
+
+# int, the peak resident set size of this process so far
+def _max_rss_bytes():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+# dict
+def _percentiles(samples):
+    samples = sorted(samples)
+    last = len(samples) - 1
+    return {'p50_ns': samples[last * 50 // 100], 'p90_ns': samples[last * 90 // 100],
+            'p99_ns': samples[last * 99 // 100], 'max_ns': samples[last]}
+
+
+# dict of measurements for one table size and engine
+def bench_router(routes, addresses, engine, trace_memory=False):
+    # max_rss_bytes is the peak of the whole process, so it only describes this run in a process of
+    # its own, see bench_isolated
+    result = {'routes': len(routes), 'engine': engine, 'lookups': len(addresses)}
+    rss_before = _max_rss_bytes()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    router = Router(set(routes))
+    if engine == 'compiled':
+        router.compile()
+    elif engine == 'batch':
+        router.indexed_routes
+    else:
+        router.route_for_address(IPv4Address(0))
+        if engine == 'cached':
+            router.enable_cache(1 << 16)
+    result['build_seconds'] = time.perf_counter() - start
+    if trace_memory:
+        result['build_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    result['max_rss_bytes'] = _max_rss_bytes()
+    # growth of the peak while building, 0 when an earlier run in this process went higher
+    result['build_rss_bytes'] = result['max_rss_bytes'] - rss_before
+
+    if engine == 'batch':
+        start = time.perf_counter()
+        router.route_for_addresses(addresses)
+        elapsed = time.perf_counter() - start
+        result['lookups_per_second'] = len(addresses) / elapsed
+        return result
+
+    ipv4addresses = [IPv4Address(address) for address in addresses]
+    route_for_address = router.route_for_address
+    clock = time.perf_counter_ns
+    samples = []
+    start = time.perf_counter()
+    for address in ipv4addresses:
+        before = clock()
+        route_for_address(address)
+        samples.append(clock() - before)
+    elapsed = time.perf_counter() - start
+    result.update(_percentiles(samples))
+    result['lookups_per_second'] = len(addresses) / elapsed
+    if engine == 'cached':
+        result['cache_hits'] = router.cache.hits
+        result['cache_misses'] = router.cache.misses
+    return result
+
+
+# dict of measurements for one table size, engine and address distribution
+def bench_isolated(size, lookups, engine, distribution='uniform', seed=1, trace_memory=False):
+    # generates the table and addresses and benchmarks them, meant to run in a process of its own
+    routes = generate_routes(size, seed)
+    addresses = generate_addresses(routes, lookups, seed, distribution=distribution)
+    result = bench_router(routes, addresses, engine, trace_memory)
+    result['distribution'] = distribution
+    return result
+
+
+# dict, the whole suite
+def run(sizes, lookups, engines, seed=1, trace_memory=False, distributions=DISTRIBUTIONS, isolate=True):
+    # with isolate every table size, engine and distribution is measured in a fresh process, so the
+    # memory figures of one run do not include the peaks of the runs before it
+    results = {'python': sys.version.split()[0], 'seed': seed,
+               'ipv4address_ns': bench_ipv4address(seed=seed), 'network_ns': bench_network(seed=seed),
+               'router': []}
+    context = multiprocessing.get_context('spawn')
+    for size in sizes:
+        for distribution in distributions:
+            for engine in engines:
+                arguments = (size, lookups, engine, distribution, seed, trace_memory)
+                if isolate:
+                    with context.Pool(1) as pool:
+                        results['router'].append(pool.apply(bench_isolated, arguments))
+                else:
+                    results['router'].append(bench_isolated(*arguments))
+    return results
+
+
+def _print_results(results):
+    for section in ('ipv4address_ns', 'network_ns'):
+        for name, nanoseconds in results[section].items():
+            print('{:<32}{:>10.1f} ns'.format(name, nanoseconds))
+    for result in results['router']:
+        latency = ''
+        if 'p50_ns' in result:
+            latency = 'p50 {p50_ns} ns, p99 {p99_ns} ns, '.format(**result)
+        cache = ''
+        if 'cache_hits' in result:
+            cache = ', cache hits {:.0%}'.format(result['cache_hits'] / max(1, result['cache_hits'] +
+                                                                              result['cache_misses']))
+        print('{:>8} routes {:<9} {:<8} build {:.2f} s, {}{:.0f} lookups/s, peak rss {:.0f} MB{}'.format(
+            result['routes'], result['engine'], result['distribution'], result['build_seconds'], latency,
+            result['lookups_per_second'], result['max_rss_bytes'] / 1e6, cache))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Routing lookup benchmarks on synthetic tables')
+    parser.add_argument('--sizes', default='1000,100000,1000000', help='comma separated table sizes')
+    parser.add_argument('--lookups', type=int, default=100000)
+    parser.add_argument('--engines', default=','.join(ENGINES), help='comma separated: ' + ', '.join(ENGINES))
+    parser.add_argument('--distributions', default=','.join(DISTRIBUTIONS),
+                        help='comma separated address distributions: ' + ', '.join(DISTRIBUTIONS))
+    parser.add_argument('--in-process', action='store_true',
+                        help='run everything in this process, faster but the peak rss includes earlier runs')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--trace-memory', action='store_true', help='measure build peak memory with tracemalloc')
+    parser.add_argument('--json', help='write machine-readable results to this file, - for stdout')
+    args = parser.parse_args()
+    results = run([int(size) for size in args.sizes.split(',')], args.lookups, args.engines.split(','),
+                  args.seed, args.trace_memory, args.distributions.split(','), not args.in_process)
+    if args.json == '-':
+        json.dump(results, sys.stdout, indent=2)
+    else:
+        _print_results(results)
+        if args.json:
+            with open(args.json, 'w') as output:
+                json.dump(results, output, indent=2)
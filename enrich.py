@@ -0,0 +1,145 @@
+import argparse
+import sys
+import time
+from array import array
+from itertools import islice
+
+from main import InvalidIpError, IPv4Address, Router
+from RouteLoader import load_routes
+
+
+class EnrichReport(object):
+    # void
+    def __init__(self):
+        self.records = 0
+        self.matched = 0
+        # records without a valid address in the address column
+        self.invalid = 0
+        self.seconds = 0.0
+
+    # float
+    @property
+    def records_per_second(self):
+        if self.seconds:
+            return self.records / self.seconds
+        return 0.0
+
+    # str
+    def __repr__(self):
+        return 'records: {}, matched: {}, unmatched: {}, invalid: {}, {:.0f} records/s'.format(
+            self.records, self.matched, self.records - self.matched - self.invalid, self.invalid,
+            self.records_per_second)
+
+
+# int or None
+def parse_address(field):
+    # dotted quad, optionally followed by :port
+    try:
+        return IPv4Address.str_to_int(field.partition(':')[0])
+    except InvalidIpError:
+        return None
+
+
+# generator of str, the lines with interface, gateway and prefix columns appended, without line ends
+def enrich_lines(router, lines, column=0, delimiter=None, chunk_size=1 << 16, report=None):
+    # column is the 0-based index of the address field in a line split by delimiter (whitespace when None).
+    # Lines are read and looked up chunk_size at a time with Router.route_for_addresses, so memory stays
+    # bounded however long the input is. Records without a route or valid address get '-' columns.
+    # raises ValueError when chunk_size is below 1
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be at least 1')
+    if report is None:
+        report = EnrichReport()
+    return _enrich_chunks(router, lines, column, delimiter, chunk_size, report)
+
+
+# generator of str, see enrich_lines
+def _enrich_chunks(router, lines, column, delimiter, chunk_size, report):
+    separator = ' ' if delimiter is None else delimiter
+    missing = separator.join(('-', '-', '-'))
+    lines = iter(lines)
+    start = time.perf_counter()
+    while True:
+        chunk = [line.rstrip('\r\n') for line in islice(lines, chunk_size)]
+        if not chunk:
+            break
+        addresses = array('I')
+        valid = []
+        for line in chunk:
+            fields = line.split(delimiter, column + 1) if column >= 0 else line.split(delimiter)
+            address = parse_address(fields[column]) if -len(fields) <= column < len(fields) else None
+            valid.append(address is not None)
+            addresses.append(address or 0)
+        # indices and routes from one version, the router may be updated meanwhile
+        version = router.version
+        indices = version.route_for_addresses(addresses)
+        routes = version.indexed_routes
+        # appended columns by route index, formatted once per chunk
+        columns = {}
+        for line, is_valid, index in zip(chunk, valid, indices):
+            report.records += 1
+            if not is_valid:
+                report.invalid += 1
+                yield line + separator + missing
+            elif index < 0:
+                yield line + separator + missing
+            else:
+                report.matched += 1
+                index = int(index)
+                appended = columns.get(index)
+                if appended is None:
+                    appended = columns[index] = _route_columns(routes[index], separator)
+                yield line + separator + appended
+        report.seconds = time.perf_counter() - start
+
+
+# int, a --chunk-size argument
+def _chunk_size(value):
+    chunk_size = int(value)
+    if chunk_size < 1:
+        raise argparse.ArgumentTypeError('must be at least 1')
+    return chunk_size
+
+
+# str
+def _route_columns(route, separator):
+    gateway = str(route.gateway) if int(route.gateway) else '-'
+    network = route.network
+    return separator.join((route.interface_name, gateway, '{}/{}'.format(network.address, network.mask_length)))
+
+
+# int, exit status
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Append egress interface, gateway and matching prefix to log lines')
+    parser.add_argument('routes', help='route table file')
+    parser.add_argument('input', nargs='?', default='-', help='log file, - for stdin')
+    parser.add_argument('--route-format', default='csv', choices=('csv', 'ip'))
+    parser.add_argument('--column', type=int, default=0, help='0-based index of the address field')
+    parser.add_argument('--delimiter', help='field delimiter, whitespace by default')
+    parser.add_argument('--output', default='-', help='output file, - for stdout')
+    parser.add_argument('--chunk-size', type=_chunk_size, default=1 << 16, help='lines looked up per batch')
+    parser.add_argument('--quiet', action='store_true', help='do not report to stderr')
+    args = parser.parse_args(arguments)
+    router = Router(set())
+    load_report = load_routes(router, args.routes, args.route_format)
+    if not args.quiet:
+        print('routes: {!r}'.format(load_report), file=sys.stderr)
+    source = sys.stdin if args.input == '-' else open(args.input)
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    report = EnrichReport()
+    try:
+        for line in enrich_lines(router, source, args.column, args.delimiter, args.chunk_size, report):
+            output.write(line)
+            output.write('\n')
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    if not args.quiet:
+        print('enrich: {!r}'.format(report), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,12 @@
+from main import IPv4Address, Network, Route
+
+
+# list of Route, the example table of main.py, new Route objects on every call
+def example_routes():
+    return [Route(Network(IPv4Address('0.0.0.0'), 0), '192.168.0.1', 'en0', 10),
+            Route(Network(IPv4Address('192.168.0.0'), 24), None, 'en0', 10),
+            Route(Network(IPv4Address('10.0.0.0'), 8), '10.123.0.1', 'en1', 10),
+            Route(Network(IPv4Address('10.123.0.0'), 20), None, 'en1', 100),
+            Route(Network(IPv4Address('10.123.1.0'), 24), None, 'en3', 102),
+            Route(Network(IPv4Address('10.123.1.0'), 24), None, 'en2', 101),
+            Route(Network(IPv4Address('10.123.1.0'), 24), None, 'en4', 103)]
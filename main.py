@@ -1,3 +1,24 @@
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections.abc import MutableSet
+
+from CompiledTable import CompiledTable
+from LookupStats import LookupStats
+from PrefixTrie import PrefixTrie
+from RouteCache import RouteCache
+from SpecialPurpose import is_public, is_public6
+from VectorTable import VectorTable
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
 class InvalidIpError(ValueError):
     pass
 
@@ -6,7 +27,82 @@ class InvalidMaskError(ValueError):
     pass
 
 
-class IPv4Address(object):
+class _Address(object):
+    # IPv4Address and IPv6Address, ordered and compared by their integer value; IPv4 addresses come
+    # before IPv6 ones, as in Network
+    __slots__ = ('_int_ip', '_string_ip')
+
+    # int
+    def __int__(self):
+        return self._int_ip
+
+    # str
+    def __repr__(self):
+        if self._string_ip is None:
+            self._string_ip = self.int_to_str(self._int_ip)
+        return self._string_ip
+
+    # bytes, network byte order
+    def packed(self):
+        return self._int_ip.to_bytes(self._width // 8, 'big')
+
+    # bool
+    def __eq__(self, address):
+        # addresses of different families are never equal, ints compare by value
+        if isinstance(address, _Address) and address._width != self._width:
+            return False
+        return self._int_ip == int(address)
+
+    # bool
+    def __ne__(self, address):
+        return not self == address
+
+    # bool
+    def __lt__(self, address):
+        if isinstance(address, _Address) and address._width != self._width:
+            return self._width < address._width
+        return self._int_ip < int(address)
+
+    # bool
+    def __gt__(self, address):
+        if isinstance(address, _Address) and address._width != self._width:
+            return self._width > address._width
+        return self._int_ip > int(address)
+
+    # bool
+    def __le__(self, address):
+        if isinstance(address, _Address) and address._width != self._width:
+            return self._width <= address._width
+        return self._int_ip <= int(address)
+
+    # bool
+    def __ge__(self, address):
+        if isinstance(address, _Address) and address._width != self._width:
+            return self._width >= address._width
+        return self._int_ip >= int(address)
+
+    # int
+    def __hash__(self):
+        return hash(self._int_ip)
+
+    # address of the same family
+    def __add__(self, address):
+        return type(self)(self._int_ip + int(address))
+
+    # address of the same family
+    def __sub__(self, address):
+        return type(self)(self._int_ip - int(address))
+
+
+class IPv4Address(_Address):
+    __slots__ = ()
+    _width = 32
+    version = 4
+    # static
+    _interned = {}
+    _intern_limit = 1 << 16
+    _packed = struct.Struct('!I')
+
     # void
     def __init__(self, address):
         # address is str or int
@@ -16,29 +112,76 @@ class IPv4Address(object):
             self._string_ip = address
             return
         if isinstance(address, int):
-            self._string_ip = self.int_to_str(address)
+            if address < 0 or address > 0xFFFFFFFF:
+                raise InvalidIpError
             self._int_ip = address
+            # string form is built on first use
+            self._string_ip = None
             return
         raise InvalidIpError
 
-    # int
+    # IPv4Address
     @classmethod
-    def str_to_int(cls, ip):
+    def interned(cls, address):
+        # returns a shared instance for address, the first _intern_limit distinct addresses are kept
+        ipv4address = cls._interned.get(address)
+        if ipv4address is None:
+            ipv4address = cls(address)
+            if len(cls._interned) < cls._intern_limit:
+                cls._interned[address] = ipv4address
+        return ipv4address
+
+    # IPv4Address
+    @classmethod
+    def from_bytes(cls, buffer, offset=0):
+        # buffer is any bytes-like object holding the address in network byte order at offset, such as
+        # a packet; nothing is copied or decoded to str
+        # raises InvalidIpError
         try:
-            octets = [cls.__octet_to_int(octet) for octet in ip.split('.')]
-        except (TypeError, ValueError):
+            return cls(cls._packed.unpack_from(buffer, offset)[0])
+        except struct.error:
+            raise InvalidIpError
+
+    # numpy.ndarray of uint32 (array('I') without NumPy) for Router.route_for_addresses
+    @classmethod
+    def unpack_many(cls, buffer, offset=0, stride=4, count=None):
+        # reads count addresses in network byte order, the first at offset and the others stride bytes
+        # apart, e.g. offset 16 and stride 20 for the destinations of back to back option-less IPv4
+        # headers. As many as fit in the buffer by default. With NumPy the buffer is read through a
+        # strided view and only the result is allocated
+        # raises InvalidIpError when the buffer is too short
+        view = memoryview(buffer).cast('B')
+        if offset < 0 or stride <= 0:
             raise InvalidIpError
-        if len(octets) != 4:
+        available = (len(view) - offset - 4) // stride + 1 if len(view) - offset >= 4 else 0
+        if count is None:
+            count = available
+        elif not 0 <= count <= available:
             raise InvalidIpError
-        return (octets[0] << 24) + (octets[1] << 16) + (octets[2] << 8) + octets[3]
+        if numpy is not None:
+            if not count:
+                return numpy.empty(0, dtype=numpy.uint32)
+            packed = numpy.ndarray((count,), dtype='>u4', buffer=view, offset=offset, strides=(stride,))
+            return packed.astype(numpy.uint32)
+        if stride == 4:
+            addresses = array('I')
+            addresses.frombytes(view[offset:offset + 4 * count])
+            if sys.byteorder == 'little':
+                addresses.byteswap()
+            return addresses
+        unpack = cls._packed.unpack_from
+        return array('I', [unpack(view, offset + index * stride)[0] for index in range(count)])
 
     # int
     @classmethod
-    def __octet_to_int(cls, octet):
-        if octet.isdigit():
-            int_octet = int(octet)
-            if 0 <= int_octet <= 255:
-                return int_octet
+    def str_to_int(cls, ip):
+        octets = ip.split('.')
+        if len(octets) == 4:
+            first, second, third, fourth = octets
+            if first.isdecimal() and second.isdecimal() and third.isdecimal() and fourth.isdecimal():
+                first, second, third, fourth = int(first), int(second), int(third), int(fourth)
+                if first <= 255 and second <= 255 and third <= 255 and fourth <= 255:
+                    return first << 24 | second << 16 | third << 8 | fourth
         raise InvalidIpError
 
     # str
@@ -46,113 +189,225 @@ class IPv4Address(object):
     def int_to_str(cls, integer):
         if integer < 0 or integer > 0xFFFFFFFF:
             raise InvalidIpError
-        return '.'.join([str((integer & 0xFF000000) >> 24),
-                         str((integer & 0x00FF0000) >> 16),
-                         str((integer & 0x0000FF00) >> 8),
-                         str(integer  & 0x000000FF)])
-
-    # int
-    def __int__(self):
-        return self._int_ip
-
-    # str
-    def __repr__(self):
-        return self._string_ip
-
-    # bool
-    def __eq__(self, ipv4address):
-        return int(self) == int(ipv4address)
-
-    # bool
-    def __ne__(self, ipv4address):
-        return int(self) != int(ipv4address)
+        return '%d.%d.%d.%d' % (integer >> 24, integer >> 16 & 0xFF, integer >> 8 & 0xFF, integer & 0xFF)
 
-    # bool
-    def __lt__(self, ipv4address):
-        return int(self) < int(ipv4address)
+class IPv6Address(_Address):
+    __slots__ = ()
+    _width = 128
+    version = 6
+    _packed = struct.Struct('!QQ')
+    _hex_digits = '0123456789abcdefABCDEF'
 
-    # bool
-    def __gt__(self, ipv4address):
-        return int(self) > int(ipv4address)
+    # void
+    def __init__(self, address):
+        # address is str or int
+        # raises InvalidIpError
+        if isinstance(address, str):
+            self._int_ip = self.str_to_int(address)
+            self._string_ip = None
+            return
+        if isinstance(address, int):
+            if address < 0 or address >> 128:
+                raise InvalidIpError
+            self._int_ip = address
+            self._string_ip = None
+            return
+        raise InvalidIpError
 
-    # bool
-    def __le__(self, ipv4address):
-        return int(self) <= int(ipv4address)
+    # IPv6Address
+    @classmethod
+    def from_bytes(cls, buffer, offset=0):
+        # buffer is any bytes-like object holding the address in network byte order at offset
+        # raises InvalidIpError
+        try:
+            high, low = cls._packed.unpack_from(buffer, offset)
+        except struct.error:
+            raise InvalidIpError
+        return cls(high << 64 | low)
 
-    # bool
-    def __ge__(self, ipv4address):
-        return int(self) >= int(ipv4address)
+    # int
+    @classmethod
+    def str_to_int(cls, ip):
+        # RFC 4291 text forms: eight groups of one to four hex digits, '::' for one run of zero groups,
+        # optionally a dotted quad for the last 32 bits; zone ids are not accepted
+        head, separator, tail = ip.partition('::')
+        if separator:
+            before, after = cls._groups(head, False), cls._groups(tail, True)
+            if len(before) + len(after) > 7:
+                raise InvalidIpError
+            groups = before + [0] * (8 - len(before) - len(after)) + after
+        else:
+            groups = cls._groups(ip, True)
+            if len(groups) != 8:
+                raise InvalidIpError
+        value = 0
+        for group in groups:
+            value = value << 16 | group
+        return value
 
-    # IPv4Address
-    def __add__(self, ipv4address):
-        return IPv4Address(int(self) + int(ipv4address))
+    # list of int
+    @classmethod
+    def _groups(cls, text, dotted_tail):
+        if not text:
+            return []
+        groups = []
+        parts = text.split(':')
+        for index, part in enumerate(parts):
+            if dotted_tail and index == len(parts) - 1 and '.' in part:
+                value = IPv4Address.str_to_int(part)
+                groups.extend((value >> 16, value & 0xFFFF))
+            elif 1 <= len(part) <= 4 and not part.lstrip(cls._hex_digits):
+                groups.append(int(part, 16))
+            else:
+                raise InvalidIpError
+        return groups
 
-    # IPv4Address
-    def __sub__(self, ipv4address):
-        return IPv4Address(int(self) - int(ipv4address))
+    # str, the RFC 5952 form
+    @classmethod
+    def int_to_str(cls, integer):
+        if integer < 0 or integer >> 128:
+            raise InvalidIpError
+        groups = ['%x' % (integer >> shift & 0xFFFF) for shift in range(112, -16, -16)]
+        # the longest run of at least two zero groups, the first one on ties, becomes '::'
+        best_start, best_length, start = 0, 0, None
+        for index, group in enumerate(groups + ['']):
+            if group == '0':
+                if start is None:
+                    start = index
+            elif start is not None:
+                if index - start > best_length:
+                    best_start, best_length = start, index - start
+                start = None
+        if best_length < 2:
+            return ':'.join(groups)
+        return ':'.join(groups[:best_start]) + '::' + ':'.join(groups[best_start + best_length:])
 
 
 class Network(object):
-    # static
-    private_networks = None
+    # immutable IPv4 or IPv6 network, ordered by family, address and mask length; derived addresses are
+    # built on first use, the int_ properties build none
+    __slots__ = ('_address', '_int_address', '_mask', '_mask_length', '_mask_address', '_wildcard',
+                 '_broadcast_address', '_first_usable_address', '_last_usable_address')
 
     # void
     def __init__(self, ipv4address, int_mask_length):
+        # ipv4address is an IPv4Address or IPv6Address
         # raises ValueError, InvalidMaskError
-        if isinstance(ipv4address, IPv4Address):
-            if isinstance(int_mask_length, int) and 0 <= int_mask_length <= 32:
-                self._mask = (2 ** int_mask_length - 1) << (32-int_mask_length)
+        if isinstance(ipv4address, _Address):
+            width = ipv4address._width
+            if isinstance(int_mask_length, int) and 0 <= int_mask_length <= width:
+                self._mask = (2 ** int_mask_length - 1) << (width - int_mask_length)
                 self._mask_length = int_mask_length
-                self._address = IPv4Address(int(ipv4address) & self._mask)
+                self._int_address = int(ipv4address) & self._mask
+                # an address without host bits is used as it is, unless it keeps a non-canonical string
+                # such as 010.000.000.000, which str() of the network must not repeat
+                string = ipv4address._string_ip
+                if self._int_address == int(ipv4address) and (
+                        string is None or string == ipv4address.int_to_str(self._int_address)):
+                    self._address = ipv4address
+                else:
+                    self._address = type(ipv4address)(self._int_address)
             else:
                 raise InvalidMaskError
         else:
             raise ValueError
+        # built on first use
+        self._mask_address = None
+        self._wildcard = None
+        self._broadcast_address = None
+        self._first_usable_address = None
+        self._last_usable_address = None
 
     # bool
     def __contains__(self, ipv4address):
         # raises ValueError
-        if isinstance(ipv4address, IPv4Address):
-            return int(ipv4address) & self._mask == self._address
+        if isinstance(ipv4address, type(self._address)):
+            return int(ipv4address) & self._mask == self._int_address
+        if isinstance(ipv4address, _Address):
+            return False
         raise ValueError
 
-    # IPv4Address
+    # IPv4Address or IPv6Address
     @property
     def address(self):
         return self._address
 
-    # IPv4Address
+    # int
+    @property
+    def int_address(self):
+        return self._int_address
+
+    # int, 4 or 6
+    @property
+    def version(self):
+        return self._address.version
+
+    # IPv4Address or IPv6Address, the last address of the network
     @property
     def broadcast_address(self):
-        return IPv4Address((int(self._address) | int(self.wildcard)))
+        if self._broadcast_address is None:
+            self._broadcast_address = type(self._address)(self.int_broadcast_address)
+        return self._broadcast_address
 
-    # IPv4Address
+    # int
+    @property
+    def int_broadcast_address(self):
+        return self._int_address | self.int_wildcard
+
+    # IPv4Address or IPv6Address, None for an IPv4 /31
     @property
     def first_usable_address(self):
-        if self._mask_length < 31:
-            return IPv4Address(int(self._address)+1)
-        if self._mask_length == 31:
-            return None
-        return IPv4Address(int(self._address))
+        if self._first_usable_address is None:
+            if self._address._width == 128:
+                # IPv6 reserves no network or broadcast address
+                self._first_usable_address = self._address
+            elif self._mask_length < 31:
+                self._first_usable_address = IPv4Address(self._int_address + 1)
+            elif self._mask_length == 32:
+                self._first_usable_address = self._address
+        return self._first_usable_address
 
-    # IPv4Address
+    # IPv4Address or IPv6Address, None for an IPv4 /31
     @property
     def last_usable_address(self):
-        if self._mask_length < 31:
-            return IPv4Address((int(self._address) | int(self.wildcard) - 1))
-        if self._mask_length == 31:
-            return None
-        return IPv4Address(int(self._address))
+        if self._last_usable_address is None:
+            if self._address._width == 128:
+                self._last_usable_address = self.broadcast_address
+            elif self._mask_length < 31:
+                self._last_usable_address = IPv4Address(self.int_broadcast_address - 1)
+            elif self._mask_length == 32:
+                self._last_usable_address = self._address
+        return self._last_usable_address
 
-    # IPv4Address
+    # IPv4Address or IPv6Address
     @property
     def mask(self):
-        return IPv4Address(self._mask)
+        if self._mask_address is None:
+            self._mask_address = type(self._address)(self._mask)
+        return self._mask_address
 
-    # IPv4Address
+    # int
+    @property
+    def int_mask(self):
+        return self._mask
+
+    # str, e.g. 255.255.255.0
+    @property
+    def str_mask(self):
+        # the mask address keeps its string form once built
+        return str(self.mask)
+
+    # IPv4Address or IPv6Address
     @property
     def wildcard(self):
-        return IPv4Address(self._mask ^ 0xFFFFFFFF)
+        if self._wildcard is None:
+            self._wildcard = type(self._address)(self.int_wildcard)
+        return self._wildcard
+
+    # int
+    @property
+    def int_wildcard(self):
+        return self._mask ^ ((1 << self._address._width) - 1)
 
     # int
     @property
@@ -163,15 +418,140 @@ class Network(object):
     @property
     def subnets(self):
         subnets_list = []
-        if self._mask_length < 32:
+        width = self._address._width
+        if self._mask_length < width:
             new_mask_length = self._mask_length + 1
-            subnets_list = [Network(IPv4Address(int(self._address)), new_mask_length),
-                            Network(IPv4Address(int(self._address) | 1 << (32-new_mask_length)), new_mask_length)]
+            address_class = type(self._address)
+            subnets_list = [Network(self._address, new_mask_length),
+                            Network(address_class(self._int_address | 1 << (width-new_mask_length)),
+                                    new_mask_length)]
         return subnets_list
 
+    # generator of Network, the subnets with new_mask_length in address order
+    def iter_subnets(self, new_mask_length=None):
+        # raises InvalidMaskError
+        new_mask_length = self._subnet_mask_length(new_mask_length)
+        width = self._address._width
+        address_class = type(self._address)
+        start = self._int_address
+        stop = start + (1 << (width - self._mask_length))
+        return (Network(address_class(address), new_mask_length)
+                for address in range(start, stop, 1 << (width - new_mask_length)))
+
+    # Network
+    def subnet_at(self, index, new_mask_length=None):
+        # raises InvalidMaskError, IndexError
+        new_mask_length = self._subnet_mask_length(new_mask_length)
+        count = 1 << (new_mask_length - self._mask_length)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError
+        return Network(type(self._address)(self._int_address + (index << (self._address._width - new_mask_length))),
+                       new_mask_length)
+
+    # int
+    def _subnet_mask_length(self, new_mask_length):
+        if new_mask_length is None:
+            new_mask_length = self._mask_length + 1
+        if not isinstance(new_mask_length, int) or not self._mask_length <= new_mask_length <= self._address._width:
+            raise InvalidMaskError
+        return new_mask_length
+
+    # generator of IPv4Address or IPv6Address, the usable host addresses in address order
+    def iter_hosts(self):
+        if self.total_hosts == 0:
+            return iter(())
+        first = int(self.first_usable_address)
+        address_class = type(self._address)
+        return (address_class(address) for address in range(first, first + self.total_hosts))
+
+    # IPv4Address or IPv6Address
+    def host_at(self, index):
+        # raises IndexError
+        total_hosts = self.total_hosts
+        if index < 0:
+            index += total_hosts
+        if not 0 <= index < total_hosts:
+            raise IndexError
+        return type(self._address)(int(self.first_usable_address) + index)
+
+    # Network
+    def supernet(self, new_mask_length=None):
+        # raises InvalidMaskError
+        if new_mask_length is None:
+            new_mask_length = self._mask_length - 1
+        if not isinstance(new_mask_length, int) or not 0 <= new_mask_length <= self._mask_length:
+            raise InvalidMaskError
+        return Network(self._address, new_mask_length)
+
+    # list of Network covering this network without the given one, in address order
+    def exclude(self, network):
+        if network.version != self.version:
+            return [self]
+        address, mask_length = network.int_address, network.mask_length
+        if mask_length < self._mask_length:
+            # network is wider than this one, so it either covers it or doesn't touch it
+            return [] if self._int_address & network.int_mask == address else [self]
+        if address & self._mask != self._int_address:
+            return [self]
+        width = self._address._width
+        address_class = type(self._address)
+        lower, upper = [], []
+        current = self._int_address
+        for current_length in range(self._mask_length + 1, mask_length + 1):
+            bit = 1 << (width - current_length)
+            if address & bit:
+                lower.append(Network(address_class(current), current_length))
+                current |= bit
+            else:
+                upper.append(Network(address_class(current | bit), current_length))
+        upper.reverse()
+        return lower + upper
+
+    # list of Network, the minimal list of networks covering exactly the same addresses, in address order
+    @classmethod
+    def collapse(cls, networks):
+        # IPv4 networks come before IPv6 ones
+        families = {}
+        for network in networks:
+            address = network.address
+            families.setdefault(type(address), []).append(
+                (int(address), int(address) + (1 << (address._width - network.mask_length))))
+        collapsed = []
+        for address_class in sorted(families, key=lambda address_class: address_class._width):
+            start = stop = None
+            for interval_start, interval_stop in sorted(families[address_class]):
+                if stop is not None and interval_start <= stop:
+                    if interval_stop > stop:
+                        stop = interval_stop
+                    continue
+                if stop is not None:
+                    collapsed.extend(cls._cover(start, stop, address_class))
+                start, stop = interval_start, interval_stop
+            if stop is not None:
+                collapsed.extend(cls._cover(start, stop, address_class))
+        return collapsed
+
+    # generator of Network, the largest aligned blocks exactly covering [start, stop)
+    @classmethod
+    def _cover(cls, start, stop, address_class=None):
+        if address_class is None:
+            address_class = IPv4Address
+        width = address_class._width
+        while start < stop:
+            size = start & -start or 1 << width
+            while size > stop - start:
+                size >>= 1
+            yield Network(address_class(start), width + 1 - size.bit_length())
+            start += size
+
     # int
     @property
     def total_hosts(self):
+        if self._address._width == 128:
+            # every address of an IPv6 network is usable
+            return 2 ** (128-self._mask_length)
         if self._mask_length < 31:
             return 2 ** (32-self._mask_length) - 2
         if self._mask_length == 31:
@@ -182,27 +562,59 @@ class Network(object):
     # bool
     @property
     def public(self):
-        if self.__class__.private_networks is None:
-            self.__class__.private_networks = [Network(IPv4Address('10.0.0.0'), 8),
-                        Network(IPv4Address('127.0.0.0'), 8), Network(IPv4Address('172.16.0.0'), 12),
-                        Network(IPv4Address('192.168.0.0'), 16), Network(IPv4Address('224.0.0.0'), 3)]
-        for network in self.__class__.private_networks:
-            if self._address in network:
-                return False
-        return True
+        if self._address._width == 128:
+            return is_public6(self._int_address)
+        return is_public(self._int_address)
 
     # str
     def __repr__(self):
         return '{}/{}'.format(str(self._address), self._mask_length)
 
+    # tuple, orders and compares networks
+    def _key(self):
+        return self._address._width, self._int_address, self._mask_length
+
     # bool
     def __eq__(self, network):
-        return self._address == network.address and self._mask_length == network.mask_length
+        if not isinstance(network, Network):
+            return NotImplemented
+        return self._int_address == network._int_address and self._mask_length == network._mask_length \
+            and self._address._width == network._address._width
 
     # bool
     def __ne__(self, network):
+        if not isinstance(network, Network):
+            return NotImplemented
         return not self == network
 
+    # bool
+    def __lt__(self, network):
+        if not isinstance(network, Network):
+            return NotImplemented
+        return self._key() < network._key()
+
+    # bool
+    def __gt__(self, network):
+        if not isinstance(network, Network):
+            return NotImplemented
+        return self._key() > network._key()
+
+    # bool
+    def __le__(self, network):
+        if not isinstance(network, Network):
+            return NotImplemented
+        return self._key() <= network._key()
+
+    # bool
+    def __ge__(self, network):
+        if not isinstance(network, Network):
+            return NotImplemented
+        return self._key() >= network._key()
+
+    # int
+    def __hash__(self):
+        return hash((self._int_address, self._mask_length))
+
 
 class Route(object):
     __repr_string = 'net: {}, gateway: {}, interface: {}, metric: {}'
@@ -215,10 +627,12 @@ class Route(object):
         self._network = network
         self._interface_name = str_interface_name
         self._metric = int_metric
+        # the gateway is of the network's family, IPv4Address or IPv6Address
+        address_class = type(network.address)
         if ipv4_gateway is not None:
-            self._gateway = IPv4Address(ipv4_gateway)
+            self._gateway = address_class(ipv4_gateway)
         else:
-            self._gateway = IPv4Address('0.0.0.0')
+            self._gateway = address_class(0)
 
     @classmethod
     def _validate_route(cls, network, interface_name, metric):
@@ -267,41 +681,570 @@ class Route(object):
 
     # int
     def __hash__(self):
-        return hash((int(self._network.address), int(self._network.mask), int(self._gateway),
-        self._interface_name, self._metric))
+        return hash((self._network.int_address, self._network.mask_length, int(self._gateway),
+                     self._interface_name, self._metric))
+
+
+class RouteDiff(object):
+    # routes only in the new set, routes only in the old one, and (old, new) pairs of the same network and
+    # interface whose gateway or metric changed
+
+    # void
+    def __init__(self, added, removed, changed):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    # RouteDiff
+    @classmethod
+    def between(cls, old_routes, new_routes):
+        # routes in both sets are dropped by hash first, so the cost beyond two set differences grows
+        # with the size of the change; the routes left on both sides with the same family, network,
+        # mask length and interface are paired as changed
+        if not isinstance(old_routes, (set, frozenset)):
+            old_routes = set(old_routes)
+        if not isinstance(new_routes, (set, frozenset)):
+            new_routes = set(new_routes)
+        only_old = sorted(old_routes - new_routes, key=cls._key)
+        only_new = sorted(new_routes - old_routes, key=cls._key)
+        unmatched = {}
+        for route in only_old:
+            unmatched.setdefault(cls._key(route)[:4], []).append(route)
+        added, changed = [], []
+        paired = set()
+        for route in only_new:
+            candidates = unmatched.get(cls._key(route)[:4])
+            if candidates:
+                old_route = candidates.pop(0)
+                paired.add(old_route)
+                changed.append((old_route, route))
+            else:
+                added.append(route)
+        return cls(added, [route for route in only_old if route not in paired], changed)
+
+    # tuple, sorts like Route equality compares
+    @classmethod
+    def _key(cls, route):
+        network = route.network
+        return (network.version, network.int_address, network.mask_length, route.interface_name,
+                int(route.gateway), route.metric)
+
+    # list of Route, what to add to the old set to apply this diff
+    @property
+    def additions(self):
+        return self.added + [new for _, new in self.changed]
+
+    # list of Route, what to remove from the old set to apply this diff
+    @property
+    def removals(self):
+        return self.removed + [old for old, _ in self.changed]
+
+    # int
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    # str
+    def __repr__(self):
+        return 'added: {}, removed: {}, changed: {}'.format(len(self.added), len(self.removed), len(self.changed))
+
+
+class TableVersion(object):
+    # one published state of a Router, never changed afterwards; the IPv4-only batch and compiled indexes
+    # are built on first use
+
+    # void
+    def __init__(self, trie, generation, compiled=False, compiled_table=None, trie6=None):
+        self.trie = trie
+        self.trie6 = trie6 if trie6 is not None else PrefixTrie(width=128)
+        self.generation = generation
+        self.compiled = compiled
+        self._compiled_table = compiled_table
+        self._vector_table = None
+
+    # TableVersion
+    @classmethod
+    def from_routes(cls, routes, generation, compiled=False):
+        routes4, routes6 = [], []
+        for route in routes:
+            (routes6 if route.network.version == 6 else routes4).append(route)
+        return cls(PrefixTrie(routes4), generation, compiled, trie6=PrefixTrie(routes6, 128))
+
+    # Route or None
+    def lookup(self, address):
+        # address is the int of an IPv4 address
+        if self.compiled:
+            return self.compiled_table.lookup(address)
+        return self.trie.lookup(address)
+
+    # Route or None
+    def route_for_address(self, ipv4address):
+        # raises ValueError
+        if isinstance(ipv4address, IPv4Address):
+            return self.lookup(int(ipv4address))
+        if isinstance(ipv4address, IPv6Address):
+            return self.trie6.lookup(int(ipv4address))
+        raise ValueError
+
+    # tuple of Route, empty when no route matches
+    def next_hops(self, ipv4address):
+        # raises ValueError
+        return self._trie_for(ipv4address).lookup_group(int(ipv4address)) or ()
+
+    # Route or None
+    def route_for_flow(self, ipv4address, flow_key):
+        # raises ValueError
+        group = self._trie_for(ipv4address).lookup_group(int(ipv4address))
+        if group is None:
+            return None
+        return group[flow_key % len(group)]
+
+    # generator of Route, all routes of both families
+    def routes(self):
+        for trie in (self.trie, self.trie6):
+            for route in trie.exact(0, 0):
+                yield route
+            for route in trie.more_specifics(0, 0):
+                yield route
+
+    # generator of Route
+    def covering_routes(self, network):
+        return self._trie_for(network.address).covering(network.int_address, network.mask_length)
+
+    # generator of Route
+    def more_specific_routes(self, network):
+        return self._trie_for(network.address).more_specifics(network.int_address, network.mask_length)
+
+    # generator of Route
+    def exact_routes(self, network):
+        return self._trie_for(network.address).exact(network.int_address, network.mask_length)
+
+    # PrefixTrie
+    def _trie_for(self, address):
+        # raises ValueError
+        if isinstance(address, IPv4Address):
+            return self.trie
+        if isinstance(address, IPv6Address):
+            return self.trie6
+        raise ValueError
+
+    # numpy.ndarray (array without NumPy) of indices into indexed_routes, -1 where no route matches
+    def route_for_addresses(self, addresses):
+        return self.vector_table.lookup_many(addresses)
+
+    # tuple of Route
+    @property
+    def indexed_routes(self):
+        return self.vector_table.routes
+
+    # VectorTable
+    @property
+    def vector_table(self):
+        # concurrent readers may both build it, either result is the same
+        if self._vector_table is None:
+            self._vector_table = VectorTable(self.trie)
+        return self._vector_table
+
+    # CompiledTable
+    @property
+    def compiled_table(self):
+        if self._compiled_table is None:
+            self._compiled_table = CompiledTable(self.trie)
+        return self._compiled_table
+
+    # int
+    def __len__(self):
+        return len(self.trie) + len(self.trie6)
+
+
+class _TrackedRoutes(MutableSet):
+    # Router.routes; counts the changes made through it, so that the router notices same-size swaps
+    __slots__ = ('_router',)
+
+    # void
+    def __init__(self, router):
+        self._router = router
+
+    # set, the operators and methods which make a new set return a plain one
+    @classmethod
+    def _from_iterable(cls, routes):
+        return set(routes)
+
+    # bool
+    def __contains__(self, route):
+        return route in self._router._routes
+
+    # iterator of Route
+    def __iter__(self):
+        # walks the published version, which updates from other threads leave alone
+        return self._router.version.routes()
+
+    # int
+    def __len__(self):
+        return len(self._router._routes)
+
+    # void
+    def add(self, route):
+        self._router._routes.add(route)
+        self._router._edits += 1
+
+    # void
+    def discard(self, route):
+        self._router._routes.discard(route)
+        self._router._edits += 1
+
+    # void
+    def update(self, *routes):
+        self._router._routes.update(*routes)
+        self._router._edits += 1
+
+    # void
+    def difference_update(self, *routes):
+        self._router._routes.difference_update(*routes)
+        self._router._edits += 1
+
+    # void
+    def intersection_update(self, *routes):
+        self._router._routes.intersection_update(*routes)
+        self._router._edits += 1
+
+    # void
+    def symmetric_difference_update(self, routes):
+        self._router._routes.symmetric_difference_update(routes)
+        self._router._edits += 1
+
+    # void
+    def clear(self):
+        self._router._routes.clear()
+        self._router._edits += 1
+
+    # set
+    def copy(self):
+        return set(self._router._routes)
+
+    # set
+    def union(self, *routes):
+        return self._router._routes.union(*routes)
+
+    # set
+    def intersection(self, *routes):
+        return self._router._routes.intersection(*routes)
+
+    # set
+    def difference(self, *routes):
+        return self._router._routes.difference(*routes)
+
+    # set
+    def symmetric_difference(self, routes):
+        return self._router._routes.symmetric_difference(routes)
+
+    # bool
+    def issubset(self, routes):
+        return self._router._routes.issubset(routes)
+
+    # bool
+    def issuperset(self, routes):
+        return self._router._routes.issuperset(routes)
+
+    # str
+    def __repr__(self):
+        return repr(self._router._routes)
 
 
 class Router(object):
+    # lookups read the published TableVersion without locking, serialized writers publish each batch as a
+    # new version. In-place changes to the constructor's set are only noticed when its size changes
+
+    # batches changing more prefixes rebuild the compiled table on first use instead of patching a copy
+    _patch_limit = 4096
+    # flow: source, destination, protocol, source port, destination port
+    _flow = struct.Struct('!IIBHH')
+    _flow6 = struct.Struct('!QQQQBHH')
+
     # void
     def __init__(self, routes):
         if isinstance(routes, set):
             self._routes = routes
+            # changes made through routes, and how many of them the published version includes
+            self._edits = 0
+            self._synced_edits = 0
+            self._cache = None
+            self._stats = None
+            self._write_lock = threading.Lock()
+            self._version = TableVersion.from_routes(routes, 0)
             return
         raise ValueError
 
     # void
     def add_route(self, route):
-        self._routes.add(route)
+        self.update(added=(route,))
+
+    # void
+    def add_routes(self, routes):
+        # bulk insert from any iterable, published as one version
+        self.update(added=routes)
+
+    # void
+    def remove_route(self, route):
+        # raises KeyError
+        self.update(removed=(route,))
+
+    # TableVersion, the version published for the batch
+    def update(self, added=(), removed=()):
+        # removes and then adds routes; lookups see either all of the changes or none of them.
+        # Routes which are already present are not added twice.
+        # raises KeyError when a removed route is not present, nothing is changed then
+        with self._write_lock:
+            return self._apply(added, removed)
+
+    # TableVersion, the version published for the batch
+    def update_with(self, changes):
+        # changes is called with the current routes and returns (added, removed), which are applied
+        # before any other update comes in, e.g. to remove the routes an analysis of the table finds
+        # raises KeyError as update does
+        with self._write_lock:
+            added, removed = changes(self._synced_version().routes())
+            return self._apply(added, removed)
+
+    # RouteDiff, from the current routes to new_routes
+    def diff(self, new_routes):
+        # from the published version, so updates meanwhile do not disturb it; apply then raises KeyError
+        return RouteDiff.between(self.version.routes(), new_routes)
+
+    # TableVersion
+    def apply(self, diff):
+        # applies a RouteDiff computed for the current routes as one batch
+        # raises KeyError when the routes changed since, nothing is changed then
+        return self.update(diff.additions, diff.removals)
+
+    # RouteDiff
+    def refresh(self, new_routes):
+        # replaces the routes by new_routes, e.g. a new table dump, touching only the routes which differ
+        with self._write_lock:
+            diff = RouteDiff.between(self._routes, new_routes)
+            self._apply(diff.additions, diff.removals)
+            return diff
+
+    # TableVersion
+    def _apply(self, added, removed):
+        # with the write lock held
+        version = self._synced_version()
+        gone = set()
+        for route in removed:
+            if route in gone or route not in self._routes:
+                raise KeyError(route)
+            gone.add(route)
+        trie, trie6 = version.trie.copy(), version.trie6.copy()
+        # prefixes of IPv4 routes whose best route changed, the IPv6 ones are only in trie6
+        changed = []
+        for route in gone:
+            if route.network.version == 6:
+                trie6.remove(route)
+            elif trie.remove(route):
+                changed.append(route)
+        new = set()
+        for route in added:
+            if route in new or (route in self._routes and route not in gone):
+                continue
+            new.add(route)
+            if route.network.version == 6:
+                trie6.insert(route)
+            elif trie.insert(route):
+                changed.append(route)
+        if not gone and not new:
+            return version
+        compiled_table = None
+        if version.compiled and version._compiled_table is not None and len(changed) <= self._patch_limit:
+            compiled_table = version._compiled_table.copy()
+            compiled_table.update_prefixes(trie, [(route.network.int_address, route.network.mask_length)
+                                                  for route in changed])
+        version = TableVersion(trie, version.generation + 1, version.compiled, compiled_table, trie6)
+        self._version = version
+        self._routes.difference_update(gone)
+        self._routes.update(new)
+        # after publishing, see RouteCache.lookup
+        if self._cache is not None:
+            for route in changed:
+                self._cache.invalidate(route.network.int_address, route.network.mask_length)
+        return version
 
     # Route or None
     def route_for_address(self, ipv4address):
-        route_candidate_lst = [route for route in self._routes if ipv4address in route.network]
-        if len(route_candidate_lst) == 0:
-            return None
-        if len(route_candidate_lst) == 1:
-            return route_candidate_lst[0]
-        longest_mask = max(route_candidate_lst, key=lambda x: x.network.mask_length).network.mask_length
-        route_candidate_lst = [route for route in route_candidate_lst if route.network.mask_length == longest_mask]
-        return min(route_candidate_lst, key=lambda x: x.metric)
+        # raises ValueError
+        if isinstance(ipv4address, IPv4Address):
+            # the version check also clears the cache when the routes set was changed in place
+            version = self.version
+            cache = self._cache
+            if self._stats is not None:
+                if cache is not None:
+                    return self._instrumented_lookup(version.trie, int(ipv4address),
+                                                     lambda address: cache.lookup(address, self._lookup))
+                return self._instrumented_lookup(version.trie, int(ipv4address), version.lookup)
+            if cache is not None:
+                return cache.lookup(int(ipv4address), self._lookup)
+            return version.lookup(int(ipv4address))
+        if isinstance(ipv4address, IPv6Address):
+            # IPv6 lookups are not cached
+            version = self.version
+            if self._stats is not None:
+                return self._instrumented_lookup(version.trie6, int(ipv4address), version.trie6.lookup)
+            return version.trie6.lookup(int(ipv4address))
+        raise ValueError
 
-    # set
+    # Route or None
+    def _instrumented_lookup(self, trie, address, resolve):
+        stats = self._stats
+        start = time.perf_counter_ns()
+        route = resolve(address)
+        latency = time.perf_counter_ns() - start
+        if stats is not None:
+            stats.record(route, trie.count_matches(address), latency)
+        return route
+
+    # Route or None
+    def _lookup(self, address):
+        return self.version.lookup(address)
+
+    # tuple of Route, the equal-cost group of the longest matching prefix, empty when no route matches
+    def next_hops(self, ipv4address):
+        # all routes of that prefix with the best metric, ordered by gateway and interface name
+        # raises ValueError
+        return self.version.next_hops(ipv4address)
+
+    # Route or None
+    def route_for_flow(self, ipv4address, flow_key):
+        # picks a member of the equal-cost group by flow_key, a non-negative int such as flow_hash(),
+        # so all packets of a flow take the same path
+        # raises ValueError
+        return self.version.route_for_flow(ipv4address, flow_key)
+
+    # generator of Route, the routes of the shorter prefixes covering network, shortest first
+    def covering_routes(self, network):
+        # the queries walk the trie of one version, so they are lazy and unaffected by later updates;
+        # they take time in proportion to the prefix length plus the routes found
+        # raises ValueError
+        return self.version.covering_routes(network)
+
+    # generator of Route, the routes of the longer prefixes inside network, in address order
+    def more_specific_routes(self, network):
+        # raises ValueError
+        return self.version.more_specific_routes(network)
+
+    # generator of Route, the routes of network itself
+    def exact_routes(self, network):
+        # raises ValueError
+        return self.version.exact_routes(network)
+
+    # int, stable 32 bit hash of a flow for route_for_flow
+    @classmethod
+    def flow_hash(cls, source, destination, protocol=0, source_port=0, destination_port=0):
+        # source and destination are IPv4Address, IPv6Address or int
+        source, destination = int(source), int(destination)
+        if source >> 32 or destination >> 32:
+            return zlib.crc32(cls._flow6.pack(source >> 64, source & 0xFFFFFFFFFFFFFFFF, destination >> 64,
+                                              destination & 0xFFFFFFFFFFFFFFFF, protocol, source_port,
+                                              destination_port))
+        return zlib.crc32(cls._flow.pack(source, destination, protocol, source_port, destination_port))
+
+    # numpy.ndarray (array without NumPy) of indices into indexed_routes, -1 where no route matches
+    def route_for_addresses(self, addresses):
+        # IPv4 addresses as VectorTable.address_array takes them. Use version.route_for_addresses and
+        # version.indexed_routes while the table may change
+        version = self.version
+        indices = version.route_for_addresses(addresses)
+        stats = self._stats
+        if stats is not None:
+            stats.record_batch(version.indexed_routes, indices)
+        return indices
+
+    # tuple of Route, valid until the routes change
     @property
-    def routes(self):
-        return self._routes
+    def indexed_routes(self):
+        return self.version.indexed_routes
+
+    # TableVersion
+    @property
+    def version(self):
+        version = self._version
+        if len(version) != len(self._routes) or self._edits != self._synced_edits:
+            version = self._resync()
+        return version
+
+    # CompiledTable
+    def compile(self):
+        # switches route_for_address to the DIR-24-8 table, which is patched by later updates
+        with self._write_lock:
+            version = self._synced_version()
+            if not version.compiled:
+                version = TableVersion(version.trie, version.generation + 1, True, version.compiled_table,
+                                       version.trie6)
+                self._version = version
+            return version.compiled_table
+
+    # bool
+    @property
+    def compiled(self):
+        return self._version.compiled
+
+    # RouteCache
+    def enable_cache(self, capacity=4096):
+        # puts a bounded LRU cache in front of route_for_address
+        self._cache = RouteCache(capacity)
+        return self._cache
 
     # void
-    def remove_route(self, route):
-        self._routes.remove(route)
+    def disable_cache(self):
+        self._cache = None
+
+    # RouteCache or None
+    @property
+    def cache(self):
+        return self._cache
+
+    # LookupStats
+    def enable_stats(self):
+        # records lookups until disable_stats(); recording walks the trie a second time to count the
+        # candidates, so instrumented lookups take two to three times as long
+        self._stats = LookupStats()
+        return self._stats
+
+    # void
+    def disable_stats(self):
+        self._stats = None
+
+    # LookupStats or None
+    @property
+    def stats(self):
+        return self._stats
+
+    # MutableSet of Route, changes to it are applied on the next lookup
+    @property
+    def routes(self):
+        return _TrackedRoutes(self)
+
+    # TableVersion
+    def _resync(self):
+        # the routes set may be changed in place, see Router, the trie is then rebuilt. A reader does
+        # not wait for a writer holding the lock, it keeps the published version, which the writer
+        # brings in line
+        if not self._write_lock.acquire(blocking=False):
+            return self._version
+        try:
+            return self._synced_version()
+        finally:
+            self._write_lock.release()
+
+    # TableVersion
+    def _synced_version(self):
+        # with the write lock held
+        version = self._version
+        edits = self._edits
+        if len(version) != len(self._routes) or edits != self._synced_edits:
+            version = TableVersion.from_routes(self._routes, version.generation + 1, version.compiled)
+            self._version = version
+            self._synced_edits = edits
+            if self._cache is not None:
+                self._cache.clear()
+        return version
 
 
 if __name__ == '__main__':
@@ -0,0 +1,176 @@
+import random
+import unittest
+from main import IPv4Address, Network, Route, Router
+from fixtures import example_routes
+from CompiledTable import CompiledTable
+from PrefixTrie import PrefixTrie
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.routes = set(example_routes())
+
+    def test_compiled_router(self):
+        router = Router(self.routes)
+        router.compile()
+        self.assertTrue(router.compiled)
+        self.assertEqual(str(router.route_for_address(IPv4Address('10.123.1.1'))),
+                         'net: 10.123.1.0/24, interface: en2, metric: 101')
+        self.assertEqual(str(router.route_for_address(IPv4Address('10.123.15.1'))),
+                         'net: 10.123.0.0/20, interface: en1, metric: 100')
+        self.assertEqual(str(router.route_for_address(IPv4Address('8.8.8.8'))),
+                         'net: 0.0.0.0/0, gateway: 192.168.0.1, interface: en0, metric: 10')
+
+    def test_overflow_blocks(self):
+        table = CompiledTable(PrefixTrie([Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en1', 10),
+                                          Route(Network(IPv4Address('10.1.1.128'), 25), None, 'en2', 10),
+                                          Route(Network(IPv4Address('10.1.1.129'), 32), None, 'en3', 10)]))
+        self.assertEqual(table.overflow_blocks, 1)
+        self.assertEqual(table.lookup(int(IPv4Address('10.1.1.127'))).interface_name, 'en1')
+        self.assertEqual(table.lookup(int(IPv4Address('10.1.1.128'))).interface_name, 'en2')
+        self.assertEqual(table.lookup(int(IPv4Address('10.1.1.129'))).interface_name, 'en3')
+        self.assertEqual(table.lookup(int(IPv4Address('10.1.1.255'))).interface_name, 'en2')
+        self.assertIsNone(table.lookup(int(IPv4Address('11.1.1.1'))))
+        self.assertEqual(table.memory_footprint // (1 << 20), 64)
+
+    def test_rebuilt_after_change(self):
+        router = Router(self.routes)
+        router.compile()
+        address = IPv4Address('10.123.1.1')
+        router.add_route(Route(Network(IPv4Address('10.123.1.0'), 30), None, 'en5', 1))
+        self.assertEqual(router.route_for_address(address).interface_name, 'en5')
+        router.remove_route(Route(Network(IPv4Address('10.123.1.0'), 30), None, 'en5', 1))
+        self.assertEqual(router.route_for_address(address).interface_name, 'en2')
+
+    def test_patched_on_churn(self):
+        rnd = random.Random(9)
+        pool = []
+        for _ in range(60):
+            network = Network(IPv4Address(rnd.randrange(1 << 32) & 0x0F0F0FF0 | 0x0A000000),
+                              rnd.choice((0, 8, 12, 16, 22, 24, 25, 28, 30, 32)))
+            pool.append(Route(network, None, 'en{}'.format(rnd.randrange(3)), rnd.randrange(3)))
+        router = Router(set())
+        table = router.compile()
+        for step in range(300):
+            route = rnd.choice(pool)
+            if route in router.routes:
+                router.remove_route(route)
+            else:
+                router.add_route(route)
+            if step % 50 == 0:
+                version = router.version
+                for candidate in pool:
+                    for address in (int(candidate.network.address), int(candidate.network.broadcast_address)):
+                        self.assertIs(version.compiled_table.lookup(address), version.trie.lookup(address))
+        # every update patched a copy, the table of the first version is unchanged
+        version = router.version
+        self.assertIsNotNone(version._compiled_table)
+        for candidate in pool:
+            for address in (int(candidate.network.address), int(candidate.network.broadcast_address)):
+                self.assertIs(version.compiled_table.lookup(address), version.trie.lookup(address))
+                self.assertIsNone(table.lookup(address))
+
+    def test_matches_trie(self):
+        rnd = random.Random(3)
+        routes = []
+        for _ in range(300):
+            network = Network(IPv4Address(rnd.randrange(1 << 32)), rnd.choice((8, 16, 20, 24, 26, 30, 32)))
+            routes.append(Route(network, None, 'en{}'.format(rnd.randrange(4)), rnd.randrange(3)))
+        trie = PrefixTrie(routes)
+        table = CompiledTable(trie)
+        addresses = [rnd.randrange(1 << 32) for _ in range(300)]
+        for route in routes:
+            address = int(route.network.address)
+            addresses.extend((address, address | 0xFF, int(route.network.broadcast_address)))
+        for address in addresses:
+            self.assertIs(table.lookup(address), trie.lookup(address))
+
+    def test_copy_is_independent(self):
+        trie = PrefixTrie(self.routes)
+        table = CompiledTable(trie)
+        copy = table.copy()
+        changed = trie.copy()
+        for route in (Route(Network(IPv4Address('10.123.1.128'), 25), None, 'en5', 1),
+                      Route(Network(IPv4Address('10.200.0.0'), 16), None, 'en6', 1)):
+            changed.insert(route)
+            copy.update(changed, int(route.network.address), route.network.mask_length)
+        self.assertEqual(copy.lookup(int(IPv4Address('10.123.1.129'))).interface_name, 'en5')
+        self.assertEqual(copy.lookup(int(IPv4Address('10.200.1.1'))).interface_name, 'en6')
+        self.assertEqual(table.lookup(int(IPv4Address('10.123.1.129'))).interface_name, 'en2')
+        self.assertEqual(table.lookup(int(IPv4Address('10.200.1.1'))).interface_name, 'en1')
+        self.assertEqual((table.overflow_blocks, copy.overflow_blocks), (0, 1))
+
+    def test_update_prefixes(self):
+        # nested prefixes added and removed in one batch
+        trie = PrefixTrie(self.routes)
+        table = CompiledTable(trie)
+        removed = [Route(Network(IPv4Address('10.0.0.0'), 8), '10.123.0.1', 'en1', 10),
+                   Route(Network(IPv4Address('10.123.0.0'), 20), None, 'en1', 100)]
+        added = [Route(Network(IPv4Address('10.123.1.128'), 25), None, 'en5', 1),
+                 Route(Network(IPv4Address('10.123.0.0'), 16), None, 'en6', 1),
+                 Route(Network(IPv4Address('10.123.1.0'), 26), None, 'en7', 1)]
+        for route in removed:
+            trie.remove(route)
+        for route in added:
+            trie.insert(route)
+        table.update_prefixes(trie, [(int(route.network.address), route.network.mask_length)
+                                     for route in removed + added])
+        for address in ('10.123.1.129', '10.123.1.1', '10.123.1.64', '10.123.2.1', '10.124.0.1', '8.8.8.8'):
+            self.assertIs(table.lookup(int(IPv4Address(address))), trie.lookup(int(IPv4Address(address))))
+
+
+    def test_update_copies_do_not_grow_with_table(self):
+        # a copy patched by one update copies the same few pages, chunks and buckets whatever the size
+        rnd = random.Random(16)
+        owned = []
+        for size in (1000, 30000):
+            trie = PrefixTrie(Route(Network(IPv4Address(rnd.randrange(1 << 32)), rnd.choice((16, 24, 28))), None,
+                                    'en0', 1) for _ in range(size))
+            table = CompiledTable(trie)
+            copy = table.copy()
+            route = Route(Network(IPv4Address('10.1.2.0'), 24), None, 'en1', 1)
+            trie.insert(route)
+            copy.update(trie, int(route.network.address), route.network.mask_length)
+            self.assertIs(copy.lookup(int(IPv4Address('10.1.2.3'))), route)
+            owned.append((len(copy._owned_pages), len(copy._owned_routes), len(copy._owned_buckets),
+                          len(copy._owned_blocks), len(copy._owned_block_slots)))
+            self.assertEqual((len(table._owned_pages), len(table._owned_routes), len(table._owned_buckets)),
+                             (0, 0, 0))
+        self.assertEqual(owned[0], owned[1])
+        self.assertLessEqual(max(owned[1]), 1)
+
+    def test_versions_stay_independent(self):
+        # every table of a chain of patched copies keeps matching its own trie
+        rnd = random.Random(160)
+
+        def random_route():
+            return Route(Network(IPv4Address(rnd.randrange(1 << 32) & 0x0A0F0FFF | 0x0A000000),
+                                 rnd.choice((8, 16, 24, 25, 28, 32))), None, 'en{}'.format(rnd.randrange(3)),
+                         rnd.randrange(3))
+
+        routes = [random_route() for _ in range(300)]
+        trie = PrefixTrie(routes)
+        versions = [(trie, CompiledTable(trie))]
+        for _ in range(30):
+            trie, table = versions[-1][0].copy(), versions[-1][1].copy()
+            changed = []
+            for route in rnd.sample(routes, 10):
+                routes.remove(route)
+                trie.remove(route)
+                changed.append(route)
+            for _ in range(10):
+                route = random_route()
+                routes.append(route)
+                trie.insert(route)
+                changed.append(route)
+            table.update_prefixes(trie, [(int(route.network.address), route.network.mask_length)
+                                         for route in changed])
+            versions.append((trie, table))
+        addresses = [int(route.network.address) | rnd.randrange(256) for route in routes]
+        addresses.extend(rnd.randrange(1 << 32) & 0x0A0F0FFF | 0x0A000000 for _ in range(500))
+        for trie, table in versions:
+            for address in addresses:
+                self.assertIs(table.lookup(address), trie.lookup(address))
+
+if __name__ == '__main__':
+    unittest.main()
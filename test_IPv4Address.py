@@ -22,6 +22,8 @@ class MyTestCase(unittest.TestCase):
         self.assertRaises(IllegalArgumentException, IPv4Address, '127.12.45.22s')
         self.assertRaises(IllegalArgumentException, IPv4Address, '127.12.45.256')
         self.assertRaises(IllegalArgumentException, IPv4Address, '127,12.45.256')
+        self.assertRaises(IllegalArgumentException, IPv4Address, '127.12.45')
+        self.assertRaises(IllegalArgumentException, IPv4Address, '127.12..45')
 
     def test_create_with_decimal(self):
         ip = IPv4Address('127.12.45.22')
@@ -50,6 +52,19 @@ class MyTestCase(unittest.TestCase):
     def test_lt(self):
         self.assertLess(IPv4Address('127.12.44.22'), IPv4Address('127.12.45.22'))
 
+    def test_hash(self):
+        self.assertEqual(len({IPv4Address('127.12.45.22'), IPv4Address(2131504406)}), 1)
+
+    def test_interned(self):
+        self.assertIs(IPv4Address.interned('10.0.0.1'), IPv4Address.interned('10.0.0.1'))
+        self.assertEqual(int(IPv4Address.interned(167772161)), 167772161)
+        self.assertRaises(IllegalArgumentException, IPv4Address.interned, '10.0.0.256')
+
+    def test_from_bytes(self):
+        self.assertEqual(str(IPv4Address.from_bytes(b'\x0a\x7b\x01\x02')), '10.123.1.2')
+        self.assertEqual(int(IPv4Address.from_bytes(memoryview(b'xx\xff\x00\x00\x01'), 2)), 0xFF000001)
+        self.assertRaises(IllegalArgumentException, IPv4Address.from_bytes, b'\x0a\x7b\x01', 0)
+
 
 
 if __name__ == '__main__':
@@ -0,0 +1,72 @@
+import json
+import unittest
+from main import IPv4Address, Network, Route, Router
+from fixtures import example_routes
+from LookupStats import LookupStats
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.routes = set(example_routes())
+
+    def test_router_stats(self):
+        router = Router(self.routes)
+        self.assertIsNone(router.stats)
+        stats = router.enable_stats()
+        self.assertIs(router.stats, stats)
+        for _ in range(3):
+            router.route_for_address(IPv4Address('10.123.1.1'))
+        router.route_for_address(IPv4Address('8.8.8.8'))
+        self.assertEqual((stats.lookups, stats.misses), (4, 0))
+        # 0.0.0.0/0, 10.0.0.0/8, 10.123.0.0/20 and 10.123.1.0/24 match 10.123.1.1
+        self.assertEqual(stats.candidates, 3 * 4 + 1)
+        self.assertEqual(stats.max_candidates, 4)
+        top = stats.top_routes(1)
+        self.assertEqual((str(top[0][0]), top[0][1]), ('net: 10.123.1.0/24, interface: en2, metric: 101', 3))
+        self.assertEqual(sum(stats.latency_histogram), 4)
+        router.disable_stats()
+        router.route_for_address(IPv4Address('8.8.8.8'))
+        self.assertEqual(stats.lookups, 4)
+
+    def test_misses_and_batches(self):
+        router = Router(set([Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en1', 10)]))
+        router.enable_cache()
+        stats = router.enable_stats()
+        self.assertIsNone(router.route_for_address(IPv4Address('11.0.0.1')))
+        self.assertIsNone(router.route_for_address(IPv4Address('11.0.0.1')))
+        router.route_for_addresses([int(IPv4Address('10.0.0.1')), int(IPv4Address('12.0.0.1'))] * 2)
+        self.assertEqual((stats.lookups, stats.misses, stats.candidates), (6, 4, 0))
+        self.assertEqual(stats.top_routes()[0][1], 2)
+        self.assertEqual(router.cache.hits, 1)
+        stats.reset()
+        self.assertEqual((stats.lookups, stats.misses, stats.route_hits, stats.latency_total), (0, 0, {}, 0))
+
+    def test_export(self):
+        router = Router(self.routes)
+        stats = router.enable_stats()
+        router.route_for_address(IPv4Address('10.123.1.1'))
+        router.route_for_address(IPv4Address('192.168.0.7'))
+        snapshot = json.loads(stats.to_json())
+        self.assertEqual(snapshot['lookups'], 2)
+        self.assertEqual(snapshot['mean_candidates'], 3.0)
+        self.assertEqual(sum(snapshot['latency_histogram_ns'].values()), 2)
+        self.assertGreater(snapshot['latency_p99_ns'], 0)
+        text = stats.to_text()
+        self.assertIn('router_lookups_total 2\n', text)
+        self.assertIn('router_lookup_latency_ns_count 2\n', text)
+        self.assertIn('router_lookup_latency_ns_sum {}\n'.format(stats.latency_total), text)
+        self.assertGreater(stats.latency_total, 0)
+        self.assertIn('router_route_hits_total{network="192.168.0.0/24",interface="en0",metric="10"} 1\n', text)
+        self.assertEqual(LookupStats().to_text().count('\n'), 11)
+
+    def test_export_escapes_labels(self):
+        router = Router(set([Route(Network(IPv4Address('10.0.0.0'), 8), None, 'tun"\\0\nx', 1)]))
+        stats = router.enable_stats()
+        router.route_for_address(IPv4Address('10.0.0.1'))
+        self.assertIn('router_route_hits_total{network="10.0.0.0/8",interface="tun\\"\\\\0\\nx",metric="1"} 1\n',
+                      stats.to_text())
+        self.assertEqual(stats.to_text().count('\n'), 13)
+
+
+if __name__ == '__main__':
+    unittest.main()
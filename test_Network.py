@@ -68,5 +68,15 @@ class MyTestCase(unittest.TestCase):
         self.assertFalse(net.is_public())
 
 
+    def test_value(self):
+        net = Network(IPv4Address('192.168.255.1'), 25)
+        self.assertIs(net.broadcast_address, net.broadcast_address)
+        self.assertEqual((net.int_address, net.int_wildcard, net.int_broadcast_address),
+                         (0xC0A8FF00, 0x7F, 0xC0A8FF7F))
+        self.assertEqual({net: 1}[Network(IPv4Address('192.168.255.100'), 25)], 1)
+        self.assertEqual(sorted([net, Network(IPv4Address('192.168.255.0'), 24), Network(IPv4Address('1.0.0.0'), 8)]),
+                         [Network(IPv4Address('1.0.0.0'), 8), Network(IPv4Address('192.168.255.0'), 24), net])
+        self.assertRaises(AttributeError, setattr, net, 'other', 1)
+
 if __name__ == '__main__':
     unittest.main()
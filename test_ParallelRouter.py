@@ -0,0 +1,30 @@
+import random
+import unittest
+from array import array
+from main import IPv4Address, Network, Route, Router
+from ParallelRouter import ParallelRouter
+
+
+class MyTestCase(unittest.TestCase):
+    def test_matches_router(self):
+        rnd = random.Random(17)
+        routes = set()
+        for _ in range(500):
+            network = Network(IPv4Address(rnd.randrange(1 << 32)), rnd.choice((4, 8, 16, 20, 24, 28, 32)))
+            routes.add(Route(network, None, 'en{}'.format(rnd.randrange(4)), rnd.randrange(3)))
+        router = Router(routes)
+        addresses = array('I', [rnd.randrange(1 << 32) for _ in range(2000)])
+        addresses.extend(int(route.network.address) for route in routes)
+        expected = [router.route_for_address(IPv4Address(address)) for address in addresses]
+        with ParallelRouter(router, processes=2, chunk_size=300) as parallel:
+            indices = parallel.route_for_addresses(addresses)
+            self.assertEqual(len(indices), len(addresses))
+            self.assertEqual([parallel.routes[index] if index >= 0 else None for index in indices], expected)
+            self.assertEqual(list(parallel.route_for_addresses(addresses.tobytes())), list(indices))
+            self.assertEqual(len(parallel.route_for_addresses([])), 0)
+            batches = [addresses[:1000], addresses[1000:]]
+            self.assertEqual([index for result in parallel.imap(batches) for index in result], list(indices))
+
+
+if __name__ == '__main__':
+    unittest.main()
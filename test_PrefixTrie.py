@@ -0,0 +1,184 @@
+import random
+import unittest
+from main import IPv4Address, IPv6Address, Network, Route, Router
+from fixtures import example_routes
+from PrefixTrie import PrefixTrie
+
+
+def linear_route_for_address(routes, address):
+    candidates = [route for route in routes if address in route.network]
+    if not candidates:
+        return None
+    longest_mask = max(route.network.mask_length for route in candidates)
+    return min((route for route in candidates if route.network.mask_length == longest_mask),
+               key=lambda x: x.metric)
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.routes = example_routes()
+
+    def test_longest_mask_then_metric(self):
+        trie = PrefixTrie(self.routes)
+        self.assertEqual(len(trie), 7)
+        self.assertEqual(str(trie.lookup(int(IPv4Address('10.123.1.1')))),
+                         'net: 10.123.1.0/24, interface: en2, metric: 101')
+        self.assertEqual(str(trie.lookup(int(IPv4Address('10.123.2.1')))),
+                         'net: 10.123.0.0/20, interface: en1, metric: 100')
+        self.assertEqual(str(trie.lookup(int(IPv4Address('10.1.1.1')))),
+                         'net: 10.0.0.0/8, gateway: 10.123.0.1, interface: en1, metric: 10')
+        self.assertEqual(str(trie.lookup(int(IPv4Address('8.8.8.8')))),
+                         'net: 0.0.0.0/0, gateway: 192.168.0.1, interface: en0, metric: 10')
+
+    def test_equal_metric_keeps_first_inserted(self):
+        first = Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en1', 10)
+        second = Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en2', 10)
+        self.assertIs(PrefixTrie([first, second]).lookup(int(IPv4Address('10.1.1.1'))), first)
+
+    def test_no_route(self):
+        trie = PrefixTrie(self.routes[1:])
+        self.assertIsNone(trie.lookup(int(IPv4Address('8.8.8.8'))))
+        self.assertIsNone(PrefixTrie().lookup(0))
+
+    def test_host_routes(self):
+        trie = PrefixTrie([Route(Network(IPv4Address('255.255.255.255'), 32), None, 'en0', 1),
+                           Route(Network(IPv4Address('0.0.0.0'), 32), None, 'en1', 1)])
+        self.assertEqual(trie.lookup(0xFFFFFFFF).interface_name, 'en0')
+        self.assertEqual(trie.lookup(0).interface_name, 'en1')
+        self.assertIsNone(trie.lookup(1))
+
+    def test_matches_linear_scan(self):
+        rnd = random.Random(7)
+        routes = set()
+        for _ in range(500):
+            network = Network(IPv4Address(rnd.randrange(1 << 32)), rnd.choice((0, 4, 8, 12, 16, 20, 24, 28, 32)))
+            routes.add(Route(network, None, 'en{}'.format(rnd.randrange(4)), rnd.randrange(5)))
+        router = Router(routes)
+        addresses = [IPv4Address(rnd.randrange(1 << 32)) for _ in range(500)]
+        addresses.extend(route.network.address for route in routes)
+        for address in addresses:
+            expected = linear_route_for_address(routes, address)
+            actual = router.route_for_address(address)
+            if expected is None:
+                self.assertIsNone(actual)
+            else:
+                self.assertEqual(actual.network, expected.network)
+                self.assertEqual(actual.metric, expected.metric)
+
+    def test_remove(self):
+        first = Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en1', 10)
+        second = Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en2', 10)
+        third = Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en1', 5)
+        trie = PrefixTrie([first, second])
+        self.assertFalse(trie.remove(Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en2', 10)))
+        self.assertTrue(trie.insert(third))
+        self.assertIs(trie.lookup(int(IPv4Address('10.1.1.1'))), third)
+        self.assertTrue(trie.remove(third))
+        self.assertIs(trie.lookup(int(IPv4Address('10.1.1.1'))), first)
+        self.assertTrue(trie.remove(first))
+        self.assertIsNone(trie.lookup(int(IPv4Address('10.1.1.1'))))
+        self.assertEqual(len(trie), 0)
+        self.assertIsNone(trie._root.zero)
+        self.assertRaises(ValueError, trie.remove, first)
+
+    def test_churn_matches_rebuild(self):
+        rnd = random.Random(5)
+        pool = [Route(Network(IPv4Address(rnd.randrange(1 << 32) & 0xFFFF0000), rnd.choice((8, 12, 16, 20, 24))),
+                      None, 'en{}'.format(rnd.randrange(3)), rnd.randrange(3)) for _ in range(100)]
+        router = Router(set())
+        first = router.version
+        for _ in range(1000):
+            route = rnd.choice(pool)
+            if route in router.routes:
+                router.remove_route(route)
+            else:
+                router.add_route(route)
+        trie = router.version.trie
+        self.assertEqual(len(first.trie), 0)
+        rebuilt = PrefixTrie(router.routes)
+        self.assertEqual(len(trie), len(rebuilt))
+        self.assertEqual(sorted((address, length, route.metric) for address, length, route in trie.prefixes()),
+                         sorted((address, length, route.metric) for address, length, route in rebuilt.prefixes()))
+
+    def test_ipv6_trie(self):
+        rnd = random.Random(17)
+        routes = [Route(Network(IPv6Address(0x20010DB8 << 96 | rnd.getrandbits(96)), rnd.choice((32, 40, 48, 64, 128))),
+                        None, 'en{}'.format(rnd.randrange(3)), rnd.randrange(3)) for _ in range(200)]
+        trie = PrefixTrie(routes, 128)
+        for _ in range(300):
+            route = rnd.choice(routes)
+            address = IPv6Address(int(route.network.address) | rnd.getrandbits(128 - route.network.mask_length))
+            self.assertIs(trie.lookup(int(address)), linear_route_for_address(routes, address))
+        self.assertEqual(len(list(trie.prefixes())), len(set((int(route.network.address), route.network.mask_length)
+                                                             for route in routes)))
+        self.assertIsNone(trie.lookup(0))
+
+    def test_copy_is_independent(self):
+        trie = PrefixTrie(self.routes)
+        copy = trie.copy()
+        added = Route(Network(IPv4Address('10.123.1.0'), 25), None, 'en5', 1)
+        copy.insert(added)
+        copy.remove(Route(Network(IPv4Address('10.0.0.0'), 8), '10.123.0.1', 'en1', 10))
+        trie.remove(Route(Network(IPv4Address('192.168.0.0'), 24), None, 'en0', 10))
+        self.assertEqual((len(trie), len(copy)), (len(self.routes) - 1, len(self.routes)))
+        self.assertEqual(trie.lookup(int(IPv4Address('10.123.1.1'))).interface_name, 'en2')
+        self.assertEqual(copy.lookup(int(IPv4Address('10.123.1.1'))).interface_name, 'en5')
+        self.assertEqual(trie.lookup(int(IPv4Address('10.200.0.1'))).interface_name, 'en1')
+        self.assertEqual(copy.lookup(int(IPv4Address('10.200.0.1'))).interface_name, 'en0')
+        self.assertEqual(trie.lookup(int(IPv4Address('192.168.0.1'))).interface_name, 'en0')
+        self.assertIsNotNone(copy.best(int(IPv4Address('192.168.0.0')), 24))
+        self.assertIsNone(trie.best(int(IPv4Address('192.168.0.0')), 24))
+
+    def test_equal_cost_groups(self):
+        rnd = random.Random(13)
+        pool = [Route(Network(IPv4Address(0x0A000000 | rnd.randrange(4) << 16), 16),
+                      '192.168.0.{}'.format(rnd.randrange(1, 4)), 'en{}'.format(rnd.randrange(4)),
+                      rnd.randrange(3)) for _ in range(40)]
+        trie = PrefixTrie()
+        present = set()
+        for _ in range(500):
+            route = rnd.choice(pool)
+            if route in present:
+                present.remove(route)
+                trie.remove(route)
+            else:
+                present.add(route)
+                trie.insert(route)
+            for network in set(route.network.address for route in pool):
+                candidates = [route for route in present if route.network.address == network]
+                group = trie.lookup_group(int(network))
+                if not candidates:
+                    self.assertIsNone(group)
+                    continue
+                best = min(route.metric for route in candidates)
+                self.assertEqual(set(group), set(route for route in candidates if route.metric == best))
+                self.assertEqual(list(group), sorted(group, key=lambda route: (int(route.gateway),
+                                                                               route.interface_name)))
+                self.assertIn(trie.lookup(int(network)), group)
+
+    def test_prefix_queries(self):
+        rnd = random.Random(23)
+        routes = [Route(Network(IPv4Address(rnd.randrange(1 << 32) & 0xF0F0F000 | 0x0A000000), rnd.randrange(4, 29)),
+                      None, 'en{}'.format(rnd.randrange(3)), rnd.randrange(3)) for _ in range(400)]
+        trie = PrefixTrie(routes)
+        for route in routes[:100]:
+            trie.remove(route)
+        routes = routes[100:]
+        for network in [route.network for route in routes[:50]] + [Network(IPv4Address('10.0.0.0'), 8),
+                                                                    Network(IPv4Address('0.0.0.0'), 0)]:
+            address, mask_length = int(network.address), network.mask_length
+            covering = [route for route in routes if route.network.mask_length < mask_length
+                        and network.address in route.network]
+            more_specifics = [route for route in routes if route.network.mask_length > mask_length
+                              and route.network.address in network]
+            exact = [route for route in routes if route.network == network]
+            self.assertEqual(sorted(trie.covering(address, mask_length), key=id), sorted(covering, key=id))
+            self.assertEqual(sorted(trie.more_specifics(address, mask_length), key=id),
+                             sorted(more_specifics, key=id))
+            self.assertEqual(sorted(trie.exact(address, mask_length), key=id), sorted(exact, key=id))
+            self.assertEqual([route.network.mask_length for route in trie.covering(address, mask_length)],
+                             sorted(route.network.mask_length for route in covering))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import random
+import threading
+import unittest
+from main import IPv4Address, IPv6Address, Network, Route, Router
+from fixtures import example_routes
+from RouteAnalysis import analyze_routes, prune_routes
+from RouteLoader import load_routes
+
+
+def next_hops(router, address):
+    return [(int(route.gateway), route.interface_name) for route in router.next_hops(address)]
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.routes = set(example_routes())
+
+    def test_analyze_routes(self):
+        routes = self.routes | set([Route(Network(IPv4Address('10.1.0.0'), 16), '10.123.0.1', 'en1', 5),
+                                    Route(Network(IPv4Address('10.1.2.0'), 24), '10.123.0.1', 'en1', 7),
+                                    Route(Network(IPv4Address('172.16.0.0'), 23), None, 'en5', 1),
+                                    Route(Network(IPv4Address('172.16.0.0'), 24), None, 'en6', 1),
+                                    Route(Network(IPv4Address('172.16.1.0'), 24), None, 'en7', 1),
+                                    Route(Network(IPv6Address('::'), 0), '2001:db8::1', 'en0', 1),
+                                    Route(Network(IPv6Address('2001:db8::'), 32), '2001:db8::1', 'en0', 1),
+                                    Route(Network(IPv6Address('2001:db8::'), 32), '2001:db8::2', 'en0', 2)])
+        analysis = analyze_routes(routes)
+        self.assertEqual(repr(analysis), 'routes: 15, duplicates: 3, unreachable: 1, redundant: 3')
+        self.assertEqual(sorted(route.interface_name for route in analysis.duplicates), ['en0', 'en3', 'en4'])
+        self.assertEqual([str(route.network) for route in analysis.unreachable], ['172.16.0.0/23'])
+        self.assertEqual([str(route.network) for route in analysis.redundant],
+                         ['10.1.0.0/16', '10.1.2.0/24', '2001:db8::/32'])
+        # the equal-cost routes of a prefix have to match the covering ones all together
+        routes.add(Route(Network(IPv4Address('10.1.0.0'), 16), '10.123.0.2', 'en1', 5))
+        self.assertEqual([str(route.network) for route in analyze_routes(routes).redundant], ['2001:db8::/32'])
+
+    def test_prune_keeps_forwarding(self):
+        rnd = random.Random(24)
+        routes = set()
+        for _ in range(2000):
+            network = Network(IPv4Address(rnd.randrange(1 << 32) & 0x0F0F0F00 | 0x0A000000), rnd.randrange(4, 25))
+            routes.add(Route(network, rnd.choice((None, '10.0.0.1')), rnd.choice(('en0', 'en1')), rnd.randrange(3)))
+        router = Router(set(routes))
+        analysis = prune_routes(router)
+        self.assertEqual(len(router.routes), len(routes) - len(analysis.removable))
+        self.assertGreater(len(analysis.redundant), 0)
+        self.assertGreater(len(analysis.duplicates), 0)
+        original = Router(routes)
+        addresses = [int(route.network.address) | rnd.randrange(256) for route in routes]
+        addresses.extend(rnd.randrange(1 << 32) for _ in range(1000))
+        for address in addresses:
+            address = IPv4Address(address)
+            self.assertEqual(next_hops(router, address), next_hops(original, address))
+        self.assertEqual(repr(analyze_routes(router.routes)).split(', ')[1:],
+                         ['duplicates: 0', 'unreachable: 0', 'redundant: 0'])
+
+    def test_analyze_during_updates(self):
+        rnd = random.Random(25)
+        routes = [Route(Network(IPv4Address(0x0A000000 | rnd.randrange(1 << 16) << 8), 24), None, 'en0', 1)
+                  for _ in range(3000)]
+        router = Router(set(routes[:2000]))
+        stop = threading.Event()
+
+        def writer():
+            while not stop.is_set():
+                route = rnd.choice(routes)
+                if route in router.routes:
+                    router.remove_route(route)
+                else:
+                    router.add_route(route)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            for _ in range(20):
+                # neither iterating the routes nor the diff may see the set change size
+                self.assertLessEqual(analyze_routes(router.routes).routes, len(routes))
+                router.diff(routes[:1000])
+                prune_routes(router)
+        finally:
+            stop.set()
+            thread.join()
+
+    def test_load_routes_prune(self):
+        lines = ['10.0.0.0/8,10.123.0.1,en1,10', '10.1.0.0/16,10.123.0.1,en1,20', '10.1.0.0/16,,en2,30']
+        router = Router(set())
+        report = load_routes(router, lines, prune=True)
+        self.assertEqual(report.loaded, 3)
+        self.assertEqual(repr(report.analysis), 'routes: 3, duplicates: 1, unreachable: 0, redundant: 1')
+        self.assertEqual([str(route.network) for route in router.routes], ['10.0.0.0/8'])
+        self.assertIsNone(load_routes(Router(set()), lines).analysis)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from main import IPv4Address, Network, Route, Router
+from RouteCache import RouteCache
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.routes = set([Route(Network(IPv4Address('0.0.0.0'), 0), '192.168.0.1', 'en0', 10),
+                           Route(Network(IPv4Address('10.0.0.0'), 8), '10.123.0.1', 'en1', 10),
+                           Route(Network(IPv4Address('10.123.1.0'), 24), None, 'en2', 101)])
+
+    def test_hits_misses_evictions(self):
+        cache = RouteCache(capacity=2)
+        resolved = []
+
+        def resolve(address):
+            resolved.append(address)
+            return address * 2
+
+        self.assertEqual(cache.lookup(1, resolve), 2)
+        self.assertEqual(cache.lookup(1, resolve), 2)
+        cache.lookup(2, resolve)
+        cache.lookup(1, resolve)
+        cache.lookup(3, resolve)
+        self.assertEqual(resolved, [1, 2, 3])
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (2, 3, 1))
+        cache.lookup(2, resolve)
+        self.assertEqual(resolved, [1, 2, 3, 2])
+        self.assertEqual(len(cache), 2)
+
+    def test_generation_keeps_unrelated_entries(self):
+        cache = RouteCache()
+        cache.lookup(int(IPv4Address('10.1.1.1')), lambda address: 'a')
+        cache.lookup(int(IPv4Address('192.168.1.1')), lambda address: 'b')
+        cache.invalidate(int(IPv4Address('10.0.0.0')), 8)
+        self.assertEqual(cache.generation, 1)
+        self.assertEqual(cache.lookup(int(IPv4Address('192.168.1.1')), lambda address: 'stale'), 'b')
+        self.assertEqual(cache.lookup(int(IPv4Address('10.1.1.1')), lambda address: 'c'), 'c')
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+    def test_entries_older_than_history_are_dropped(self):
+        cache = RouteCache(history=2)
+        cache.lookup(1, lambda address: 'a')
+        for _ in range(3):
+            cache.invalidate(int(IPv4Address('10.0.0.0')), 8)
+        self.assertEqual(cache.lookup(1, lambda address: 'b'), 'b')
+
+    def test_router_cache(self):
+        router = Router(self.routes)
+        cache = router.enable_cache(16)
+        address = IPv4Address('10.123.1.1')
+        other = IPv4Address('8.8.8.8')
+        self.assertEqual(router.route_for_address(address).interface_name, 'en2')
+        self.assertEqual(router.route_for_address(other).interface_name, 'en0')
+        router.add_route(Route(Network(IPv4Address('10.123.1.0'), 25), None, 'en3', 1))
+        self.assertEqual(router.route_for_address(address).interface_name, 'en3')
+        self.assertEqual(router.route_for_address(other).interface_name, 'en0')
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        router.remove_route(Route(Network(IPv4Address('10.123.1.0'), 25), None, 'en3', 1))
+        self.assertEqual(router.route_for_address(address).interface_name, 'en2')
+        self.routes.add(Route(Network(IPv4Address('8.8.8.0'), 24), None, 'en4', 1))
+        self.assertEqual(router.route_for_address(other).interface_name, 'en4')
+
+    def test_compiled_router_cache(self):
+        router = Router(self.routes)
+        router.compile()
+        router.enable_cache()
+        address = IPv4Address('10.123.1.1')
+        self.assertEqual(router.route_for_address(address).interface_name, 'en2')
+        router.add_route(Route(Network(IPv4Address('10.123.1.0'), 25), None, 'en3', 1))
+        self.assertEqual(router.route_for_address(address).interface_name, 'en3')
+        router.disable_cache()
+        self.assertIsNone(router.cache)
+        self.assertEqual(router.route_for_address(address).interface_name, 'en3')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import random
+import unittest
+from main import IPv4Address, IPv6Address, Network, Route, RouteDiff, Router
+from fixtures import example_routes
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.routes = set(example_routes())
+
+    def test_diff(self):
+        router = Router(set(self.routes))
+        new_routes = set(self.routes)
+        new_routes.remove(Route(Network(IPv4Address('10.123.1.0'), 24), None, 'en4', 103))
+        new_routes.remove(Route(Network(IPv4Address('10.0.0.0'), 8), '10.123.0.1', 'en1', 10))
+        new_routes.add(Route(Network(IPv4Address('10.0.0.0'), 8), '10.123.0.2', 'en1', 10))
+        new_routes.remove(Route(Network(IPv4Address('10.123.1.0'), 24), None, 'en2', 101))
+        new_routes.add(Route(Network(IPv4Address('10.123.1.0'), 24), None, 'en2', 1))
+        new_routes.add(Route(Network(IPv6Address('2001:db8::'), 32), None, 'en5', 1))
+        diff = router.diff(list(new_routes) + [Route(Network(IPv6Address('2001:db8::'), 32), None, 'en5', 1)])
+        self.assertEqual(repr(diff), 'added: 1, removed: 1, changed: 2')
+        self.assertEqual([str(route) for route in diff.added], ['net: 2001:db8::/32, interface: en5, metric: 1'])
+        self.assertEqual([str(route) for route in diff.removed], ['net: 10.123.1.0/24, interface: en4, metric: 103'])
+        self.assertEqual([(str(old.gateway), str(new.gateway)) for old, new in diff.changed],
+                         [('10.123.0.1', '10.123.0.2'), ('0.0.0.0', '0.0.0.0')])
+        self.assertEqual([(old.metric, new.metric) for old, new in diff.changed], [(10, 10), (101, 1)])
+        self.assertEqual(len(router.diff(self.routes)), 0)
+        router.apply(diff)
+        self.assertEqual(router.routes, new_routes)
+        self.assertEqual(router.route_for_address(IPv4Address('10.123.1.1')).metric, 1)
+        self.assertRaises(KeyError, router.apply, diff)
+
+    def test_refresh_matches_rebuild(self):
+        rnd = random.Random(21)
+
+        def random_route():
+            network = Network(IPv4Address(rnd.randrange(1 << 32) & 0x0F0FFF00 | 0x0A000000),
+                              rnd.choice((8, 16, 24, 28)))
+            return Route(network, rnd.choice((None, '10.0.0.1', '10.0.0.2')), 'en{}'.format(rnd.randrange(2)),
+                         rnd.randrange(3))
+
+        old_routes = set(random_route() for _ in range(300))
+        router = Router(set(old_routes))
+        router.compile()
+        router.enable_cache()
+        addresses = [IPv4Address(int(route.network.address) | 1) for route in old_routes]
+        for address in addresses:
+            router.route_for_address(address)
+        for _ in range(5):
+            new_routes = set(rnd.sample(sorted(router.routes, key=RouteDiff._key), 250))
+            new_routes.update(random_route() for _ in range(50))
+            version = router.version
+            diff = router.refresh(new_routes)
+            self.assertEqual(router.routes, new_routes)
+            self.assertEqual(old_routes - set(diff.removals) | set(diff.additions), new_routes)
+            rebuilt = Router(set(new_routes))
+            for address in addresses:
+                # equal-cost routes of a prefix may win in either order
+                route, expected = router.route_for_address(address), rebuilt.route_for_address(address)
+                self.assertEqual(route and (str(route.network), route.metric),
+                                 expected and (str(expected.network), expected.metric))
+            self.assertEqual(router.version.generation, version.generation + 1)
+            self.assertIsNotNone(router.version._compiled_table)
+            old_routes = new_routes
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from main import IPv4Address, Network, Route, Router
+from RouteLoader import iter_routes, load_routes, parse_ip_route_line, LoadReport
+
+
+class MyTestCase(unittest.TestCase):
+    def test_load_csv_file(self):
+        lines = ['network,gateway,interface,metric',
+                 '0.0.0.0/0,192.168.0.1,en0,10',
+                 '192.168.0.0/24,,en0,10',
+                 '# comment',
+                 '',
+                 '10.123.1.0/24, , en2, 101',
+                 '10.123.1.0/33,,en2,101',
+                 '10.123.1.0/24,,en2',
+                 '10.123.256.0/24,,en2,1',
+                 '10.123.2.0/24,,en2,-1']
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as dump:
+            dump.write('\n'.join(lines))
+        try:
+            router = Router(set())
+            report = load_routes(router, dump.name)
+        finally:
+            os.remove(dump.name)
+        self.assertEqual(report.lines, 10)
+        self.assertEqual(report.loaded, 3)
+        self.assertEqual([number for number, _, _ in report.errors], [7, 8, 9, 10])
+        self.assertEqual(report.errors[1][2], 'expected 4 fields, got 3')
+        self.assertGreater(report.lines_per_second, 0)
+        self.assertEqual(str(router.route_for_address(IPv4Address('10.123.1.1'))),
+                         'net: 10.123.1.0/24, interface: en2, metric: 101')
+        self.assertEqual(str(router.route_for_address(IPv4Address('8.8.8.8'))),
+                         'net: 0.0.0.0/0, gateway: 192.168.0.1, interface: en0, metric: 10')
+
+    def test_ip_route_format(self):
+        self.assertEqual(str(parse_ip_route_line('default via 192.168.0.1 dev en0 proto dhcp metric 100')),
+                         'net: 0.0.0.0/0, gateway: 192.168.0.1, interface: en0, metric: 100')
+        self.assertEqual(str(parse_ip_route_line('192.168.0.0/24 dev en0 proto kernel scope link src 192.168.0.5')),
+                         'net: 192.168.0.0/24, interface: en0, metric: 0')
+        self.assertEqual(str(parse_ip_route_line('10.1.1.1 via 10.0.0.1 dev en1 onlink')),
+                         'net: 10.1.1.1/32, gateway: 10.0.0.1, interface: en1, metric: 0')
+        report = LoadReport()
+        routes = list(iter_routes(['10.0.0.0/8 via 10.0.0.1', '10.0.0.0/8 dev en1 metric x'], 'ip', report))
+        self.assertEqual(routes, [])
+        self.assertEqual([message for _, _, message in report.errors], ['missing dev', 'invalid metric'])
+
+    def test_ipv6_routes(self):
+        self.assertEqual(str(parse_ip_route_line('2001:db8:1::/64 dev eth0 proto kernel metric 256 pref medium')),
+                         'net: 2001:db8:1::/64, interface: eth0, metric: 256')
+        self.assertEqual(str(parse_ip_route_line('default via fe80::1 dev eth0 proto ra metric 1024 pref medium')),
+                         'net: ::/0, gateway: fe80::1, interface: eth0, metric: 1024')
+        self.assertEqual(str(parse_ip_route_line('default via 10.0.0.1 dev eth0')),
+                         'net: 0.0.0.0/0, gateway: 10.0.0.1, interface: eth0, metric: 0')
+        report = LoadReport()
+        routes = list(iter_routes(['2001:db8::/48,2001:db8::1,en0,5', '2001:db8::1,,en1,0', '2001:db8::/129,,en1,0'],
+                                  report=report))
+        self.assertEqual([str(route) for route in routes],
+                         ['net: 2001:db8::/48, gateway: 2001:db8::1, interface: en0, metric: 5',
+                          'net: 2001:db8::1/128, interface: en1, metric: 0'])
+        self.assertEqual(len(report.errors), 1)
+
+    def test_bulk_insert_into_indexed_router(self):
+        router = Router(set([Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en1', 10)]))
+        router.compile()
+        report = load_routes(router, iter(['10.1.0.0/16,,en2,5', '10.0.0.0/8,,en1,10']))
+        self.assertEqual(report.loaded, 2)
+        self.assertEqual(len(router.routes), 2)
+        self.assertEqual(router.route_for_address(IPv4Address('10.1.1.1')).interface_name, 'en2')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from main import IPv4Address, Network, Route, Router
+from RouteServer import RouteClient, RouteServer
+from RouteTable import RouteTable, SnapshotRouter
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.router = Router(set([Route(Network(IPv4Address('0.0.0.0'), 0), '192.168.0.1', 'en0', 10),
+                                  Route(Network(IPv4Address('10.0.0.0'), 8), '10.123.0.1', 'en1', 10),
+                                  Route(Network(IPv4Address('10.123.1.0'), 24), None, 'en2', 101)]))
+
+    def test_tcp_lookups(self):
+        async def scenario():
+            server = RouteServer(self.router)
+            await server.start('127.0.0.1', 0)
+            host, port = server.sockets[0][:2]
+            clients = [await RouteClient.connect(host, port) for _ in range(3)]
+            addresses = [int(IPv4Address(address)) for address in ('10.123.1.1', '10.1.1.1', '8.8.8.8')] * 50
+            results = await asyncio.gather(*(client.lookup_many(addresses) for client in clients))
+            single = await clients[0].lookup(int(IPv4Address('10.123.1.7')))
+            for client in clients:
+                await client.close()
+            stats = server.stats()
+            await server.close()
+            return results, single, stats
+
+        results, single, stats = asyncio.run(scenario())
+        for result in results:
+            self.assertEqual([lookup.interface_name for lookup in result[:3]], ['en2', 'en1', 'en0'])
+            self.assertEqual(len(result), 150)
+        self.assertEqual(str(results[0][1]), 'net: 10.0.0.0/8, gateway: 10.123.0.1, interface: en1, metric: 10')
+        self.assertEqual(str(single), 'net: 10.123.1.0/24, interface: en2, metric: 101')
+        self.assertEqual(stats['requests'], 451)
+        self.assertLess(stats['batches'], 451)
+        self.assertEqual(sum(stats['latency_histogram_us'].values()), 451)
+
+    def test_unix_socket_and_no_route(self):
+        self.router.remove_route(Route(Network(IPv4Address('0.0.0.0'), 0), '192.168.0.1', 'en0', 10))
+
+        async def scenario(path):
+            server = RouteServer(self.router)
+            await server.start_unix(path)
+            client = await RouteClient.connect_unix(path)
+            result = await client.lookup_many([int(IPv4Address('8.8.8.8')), int(IPv4Address('10.0.0.1'))])
+            await client.close()
+            await server.close()
+            return result
+
+        with tempfile.TemporaryDirectory() as directory:
+            missing, found = asyncio.run(scenario(os.path.join(directory, 'router.sock')))
+        self.assertIsNone(missing)
+        self.assertEqual(found.interface_name, 'en1')
+
+    def test_snapshot_router(self):
+        async def scenario(path):
+            router = SnapshotRouter.open(path)
+            server = RouteServer(router)
+            await server.start('127.0.0.1', 0)
+            client = await RouteClient.connect(*server.sockets[0][:2])
+            result = await client.lookup_many([int(IPv4Address('10.123.1.1')), int(IPv4Address('8.8.8.8'))])
+            await client.close()
+            await server.close()
+            router.close()
+            return result
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'routes.snapshot')
+            RouteTable.from_routes(self.router.routes).save(path)
+            result = asyncio.run(scenario(path))
+        self.assertEqual([lookup.interface_name for lookup in result], ['en2', 'en0'])
+
+    def test_failed_lookups(self):
+        self.router.add_route(Route(Network(IPv4Address('172.16.0.0'), 12), None, 'en3', 1 << 32))
+
+        async def scenario():
+            server = RouteServer(self.router)
+            await server.start('127.0.0.1', 0)
+            client = await RouteClient.connect(*server.sockets[0][:2])
+            results = []
+            # the metric does not fit the response frame
+            with self.assertRaises(LookupError):
+                await client.lookup(int(IPv4Address('172.16.0.1')))
+            results.append(await client.lookup(int(IPv4Address('10.0.0.1'))))
+            encode = server._encode
+            server._encode = lambda routes, index: 1 / 0
+            with self.assertRaises(LookupError):
+                await client.lookup(int(IPv4Address('10.0.0.1')))
+            server._encode = encode
+            results.append(await client.lookup(int(IPv4Address('10.0.0.1'))))
+            # once the connection is gone, waiting and later lookups fail instead of hanging
+            waiting = asyncio.ensure_future(client.lookup(int(IPv4Address('10.0.0.1'))))
+            client._writer.transport.abort()
+            await asyncio.wait_for(client._receiver, 5)
+            for lookup in (waiting, client.lookup(int(IPv4Address('10.0.0.1')))):
+                with self.assertRaises(ConnectionError):
+                    await asyncio.wait_for(lookup, 5)
+            await client.close()
+            stats = server.stats()
+            await server.close()
+            return results, stats
+
+        results, stats = asyncio.run(scenario())
+        self.assertEqual([result.interface_name for result in results], ['en1', 'en1'])
+        self.assertGreaterEqual(stats['requests'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
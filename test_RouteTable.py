@@ -0,0 +1,148 @@
+import os
+import random
+import tempfile
+import unittest
+from array import array
+from main import IPv4Address, IPv6Address, Network, Route, Router
+from fixtures import example_routes
+import RouteTable as route_table_module
+import VectorTable as vector_table_module
+from RouteTable import RouteTable, SnapshotRouter
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.routes = example_routes()
+
+    def test_materialize(self):
+        table = RouteTable.from_routes(self.routes)
+        self.assertEqual(len(table), 7)
+        self.assertEqual(list(table.routes()), self.routes)
+        self.assertEqual(str(table.route(0)), 'net: 0.0.0.0/0, gateway: 192.168.0.1, interface: en0, metric: 10')
+        self.assertEqual(table.interface_name(1), 'en1')
+
+    def test_route_for_address(self):
+        table = RouteTable.from_routes(self.routes)
+        self.assertEqual(str(table.route_for_address(IPv4Address('10.123.1.1'))),
+                         'net: 10.123.1.0/24, interface: en2, metric: 101')
+        self.assertEqual(table.lookup(int(IPv4Address('10.123.2.1'))), 3)
+        self.assertIsNone(RouteTable.from_routes(self.routes[1:]).route_for_address(IPv4Address('8.8.8.8')))
+        table.append(int(IPv4Address('10.123.1.0')), 24, 0, 'en5', 1)
+        self.assertEqual(table.route_for_address(IPv4Address('10.123.1.1')).interface_name, 'en5')
+
+    def test_lookup_many(self):
+        table = RouteTable.from_routes(self.routes)
+        addresses = [int(IPv4Address(address)) for address in ('10.123.1.1', '10.123.2.1', '8.8.8.8')]
+        self.assertEqual(list(table.lookup_many(addresses)), [5, 3, 0])
+        self.assertEqual(list(RouteTable.from_routes(self.routes[1:]).lookup_many(addresses)), [4, 2, -1])
+        self.assertEqual(list(table.lookup_many(array('l', addresses))), [5, 3, 0])
+        numpy = route_table_module.numpy
+        route_table_module.numpy = vector_table_module.numpy = None
+        try:
+            self.assertEqual(list(table.lookup_many(addresses)), [5, 3, 0])
+            self.assertEqual(list(table.lookup_many(array('l', addresses))), [5, 3, 0])
+        finally:
+            route_table_module.numpy = vector_table_module.numpy = numpy
+
+    def test_snapshot(self):
+        table = RouteTable.from_routes(self.routes)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'routes.snapshot')
+            table.save(path)
+            snapshot = RouteTable.open(path)
+            self.assertEqual(len(snapshot), 7)
+            self.assertEqual(list(snapshot.routes()), self.routes)
+            self.assertEqual(str(snapshot.route_for_address(IPv4Address('10.123.1.1'))),
+                             'net: 10.123.1.0/24, interface: en2, metric: 101')
+            self.assertEqual(list(snapshot.lookup_many([int(IPv4Address('10.123.2.1')), 1])), [3, 0])
+            self.assertEqual(snapshot.nbytes, table.nbytes)
+            self.assertRaises(ValueError, snapshot.append, 0, 8, 0, 'en0', 1)
+            snapshot.save(os.path.join(directory, 'copy.snapshot'))
+            with open(os.path.join(directory, 'copy.snapshot'), 'rb') as copy, open(path, 'rb') as original:
+                self.assertEqual(copy.read(), original.read())
+            router = snapshot.router()
+            snapshot.close()
+            # the router keeps its routes after the mapping is gone
+            self.assertEqual(router.routes, set(self.routes))
+            self.assertEqual(router.route_for_address(IPv4Address('10.123.1.1')).interface_name, 'en2')
+            router.remove_route(self.routes[5])
+            self.assertEqual(router.route_for_address(IPv4Address('10.123.1.1')).interface_name, 'en3')
+
+    def test_corrupted_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'routes.snapshot')
+            RouteTable.from_routes(self.routes).save(path)
+            with open(path, 'r+b') as snapshot:
+                snapshot.seek(40)
+                byte = snapshot.read(1)
+                snapshot.seek(40)
+                snapshot.write(bytes([byte[0] ^ 0xFF]))
+            self.assertRaises(ValueError, RouteTable.open, path)
+            with open(path, 'r+b') as snapshot:
+                snapshot.write(b'XXXX')
+            self.assertRaises(ValueError, RouteTable.open, path, False)
+
+    def test_empty_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'routes.snapshot')
+            RouteTable().save(path)
+            snapshot = RouteTable.open(path)
+            self.assertEqual(len(snapshot), 0)
+            self.assertEqual(snapshot.lookup(1), -1)
+            snapshot.close()
+
+    def test_invalid(self):
+        table = RouteTable()
+        self.assertRaises(ValueError, table.append, 0, 33, 0, 'en0', 1)
+        self.assertRaises(ValueError, table.append, 0, 8, 0, 'en0', -1)
+        self.assertRaises(ValueError, table.append, 1 << 32, 8, 0, 'en0', 1)
+        self.assertRaises(ValueError, table.append, 0, 8, 1 << 32, 'en0', 1)
+        self.assertRaises(ValueError, table.append, -1, 8, 0, 'en0', 1)
+        self.assertRaises(ValueError, table.append, 0, 8, 0, 'en\n1', 1)
+        self.assertRaises(ValueError, RouteTable.from_routes,
+                          [Route(Network(IPv6Address('2001:db8::'), 32), None, 'en0', 1)])
+        self.assertEqual(len(table), 0)
+
+    def test_matches_router(self):
+        rnd = random.Random(13)
+        routes = set()
+        for _ in range(500):
+            network = Network(IPv4Address(rnd.randrange(1 << 32)), rnd.choice((0, 8, 16, 20, 24, 28, 32)))
+            routes.add(Route(network, '10.0.0.{}'.format(rnd.randrange(1, 4)), 'en{}'.format(rnd.randrange(4)),
+                             rnd.randrange(3)))
+        router = Router(routes)
+        table = RouteTable.from_routes(routes)
+        addresses = [IPv4Address(rnd.randrange(1 << 32)) for _ in range(300)]
+        addresses.extend(route.network.address for route in routes)
+        for address in addresses:
+            expected = router.route_for_address(address)
+            actual = table.route_for_address(address)
+            self.assertEqual((actual.network, actual.metric), (expected.network, expected.metric))
+        self.assertLess(table.nbytes, 25 * len(table))
+
+    def test_snapshot_router(self):
+        table = RouteTable.from_routes(self.routes)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'routes.snapshot')
+            table.save(path)
+            router = SnapshotRouter.open(path)
+            self.assertIsNotNone(router.version.table._mmap)
+            self.assertEqual(str(router.route_for_address(IPv4Address('10.123.1.1'))),
+                             'net: 10.123.1.0/24, interface: en2, metric: 101')
+            self.assertIsNone(router.route_for_address(IPv6Address('2001:db8::1')))
+            self.assertRaises(ValueError, router.route_for_address, '10.123.1.1')
+            addresses = [int(IPv4Address(address)) for address in ('10.123.2.1', '8.8.8.8', '10.1.1.1')]
+            indices = router.route_for_addresses(addresses)
+            self.assertEqual([router.indexed_routes[index].interface_name for index in indices], ['en1', 'en0', 'en1'])
+            self.assertEqual(len(router.version), 7)
+            self.assertEqual(list(router.version.routes()), self.routes)
+            self.assertEqual(router.indexed_routes[-1], self.routes[-1])
+            self.assertEqual(router.router().routes, set(self.routes))
+            router.close()
+        self.assertIsNone(SnapshotRouter(RouteTable.from_routes(self.routes[1:])).version.lookup(
+            int(IPv4Address('8.8.8.8'))))
+        self.assertEqual(SnapshotRouter(table).version.lookup(int(IPv4Address('10.123.1.1'))).interface_name, 'en2')
+
+
+if __name__ == '__main__':
+    unittest.main()
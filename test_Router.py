@@ -1,6 +1,6 @@
 from IPv4Address import IPv4Address, IllegalArgumentException
 from Network import Network
-from Router import Route, Router
+from Router import Route, Router, RouteNotFoundException
 
 import unittest
 
@@ -48,6 +48,41 @@ class MyTestCase(unittest.TestCase):
         self.assertEqual(str(router.route_for_address(IPv4Address('10.123.1.1'))),
                          'net: 10.123.1.0/24, interface: en2, metric: 101')
 
+    def test_route_not_found(self):
+        router = Router([Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en0', 10)])
+        self.assertRaises(RouteNotFoundException, router.route_for_address, IPv4Address('11.0.0.1'))
+        router.add_route(Route(Network(IPv4Address('0.0.0.0'), 0), '192.168.0.1', 'en1', 10))
+        self.assertEqual(router.route_for_address(IPv4Address('11.0.0.1')).interface_name, 'en1')
+
+    def test_same_size_swap(self):
+        router = Router([Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en0', 10)])
+        self.assertEqual(router.route_for_address(IPv4Address('10.0.0.1')).interface_name, 'en0')
+        router.routes[0] = Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en1', 10)
+        self.assertEqual(router.route_for_address(IPv4Address('10.0.0.1')).interface_name, 'en1')
+        router.routes.remove(Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en1', 10))
+        router.routes.append(Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en2', 10))
+        self.assertEqual(router.route_for_address(IPv4Address('10.0.0.1')).interface_name, 'en2')
+        router.remove_route(Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en2', 10))
+        self.assertRaises(RouteNotFoundException, router.route_for_address, IPv4Address('10.0.0.1'))
+
+    def test_routes_list_operations(self):
+        first = Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en0', 10)
+        second = Route(Network(IPv4Address('10.0.0.0'), 16), None, 'en1', 10)
+        router = Router([first])
+        self.assertEqual(router.routes + [second], [first, second])
+        self.assertEqual([second] + router.routes, [second, first])
+        self.assertEqual(router.routes * 2, [first, first])
+        routes = router.routes.copy()
+        routes.append(second)
+        self.assertEqual(router.routes, [first])
+        self.assertEqual(router.route_for_address(IPv4Address('10.0.0.1')), first)
+        router.routes.extend([second])
+        self.assertEqual(router.route_for_address(IPv4Address('10.0.0.1')), second)
+        router.routes.sort(key=lambda route: route.interface_name, reverse=True)
+        self.assertEqual(router.routes, [second, first])
+        router.routes.clear()
+        self.assertRaises(RouteNotFoundException, router.route_for_address, IPv4Address('10.0.0.1'))
+
 
 
 
@@ -0,0 +1,49 @@
+import unittest
+from array import array
+from IPv4Address import IPv4Address
+import SpecialPurpose
+import VectorTable
+from SpecialPurpose import classify, classify6, classify_many, is_public, is_public6, PUBLIC, PRIVATE, RESERVED
+
+
+class MyTestCase(unittest.TestCase):
+    def test_classify(self):
+        cases = [('8.8.8.8', PUBLIC), ('10.20.30.40', PRIVATE), ('172.31.255.255', PRIVATE), ('172.32.0.0', PUBLIC),
+                 ('192.168.1.1', PRIVATE), ('100.64.0.1', PRIVATE), ('100.128.0.1', PUBLIC),
+                 ('127.0.0.1', RESERVED), ('169.254.1.1', RESERVED), ('0.0.0.0', RESERVED),
+                 ('192.0.0.8', RESERVED), ('192.0.0.9', PUBLIC), ('192.0.0.10', PUBLIC), ('192.0.0.11', RESERVED),
+                 ('198.19.255.255', RESERVED), ('203.0.113.7', RESERVED), ('223.255.255.255', PUBLIC),
+                 ('224.0.0.1', RESERVED), ('255.255.255.255', RESERVED)]
+        for address, category in cases:
+            self.assertEqual(classify(IPv4Address(address)), category, address)
+            self.assertEqual(is_public(IPv4Address(address)), category == PUBLIC, address)
+
+    def test_classify6(self):
+        cases = [(0x2A001450 << 96, PUBLIC), (0x20010DB8 << 96 | 1, RESERVED), (1, RESERVED), (0, RESERVED),
+                 (0xFD00 << 112, PRIVATE), (0xFE80 << 112 | 1, RESERVED), (0xFF02 << 112 | 1, RESERVED),
+                 (0xFFFF0A000001, RESERVED), (0x0064FF9B << 96 | 0x08080808, PUBLIC),
+                 (0x20010001 << 96 | 1, PUBLIC), (0x20010001 << 96 | 4, RESERVED), (0x20010003 << 96, PUBLIC),
+                 (0x2002 << 112, PUBLIC), ((1 << 128) - 1, RESERVED)]
+        for address, category in cases:
+            self.assertEqual(classify6(address), category, hex(address))
+            self.assertEqual(is_public6(address), category == PUBLIC)
+
+    def test_classify_many(self):
+        addresses = [int(IPv4Address(address)) for address in ('8.8.8.8', '10.0.0.1', '224.0.0.1', '0.0.0.0')]
+        expected = [PUBLIC, PRIVATE, RESERVED, RESERVED]
+        self.assertEqual(list(classify_many(addresses)), expected)
+        self.assertEqual(list(classify_many(array('I', addresses))), expected)
+        self.assertEqual(list(classify_many(array('I', addresses).tobytes())), expected)
+        self.assertEqual(list(classify_many(array('q', addresses))), expected)
+
+    def test_classify_many_without_numpy(self):
+        numpy = SpecialPurpose.numpy
+        SpecialPurpose.numpy = VectorTable.numpy = None
+        try:
+            self.test_classify_many()
+        finally:
+            SpecialPurpose.numpy = VectorTable.numpy = numpy
+
+
+if __name__ == '__main__':
+    unittest.main()
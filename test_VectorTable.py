@@ -0,0 +1,80 @@
+import random
+import unittest
+from array import array
+from main import IPv4Address, Network, Route, Router
+from fixtures import example_routes
+from PrefixTrie import PrefixTrie
+import VectorTable as vector_table_module
+from VectorTable import VectorTable
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.routes = set(example_routes())
+
+    def test_lookup_many(self):
+        router = Router(self.routes)
+        addresses = ['10.123.1.1', '10.123.2.1', '10.1.1.1', '8.8.8.8', '192.168.0.77']
+        indices = router.route_for_addresses(array('I', [int(IPv4Address(ip)) for ip in addresses]))
+        self.assertEqual([str(router.indexed_routes[index]) for index in indices],
+                         ['net: 10.123.1.0/24, interface: en2, metric: 101',
+                          'net: 10.123.0.0/20, interface: en1, metric: 100',
+                          'net: 10.0.0.0/8, gateway: 10.123.0.1, interface: en1, metric: 10',
+                          'net: 0.0.0.0/0, gateway: 192.168.0.1, interface: en0, metric: 10',
+                          'net: 192.168.0.0/24, interface: en0, metric: 10'])
+
+    def test_no_route(self):
+        table = VectorTable(PrefixTrie([Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en1', 10)]))
+        self.assertEqual(list(table.lookup_many([int(IPv4Address('10.0.0.1')), int(IPv4Address('11.0.0.1'))])),
+                         [0, -1])
+        self.assertEqual(list(VectorTable(PrefixTrie()).lookup_many([1, 2])), [-1, -1])
+
+    def test_packed_buffer(self):
+        router = Router(self.routes)
+        packed = array('I', [int(IPv4Address('10.123.1.1')), int(IPv4Address('8.8.8.8'))]).tobytes()
+        indices = router.route_for_addresses(packed)
+        self.assertEqual([router.indexed_routes[index].interface_name for index in indices], ['en2', 'en0'])
+
+    def test_array_typecodes(self):
+        # arrays are taken by value whatever their item size
+        router = Router(self.routes)
+        addresses = [int(IPv4Address('10.123.1.1')), int(IPv4Address('8.8.8.8'))]
+        for typecode in ('I', 'L', 'l', 'q', 'Q'):
+            indices = router.route_for_addresses(array(typecode, addresses))
+            self.assertEqual([router.indexed_routes[index].interface_name for index in indices], ['en2', 'en0'])
+        indices = router.route_for_addresses(memoryview(array('q', addresses)))
+        self.assertEqual([router.indexed_routes[index].interface_name for index in indices], ['en2', 'en0'])
+        if vector_table_module.numpy is not None:
+            self.assertRaises(ValueError, router.route_for_addresses, array('q', [-1]))
+            self.assertRaises(ValueError, router.route_for_addresses, [1 << 32])
+
+    def test_matches_route_for_address(self):
+        rnd = random.Random(11)
+        routes = set()
+        for _ in range(300):
+            network = Network(IPv4Address(rnd.randrange(1 << 32)), rnd.choice((1, 8, 16, 19, 24, 27, 32)))
+            routes.add(Route(network, None, 'en{}'.format(rnd.randrange(4)), rnd.randrange(3)))
+        router = Router(routes)
+        addresses = [rnd.randrange(1 << 32) for _ in range(300)]
+        addresses.extend(int(route.network.address) for route in routes)
+        indices = router.route_for_addresses(addresses)
+        for address, index in zip(addresses, indices):
+            expected = router.route_for_address(IPv4Address(address))
+            if expected is None:
+                self.assertEqual(index, -1)
+            else:
+                self.assertIs(router.indexed_routes[index], expected)
+
+
+class WithoutNumpyTestCase(MyTestCase):
+    def setUp(self):
+        super(WithoutNumpyTestCase, self).setUp()
+        self._numpy = vector_table_module.numpy
+        vector_table_module.numpy = None
+
+    def tearDown(self):
+        vector_table_module.numpy = self._numpy
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from main import IPv4Address, Network, Route, Router
+from enrich import EnrichReport, enrich_lines, main, parse_address
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.router = Router(set([Route(Network(IPv4Address('10.0.0.0'), 8), '10.123.0.1', 'en1', 10),
+                                  Route(Network(IPv4Address('10.123.1.0'), 24), None, 'en2', 101),
+                                  Route(Network(IPv4Address('192.168.0.0'), 16), None, 'en0', 10)]))
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address('10.0.0.1'), 0x0A000001)
+        self.assertEqual(parse_address('10.0.0.1:443'), 0x0A000001)
+        self.assertIsNone(parse_address('10.0.0'))
+        self.assertIsNone(parse_address('-'))
+
+    def test_enrich_lines(self):
+        lines = ['10.123.1.7 - - "GET / HTTP/1.1" 200\n', '10.1.2.3 - - "GET /a HTTP/1.1" 404\n',
+                 '8.8.8.8 - - "GET / HTTP/1.1" 200\n', 'garbage\n', '\n']
+        report = EnrichReport()
+        output = list(enrich_lines(self.router, lines, chunk_size=2, report=report))
+        self.assertEqual(output, ['10.123.1.7 - - "GET / HTTP/1.1" 200 en2 - 10.123.1.0/24',
+                                  '10.1.2.3 - - "GET /a HTTP/1.1" 404 en1 10.123.0.1 10.0.0.0/8',
+                                  '8.8.8.8 - - "GET / HTTP/1.1" 200 - - -',
+                                  'garbage - - -',
+                                  ' - - -'])
+        self.assertEqual((report.records, report.matched, report.invalid), (5, 2, 2))
+        self.assertIn('unmatched: 1', repr(report))
+
+    def test_column_and_delimiter(self):
+        lines = ['1697600000,192.168.3.4:51000,10.123.1.9:443,tcp', '1697600001,192.168.3.4:51000,8.8.4.4:53,udp']
+        self.assertEqual(list(enrich_lines(self.router, lines, column=2, delimiter=',')),
+                         ['1697600000,192.168.3.4:51000,10.123.1.9:443,tcp,en2,-,10.123.1.0/24',
+                          '1697600001,192.168.3.4:51000,8.8.4.4:53,udp,-,-,-'])
+        self.assertEqual(list(enrich_lines(self.router, lines, column=-1, delimiter=',')),
+                         [lines[0] + ',-,-,-', lines[1] + ',-,-,-'])
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            routes = os.path.join(directory, 'routes.csv')
+            log = os.path.join(directory, 'access.log')
+            with open(routes, 'w') as output:
+                output.write('network,gateway,interface,metric\n10.0.0.0/8,10.123.0.1,en1,10\n')
+            with open(log, 'w') as output:
+                output.write('10.9.9.9 GET /\n11.0.0.1 GET /\n')
+            stdout, stderr = io.StringIO(), io.StringIO()
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                self.assertEqual(main([routes, log]), 0)
+        self.assertEqual(stdout.getvalue(), '10.9.9.9 GET / en1 10.123.0.1 10.0.0.0/8\n11.0.0.1 GET / - - -\n')
+        self.assertIn('records: 2, matched: 1', stderr.getvalue())
+
+    def test_chunk_size(self):
+        for chunk_size in (0, -1):
+            self.assertRaises(ValueError, enrich_lines, self.router, ['10.0.0.1'], chunk_size=chunk_size)
+            stderr = io.StringIO()
+            with redirect_stderr(stderr), self.assertRaises(SystemExit) as context:
+                main(['routes.csv', '--chunk-size', str(chunk_size)])
+            self.assertEqual(context.exception.code, 2)
+            self.assertIn('--chunk-size: must be at least 1', stderr.getvalue())
+        self.assertEqual(list(enrich_lines(self.router, ['10.0.0.1', '8.8.8.8'], chunk_size=1)),
+                         ['10.0.0.1 en1 10.123.0.1 10.0.0.0/8', '8.8.8.8 - - -'])
+
+
+if __name__ == '__main__':
+    unittest.main()
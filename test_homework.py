@@ -1,7 +1,10 @@
+import random
+import threading
 import unittest
-from homework import IPv4Address, InvalidIpError, InvalidMaskError
-from homework import Network
-from homework import Route, Router
+from main import IPv4Address, IPv6Address, InvalidIpError, InvalidMaskError
+from main import Network
+from main import Route, Router
+from fixtures import example_routes
 
 
 class MyTestCase(unittest.TestCase):
@@ -64,6 +67,25 @@ class MyTestCase(unittest.TestCase):
         self.assertRaises(InvalidIpError, IPv4Address, '255.255.255.255.255')
         self.assertRaises(InvalidIpError, IPv4Address, '255.255.255..255')
 
+    def test_from_bytes(self):
+        self.assertEqual(str(IPv4Address.from_bytes(b'\x0a\x7b\x01\x02')), '10.123.1.2')
+        self.assertEqual(int(IPv4Address.from_bytes(bytearray(b'xx\xff\x00\x00\x01'), 2)), 0xFF000001)
+        self.assertRaises(InvalidIpError, IPv4Address.from_bytes, b'\x0a\x7b\x01\x02', 1)
+
+    def test_unpack_many(self):
+        # two option-less IPv4 headers, destinations at offset 16 of every 20 byte header
+        headers = bytearray(40)
+        headers[16:20] = b'\x0a\x7b\x01\x01'
+        headers[36:40] = b'\xc0\xa8\x00\x07'
+        self.assertEqual(list(IPv4Address.unpack_many(headers, 16, 20)), [0x0A7B0101, 0xC0A80007])
+        self.assertEqual(list(IPv4Address.unpack_many(memoryview(headers)[16:20])), [0x0A7B0101])
+        self.assertEqual(list(IPv4Address.unpack_many(headers, 16, 20, 1)), [0x0A7B0101])
+        self.assertEqual(list(IPv4Address.unpack_many(b'\x00\x00\x00\x01\x00\x00\x00\x02')), [1, 2])
+        self.assertEqual(len(IPv4Address.unpack_many(b'', 8)), 0)
+        self.assertRaises(InvalidIpError, IPv4Address.unpack_many, headers, 16, 20, 3)
+        router = Router(set([Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en1', 10)]))
+        self.assertEqual(list(router.route_for_addresses(IPv4Address.unpack_many(headers, 16, 20))), [0, -1])
+
 
     def test_eq(self):
         self.assertEqual(IPv4Address('127.12.45.22'), IPv4Address(2131504406))
@@ -87,6 +109,14 @@ class MyTestCase(unittest.TestCase):
         self.assertLessEqual(IPv4Address('127.12.44.22'), IPv4Address('127.12.45.22'))
         self.assertLessEqual(IPv4Address('127.12.44.22'), IPv4Address('127.12.44.22'))
 
+    def test_hash(self):
+        self.assertEqual(len({IPv4Address('127.12.45.22'), IPv4Address(2131504406)}), 1)
+
+    def test_interned(self):
+        self.assertIs(IPv4Address.interned('10.0.0.1'), IPv4Address.interned('10.0.0.1'))
+        self.assertEqual(repr(IPv4Address.interned(167772161)), '10.0.0.1')
+        self.assertRaises(InvalidIpError, IPv4Address.interned, '10.0.0.256')
+
     def test_add(self):
         ip_address = IPv4Address('0.0.0.1') + (2)
         self.assertEqual(ip_address, 3)
@@ -168,6 +198,73 @@ class MyTestCase(unittest.TestCase):
         net = Network(IPv4Address('192.168.255.128'), 32)
         self.assertEqual(str(net.subnets), str([]))
 
+    def test_iter_subnets(self):
+        net = Network(IPv4Address('10.0.0.0'), 8)
+        subnets = net.iter_subnets(24)
+        self.assertEqual(str(next(subnets)), '10.0.0.0/24')
+        self.assertEqual(str(next(subnets)), '10.0.1.0/24')
+        self.assertEqual(sum(1 for _ in net.iter_subnets(16)), 256)
+        self.assertEqual([str(subnet) for subnet in Network(IPv4Address('192.168.255.128'), 25).iter_subnets()],
+                         ['192.168.255.128/26', '192.168.255.192/26'])
+        self.assertEqual([str(subnet) for subnet in net.iter_subnets(8)], ['10.0.0.0/8'])
+        self.assertRaises(InvalidMaskError, net.iter_subnets, 7)
+        self.assertRaises(InvalidMaskError, net.iter_subnets, 33)
+
+    def test_subnet_at(self):
+        net = Network(IPv4Address('10.0.0.0'), 8)
+        self.assertEqual(str(net.subnet_at(0, 24)), '10.0.0.0/24')
+        self.assertEqual(str(net.subnet_at(258, 24)), '10.1.2.0/24')
+        self.assertEqual(str(net.subnet_at(-1, 24)), '10.255.255.0/24')
+        self.assertEqual(str(net.subnet_at(1)), '10.128.0.0/9')
+        self.assertRaises(IndexError, net.subnet_at, 1 << 16, 24)
+        self.assertRaises(IndexError, net.subnet_at, -(1 << 16) - 1, 24)
+
+    def test_iter_hosts(self):
+        self.assertEqual([str(host) for host in Network(IPv4Address('10.10.10.0'), 30).iter_hosts()],
+                         ['10.10.10.1', '10.10.10.2'])
+        self.assertEqual(list(Network(IPv4Address('10.10.10.0'), 31).iter_hosts()), [])
+        self.assertEqual([str(host) for host in Network(IPv4Address('10.10.10.0'), 32).iter_hosts()],
+                         ['10.10.10.0'])
+        self.assertEqual(str(next(Network(IPv4Address('0.0.0.0'), 0).iter_hosts())), '0.0.0.1')
+
+    def test_host_at(self):
+        net = Network(IPv4Address('10.0.0.0'), 8)
+        self.assertEqual(str(net.host_at(0)), '10.0.0.1')
+        self.assertEqual(str(net.host_at(-1)), '10.255.255.254')
+        self.assertRaises(IndexError, net.host_at, net.total_hosts)
+        self.assertRaises(IndexError, Network(IPv4Address('10.10.10.0'), 31).host_at, 0)
+
+    def test_supernet(self):
+        net = Network(IPv4Address('192.168.255.128'), 25)
+        self.assertEqual(str(net.supernet()), '192.168.255.0/24')
+        self.assertEqual(str(net.supernet(16)), '192.168.0.0/16')
+        self.assertEqual(str(net.supernet(25)), '192.168.255.128/25')
+        self.assertRaises(InvalidMaskError, net.supernet, 26)
+        self.assertRaises(InvalidMaskError, Network(IPv4Address('0.0.0.0'), 0).supernet)
+
+    def test_exclude(self):
+        net = Network(IPv4Address('192.168.0.0'), 24)
+        self.assertEqual([str(subnet) for subnet in net.exclude(Network(IPv4Address('192.168.0.64'), 26))],
+                         ['192.168.0.0/26', '192.168.0.128/25'])
+        self.assertEqual([str(subnet) for subnet in net.exclude(Network(IPv4Address('192.168.0.255'), 32))],
+                         ['192.168.0.0/25', '192.168.0.128/26', '192.168.0.192/27', '192.168.0.224/28',
+                          '192.168.0.240/29', '192.168.0.248/30', '192.168.0.252/31', '192.168.0.254/32'])
+        self.assertEqual(net.exclude(net), [])
+        self.assertEqual(net.exclude(Network(IPv4Address('192.168.0.0'), 16)), [])
+        self.assertEqual(net.exclude(Network(IPv4Address('10.0.0.0'), 8)), [net])
+        self.assertEqual(net.exclude(Network(IPv4Address('10.0.0.0'), 25)), [net])
+
+    def test_collapse(self):
+        networks = [Network(IPv4Address('192.168.1.0'), 24), Network(IPv4Address('192.168.0.0'), 24),
+                    Network(IPv4Address('192.168.0.128'), 25), Network(IPv4Address('10.0.0.0'), 8),
+                    Network(IPv4Address('192.168.2.0'), 24), Network(IPv4Address('10.1.0.0'), 16)]
+        self.assertEqual([str(network) for network in Network.collapse(networks)],
+                         ['10.0.0.0/8', '192.168.0.0/23', '192.168.2.0/24'])
+        self.assertEqual([str(network) for network in Network.collapse([Network(IPv4Address('0.0.0.0'), 1),
+                                                                        Network(IPv4Address('128.0.0.0'), 1)])],
+                         ['0.0.0.0/0'])
+        self.assertEqual(Network.collapse([]), [])
+
     def test_total_hosts(self):
         net = Network(IPv4Address('192.168.255.128'), 25)
         self.assertEqual(net.total_hosts, 126)
@@ -196,6 +293,33 @@ class MyTestCase(unittest.TestCase):
         net = Network(IPv4Address('10.1.1.1'), 32)
         self.assertFalse(net.public)
 
+    def test_network_value(self):
+        net = Network(IPv4Address('192.168.255.1'), 25)
+        self.assertIs(net.broadcast_address, net.broadcast_address)
+        self.assertIs(net.mask, net.mask)
+        self.assertIs(net.last_usable_address, net.last_usable_address)
+        self.assertEqual(net.str_mask, '255.255.255.128')
+        self.assertEqual((net.int_address, net.int_mask, net.int_wildcard, net.int_broadcast_address),
+                         (0xC0A8FF00, 0xFFFFFF80, 0x7F, 0xC0A8FF7F))
+        self.assertIsNone(Network(IPv4Address('10.0.0.0'), 31).first_usable_address)
+        self.assertEqual(str(Network(IPv4Address('010.000.000.000'), 8)), '10.0.0.0/8')
+        self.assertEqual(str(Network(IPv6Address('2001:0DB8::'), 32)), '2001:db8::/32')
+        self.assertEqual(str(Route(Network(IPv4Address('010.0.0.0'), 8), None, 'en0', 1)),
+                         'net: 10.0.0.0/8, interface: en0, metric: 1')
+        self.assertRaises(AttributeError, setattr, net, 'mask_length', 24)
+        self.assertRaises(AttributeError, setattr, net, 'other', 1)
+        counts = {Network(IPv4Address('10.0.0.0'), 8): 1}
+        counts[Network(IPv4Address('10.1.2.3'), 8)] = 2
+        self.assertEqual(counts, {Network(IPv4Address('10.0.0.0'), 8): 2})
+        self.assertNotEqual(Network(IPv4Address('0.0.0.0'), 0), Network(IPv6Address('::'), 0))
+        self.assertNotEqual(Network(IPv4Address('10.0.0.0'), 8), '10.0.0.0/8')
+        networks = [Network(IPv6Address('::'), 0), Network(IPv4Address('10.0.0.0'), 16),
+                    Network(IPv4Address('10.0.0.0'), 8), Network(IPv4Address('9.0.0.0'), 8)]
+        self.assertEqual([str(network) for network in sorted(networks)],
+                         ['9.0.0.0/8', '10.0.0.0/8', '10.0.0.0/16', '::/0'])
+        self.assertTrue(networks[2] < networks[1] <= networks[1] < networks[0])
+        self.assertTrue(networks[0] > networks[3] >= networks[3])
+
     def test_route_creation(self):
         route = Route(Network(IPv4Address('10.123.1.0'), 24), '192.168.0.1', 'en0', 10)
         self.assertEqual(str(route), 'net: 10.123.1.0/24, gateway: 192.168.0.1, interface: en0, metric: 10')
@@ -246,5 +370,208 @@ class MyTestCase(unittest.TestCase):
         self.assertEqual(str(router.route_for_address(IPv4Address('10.123.1.1'))),
                          'net: 10.123.1.0/25, interface: en2, metric: 10')
 
+    def test_routes_set_operations(self):
+        first = Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en0', 10)
+        second = Route(Network(IPv4Address('10.0.0.0'), 8), None, 'en1', 10)
+        router = Router(set([first]))
+        self.assertEqual(router.routes | set([second]), set([first, second]))
+        self.assertEqual(set([second]) | router.routes, set([first, second]))
+        self.assertEqual(router.routes - set([first]), set())
+        self.assertEqual(router.routes & set([first, second]), set([first]))
+        self.assertIs(type(router.routes | set([second])), set)
+        self.assertEqual(router.routes.union([second]), set([first, second]))
+        self.assertTrue(router.routes.issubset(set([first, second])))
+        routes = router.routes.copy()
+        routes.add(second)
+        self.assertEqual(len(router.routes), 1)
+        self.assertEqual(router.routes, set([first]))
+        router.routes.symmetric_difference_update([first, second])
+        self.assertEqual(router.route_for_address(IPv4Address('10.0.0.1')), second)
+        router.routes.clear()
+        self.assertIsNone(router.route_for_address(IPv4Address('10.0.0.1')))
+
+    def test_ipv6_address(self):
+        self.assertEqual(int(IPv6Address('::1')), 1)
+        self.assertEqual(int(IPv6Address('2001:db8::ff00:42:8329')), 0x20010DB8000000000000FF0000428329)
+        self.assertEqual(int(IPv6Address('::ffff:192.0.2.1')), 0xFFFFC0000201)
+        self.assertEqual(str(IPv6Address('2001:0DB8:0000:0000:0001:0000:0000:0001')), '2001:db8::1:0:0:1')
+        self.assertEqual(str(IPv6Address(0)), '::')
+        self.assertEqual(str(IPv6Address('2001:db8:0:1:1:1:1:1')), '2001:db8:0:1:1:1:1:1')
+        self.assertEqual(str(IPv6Address.from_bytes(bytes(15) + b'\x01')), '::1')
+        self.assertEqual(IPv6Address('fe80::1').packed(), b'\xfe\x80' + bytes(13) + b'\x01')
+        for invalid in ('1:2:3:4:5:6:7:8:9', '1::2::3', '12345::', 'g::', '::1.2.3', '1:2:3:4:5:6:7', ':::',
+                        '0x1::', '1.2.3.4', 'fe80::1%eth0', 1 << 128, -1, None):
+            self.assertRaises(InvalidIpError, IPv6Address, invalid)
+        self.assertNotEqual(IPv6Address(1), IPv4Address(1))
+        # IPv4 addresses order before IPv6 ones, whatever their values
+        self.assertTrue(IPv4Address(1) < IPv6Address(1) and IPv4Address(1) <= IPv6Address(0))
+        self.assertFalse(IPv4Address(1) >= IPv6Address(1) or IPv4Address(0xFFFFFFFF) > IPv6Address(0))
+        self.assertEqual(sorted([IPv6Address(0), IPv4Address(2), IPv4Address(1)]),
+                         [IPv4Address(1), IPv4Address(2), IPv6Address(0)])
+        self.assertTrue(IPv6Address(2) > 1 and IPv4Address(2) >= 2)
+        self.assertEqual(IPv6Address('::1') + 1, IPv6Address('::2'))
+        self.assertEqual(IPv6Address('::1').version, 6)
+
+    def test_ipv6_network(self):
+        net = Network(IPv6Address('2001:db8::1'), 32)
+        self.assertEqual(str(net), '2001:db8::/32')
+        self.assertEqual(net.version, 6)
+        self.assertIn(IPv6Address('2001:db8:ffff::1'), net)
+        self.assertNotIn(IPv6Address('2001:db9::'), net)
+        self.assertNotIn(IPv4Address('32.1.13.184'), net)
+        self.assertEqual(str(net.mask), 'ffff:ffff::')
+        self.assertEqual(str(net.broadcast_address), '2001:db8:ffff:ffff:ffff:ffff:ffff:ffff')
+        self.assertEqual(net.total_hosts, 1 << 96)
+        self.assertEqual(str(net.first_usable_address), '2001:db8::')
+        self.assertEqual([str(subnet) for subnet in net.subnets], ['2001:db8::/33', '2001:db8:8000::/33'])
+        self.assertEqual(str(net.subnet_at(-1, 48)), '2001:db8:ffff::/48')
+        self.assertEqual(str(net.supernet(16)), '2001::/16')
+        self.assertEqual([str(part) for part in Network(IPv6Address('2001:db8::'), 46).exclude(
+            Network(IPv6Address('2001:db8::'), 48))], ['2001:db8:1::/48', '2001:db8:2::/47'])
+        self.assertEqual([str(network) for network in Network.collapse([
+            Network(IPv6Address('2001:db8:1::'), 48), Network(IPv4Address('10.0.0.0'), 8),
+            Network(IPv6Address('2001:db8::'), 48)])], ['10.0.0.0/8', '2001:db8::/47'])
+        self.assertRaises(InvalidMaskError, Network, IPv6Address('::'), 129)
+        self.assertNotEqual(Network(IPv6Address('::'), 0), Network(IPv4Address('0.0.0.0'), 0))
+        self.assertFalse(Network(IPv6Address('fd00::'), 8).public)
+        self.assertFalse(Network(IPv6Address('2001:db8::'), 32).public)
+        self.assertTrue(Network(IPv6Address('2a00:1450::'), 32).public)
+
+    def test_dual_stack_router(self):
+        routes = set([Route(Network(IPv4Address('0.0.0.0'), 0), '192.168.0.1', 'en0', 10),
+                      Route(Network(IPv6Address('::'), 0), 'fe80::1', 'en0', 10),
+                      Route(Network(IPv6Address('2001:db8::'), 32), None, 'en1', 10),
+                      Route(Network(IPv6Address('2001:db8:1::'), 48), None, 'en2', 10),
+                      Route(Network(IPv6Address('2001:db8:1::'), 48), 'fe80::2', 'en3', 10)])
+        router = Router(routes)
+        self.assertEqual(len(routes), 5)
+        self.assertEqual(str(router.route_for_address(IPv6Address('2001:db8:2::1'))),
+                         'net: 2001:db8::/32, interface: en1, metric: 10')
+        self.assertEqual(str(router.route_for_address(IPv6Address('2002::1'))),
+                         'net: ::/0, gateway: fe80::1, interface: en0, metric: 10')
+        self.assertEqual(router.route_for_address(IPv4Address('10.0.0.1')).interface_name, 'en0')
+        self.assertEqual(len(router.next_hops(IPv6Address('2001:db8:1::5'))), 2)
+        self.assertIn(router.route_for_flow(IPv6Address('2001:db8:1::5'),
+                                            Router.flow_hash(IPv6Address('2001:db8:9::1'),
+                                                             IPv6Address('2001:db8:1::5'), 6, 1234, 443)),
+                      router.next_hops(IPv6Address('2001:db8:1::5')))
+        router.compile()
+        router.remove_route(Route(Network(IPv6Address('2001:db8::'), 32), None, 'en1', 10))
+        self.assertEqual(router.route_for_address(IPv6Address('2001:db8:2::1')).interface_name, 'en0')
+        routes.add(Route(Network(IPv6Address('2001:db8:2::'), 48), None, 'en4', 1))
+        self.assertEqual(router.route_for_address(IPv6Address('2001:db8:2::1')).interface_name, 'en4')
+        self.assertEqual(len(router.indexed_routes), 1)
+
+    def test_router_resyncs_after_change(self):
+        routes = set(example_routes())
+        router = Router(routes)
+        address = IPv4Address('10.123.1.1')
+        router.add_route(Route(Network(IPv4Address('10.123.1.0'), 25), None, 'en5', 1))
+        self.assertEqual(router.route_for_address(address).interface_name, 'en5')
+        routes.add(Route(Network(IPv4Address('10.123.1.0'), 26), None, 'en6', 1))
+        self.assertEqual(router.route_for_address(address).interface_name, 'en6')
+        router.remove_route(Route(Network(IPv4Address('10.123.1.0'), 26), None, 'en6', 1))
+        self.assertEqual(router.route_for_address(address).interface_name, 'en5')
+
+    def test_router_resyncs_after_same_size_swap(self):
+        router = Router(set(example_routes()))
+        router.compile()
+        router.enable_cache()
+        address = IPv4Address('10.123.1.1')
+        first = Route(Network(IPv4Address('10.123.1.0'), 24), None, 'en2', 101)
+        second = Route(Network(IPv4Address('10.123.1.0'), 24), None, 'en7', 1)
+        self.assertEqual(router.route_for_address(address), first)
+        router.routes.remove(first)
+        router.routes.add(second)
+        self.assertIs(router.route_for_address(address), second)
+        self.assertIs(router.version.compiled_table.lookup(int(address)), second)
+        # the trie is in line again, so the route can be removed by an update
+        router.remove_route(second)
+        self.assertEqual(router.route_for_address(address).interface_name, 'en3')
+        self.assertEqual(router.routes, set(example_routes()) - set([first]))
+
+    def test_update_is_atomic(self):
+        rnd = random.Random(11)
+        first = [Route(Network(IPv4Address(rnd.randrange(1 << 32) & 0xFFFFFF00), 24), None, 'first', 1)
+                 for _ in range(50)]
+        second = [Route(route.network, None, 'second', 1) for route in first]
+        addresses = [IPv4Address(int(route.network.address) | 1) for route in first]
+        router = Router(set(first))
+        router.compile()
+        router.enable_cache(16)
+        mixed = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                version = router.version
+                names = set(version.route_for_address(address).interface_name for address in addresses)
+                if len(names) != 1:
+                    mixed.append(names)
+                if router.route_for_address(addresses[0]).interface_name not in ('first', 'second'):
+                    mixed.append(None)
+
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        for reader in readers:
+            reader.start()
+        for _ in range(30):
+            router.update(added=second, removed=first)
+            router.update(added=first, removed=second)
+        done.set()
+        for reader in readers:
+            reader.join()
+        self.assertEqual(mixed, [])
+        self.assertEqual(set(router.routes), set(first))
+        self.assertEqual(router.version.generation, 61)
+
+    def test_failed_update_changes_nothing(self):
+        router = Router(set(example_routes()))
+        version = router.version
+        missing = Route(Network(IPv4Address('10.9.0.0'), 16), None, 'en9', 1)
+        self.assertRaises(KeyError, router.update, [Route(Network(IPv4Address('10.1.0.0'), 16), None, 'en5', 1)],
+                          [missing])
+        self.assertIs(router.version, version)
+        self.assertEqual(router.routes, set(example_routes()))
+
+    def test_route_for_flow(self):
+        members = [Route(Network(IPv4Address('10.123.1.0'), 24), '192.168.0.{}'.format(host), 'en2', 101)
+                   for host in (3, 1, 2)]
+        router = Router(set(example_routes()) | set(members))
+        address = IPv4Address('10.123.1.1')
+        self.assertEqual([int(route.gateway) & 0xFF for route in router.next_hops(address)], [0, 1, 2, 3])
+        self.assertEqual(router.next_hops(IPv4Address('11.0.0.1')),
+                         (Route(Network(IPv4Address('0.0.0.0'), 0), '192.168.0.1', 'en0', 10),))
+        chosen = set()
+        for port in range(64):
+            flow_key = Router.flow_hash(IPv4Address('172.16.0.1'), address, 6, 40000 + port, 443)
+            route = router.route_for_flow(address, flow_key)
+            self.assertIs(route, router.route_for_flow(address, flow_key))
+            chosen.add(route)
+        self.assertEqual(chosen, set(router.next_hops(address)))
+        self.assertEqual(Router.flow_hash(1, 2, 17, 3, 4), Router.flow_hash(IPv4Address(1), IPv4Address(2), 17, 3, 4))
+        self.assertIsNone(Router(set()).route_for_flow(address, 1))
+        self.assertEqual(Router(set()).next_hops(address), ())
+
+    def test_router_prefix_queries(self):
+        router = Router(set(example_routes()) | set([Route(Network(IPv6Address('2001:db8::'), 32), None, 'en5', 1),
+                                                     Route(Network(IPv6Address('2001:db8:1::'), 48), None, 'en5', 1)]))
+        network = Network(IPv4Address('10.123.0.0'), 20)
+        self.assertEqual([str(route.network) for route in router.covering_routes(network)],
+                         ['0.0.0.0/0', '10.0.0.0/8'])
+        self.assertEqual(sorted(route.interface_name for route in router.more_specific_routes(network)),
+                         ['en2', 'en3', 'en4'])
+        self.assertEqual([route.metric for route in router.exact_routes(network)], [100])
+        self.assertEqual([str(route.network) for route in
+                          router.more_specific_routes(Network(IPv6Address('2001:db8::'), 32))], ['2001:db8:1::/48'])
+        self.assertEqual(list(router.exact_routes(Network(IPv4Address('10.123.2.0'), 24))), [])
+        # the iterators keep walking the version they started on
+        more_specifics = router.more_specific_routes(Network(IPv4Address('10.0.0.0'), 8))
+        next(more_specifics)
+        router.update(added=[Route(Network(IPv4Address('10.200.0.0'), 16), None, 'en6', 1)],
+                      removed=[Route(Network(IPv4Address('10.123.1.0'), 24), None, 'en4', 103)])
+        self.assertEqual(len(list(more_specifics)), 3)
+        self.assertEqual(len(list(router.more_specific_routes(Network(IPv4Address('10.0.0.0'), 8)))), 4)
+
+
 if __name__ == '__main__':
     unittest.main()